@@ -0,0 +1,1215 @@
+#!/usr/bin/env python3
+"""
+Command line downloader and headless download engine built on yt-dlp
+
+The GUI uses the same engine for its download workers, so nothing in this
+module may import tkinter or customtkinter.
+
+yt-dlp takes longer to import than everything else the CLI and GUI load
+together, so it is only imported inside the functions that need it (or by
+``warm_up`` in the background); ``--help`` and the GUI window never wait
+for it.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import importlib.util
+import itertools
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, fields, asdict, replace
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Callable, Iterable, Iterator, Set, TextIO
+from urllib.parse import urlsplit
+
+if importlib.util.find_spec("yt_dlp") is None:
+    print("Error: yt-dlp is not installed. Install with: pip install yt-dlp", file=sys.stderr)
+    sys.exit(1)
+
+from archive import DownloadArchive, default_archive
+from bandwidth import BandwidthScheduler, JobThrottle, DEFAULT_PRIORITY, PRIORITIES, parse_profile, parse_rate
+from formats import AUDIO_CODECS, CONTAINER_EXTS, FormatIndex
+from infocache import InfoCache, DEFAULT_TTL as DEFAULT_CACHE_TTL, EXPIRY_MARGIN, normalize_url
+from journal import JobJournal, JournalBusy
+from metrics import Instruments, JobTimer, network_collector, queue_collector, serve_metrics
+from retry import DEFAULT_ATTEMPTS, FATAL, REFRESH, THROTTLE_SPEED, RetryPolicy, ThrottleDetector, classify
+from storage import MIN_FREE, OutputManager, Reservation, parse_size, selected_size
+
+if TYPE_CHECKING:
+    # Only for annotations; at runtime yt-dlp is imported where it is used
+    import yt_dlp as ytdlp
+
+
+DEFAULT_OUTTMPL = "%(title)s [%(id)s].%(ext)s"
+DEFAULT_WORKERS = 4
+DEFAULT_PER_DOMAIN = 2
+# Subtitle and metadata files fetched alongside the media, across all jobs
+SIDECAR_WORKERS = 4
+# Weight of the latest job in DownloadQueue.slot_seconds
+SLOT_SMOOTHING = 0.2
+
+FORMAT_CHOICES = ["best", "resolution", "audio-only"]
+AUDIO_FORMATS = ["mp3", "m4a", "opus", "flac", "aac"]
+CONTAINERS = ["mp4", "mkv", "webm"]
+
+
+class EngineError(Exception):
+    """A job cannot be started with the given options"""
+
+
+class JobCancelled(Exception):
+    """Raised from a progress hook to stop a job that was cancelled mid-download"""
+
+
+@dataclass
+class DownloadOptions:
+    """Everything needed to turn a URL into a yt-dlp run"""
+
+    format_choice: str = "best"
+    resolution: Optional[int] = None
+    with_audio: bool = True
+    audio_format: str = "m4a"
+    container: Optional[str] = None
+    format_spec: Optional[str] = None
+    outdir: str = "."
+    output_template: str = DEFAULT_OUTTMPL
+    allow_playlist: bool = False
+    playlist_items: Optional[str] = None
+    download_archive: Optional[str] = None
+    connections: int = 1
+    concurrent_fragments: int = 1
+    priority: float = DEFAULT_PRIORITY
+    rate_limit: Optional[float] = None
+    # Sidecar files, see sidecars.py; subtitle languages are codes, regexes or "all"
+    subtitle_langs: List[str] = field(default_factory=list)
+    auto_subtitles: bool = False
+    write_chapters: bool = False
+    write_description: bool = False
+    write_info_json: bool = False
+    ydl_extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def has_ffmpeg() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def domain_of(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+def build_format(options: DownloadOptions, formats: Optional[FormatIndex] = None) -> str:
+    """
+    The yt-dlp format string for ``options``. With the video's format index,
+    the formats it chooses come first by id, so yt-dlp need not search for
+    them; the generic selector stays as the fallback in case the ids changed
+    since the index was built.
+    """
+    if options.format_spec:
+        return options.format_spec
+    if options.format_choice == "audio-only":
+        # Streams that only need copying out of their container come first
+        preferred = "/".join(f"bestaudio[acodec^={codec}]" for codec in AUDIO_CODECS.get(options.audio_format, ()))
+        fallback = f"{preferred}/bestaudio/best" if preferred else "bestaudio/best"
+    elif options.format_choice == "resolution" and options.resolution and not options.with_audio:
+        # The height itself is preferred through format_sort (build_ydl_opts)
+        fallback = "bv*"
+    else:
+        fallback = "bv*+ba/b"
+    chosen = formats.format_spec(options) if formats is not None and not options.allow_playlist else None
+    return f"{chosen}/{fallback}" if chosen else fallback
+
+
+def build_ydl_opts(options: DownloadOptions,
+                   progress_hooks: Iterable[Callable[[Dict[str, Any]], None]] = (),
+                   quiet: bool = True, formats: Optional[FormatIndex] = None) -> Dict[str, Any]:
+    """Translate DownloadOptions (and the video's format index, if known) into a YoutubeDL params dict"""
+    ydl_opts: Dict[str, Any] = {
+        "noplaylist": not options.allow_playlist,
+        "playlist_items": options.playlist_items,
+        "outtmpl": os.path.join(options.outdir, options.output_template),
+        "progress_hooks": list(progress_hooks),
+        "quiet": quiet,
+        "noprogress": quiet,
+        "no_warnings": True,
+        "format": build_format(options, formats),
+        # Direct http(s) formats: byte ranges over N connections (segmented.py)
+        "segment_connections": options.connections,
+        # DASH/HLS: fragments fetched in parallel by yt-dlp itself
+        "concurrent_fragment_downloads": options.concurrent_fragments,
+    }
+
+    if options.download_archive:
+        ydl_opts["download_archive"] = options.download_archive
+
+    if options.format_choice == "audio-only":
+        if not has_ffmpeg():
+            raise EngineError("ffmpeg required for audio extraction")
+        ydl_opts["postprocessors"] = [{
+            "key": "FFmpegExtractAudio",
+            "preferredcodec": options.audio_format,
+            "preferredquality": "0",
+        }]
+    else:
+        format_sort = ["res"]
+        if options.format_choice == "resolution" and options.resolution:
+            # Nearest height: the tallest not above the requested one, else
+            # the shortest above it (same rule as FormatIndex.nearest_height)
+            format_sort = [f"res:{int(options.resolution)}"]
+        if options.container:
+            ydl_opts["merge_output_format"] = options.container
+            if options.container in CONTAINER_EXTS:
+                # Resolution still decides first; among equal resolutions, formats
+                # that fit the container win over ones that would need a remux
+                format_sort.append("ext:{}:{}".format(*CONTAINER_EXTS[options.container]))
+        if format_sort != ["res"] and not options.format_spec:
+            ydl_opts["format_sort"] = format_sort
+
+    ydl_opts.update(options.ydl_extra)
+    return ydl_opts
+
+
+def conversion_plan(info: Dict[str, Any], options: DownloadOptions) -> Optional[str]:
+    """
+    What turning the formats yt-dlp selected into the requested file takes:
+    "copy" (nothing), "remux" (streams copied into another container) or
+    "transcode" (audio re-encoded); None when the codecs are not known
+    """
+    formats = info.get("requested_formats") or [info]
+    if options.format_choice == "audio-only":
+        acodec = formats[0].get("acodec")
+        if not acodec or acodec == "none":
+            return None
+        if not acodec.lower().startswith(AUDIO_CODECS.get(options.audio_format, ())):
+            return "transcode"
+        return "copy" if formats[0].get("ext") == options.audio_format else "remux"
+    if len(formats) == 1:
+        return "copy"
+    return "remux"
+
+
+def options_to_dict(options: DownloadOptions) -> Dict[str, Any]:
+    """JSON-safe form of the options for the journal; credentials are left out"""
+    data = asdict(options)
+    data["ydl_extra"] = {k: v for k, v in options.ydl_extra.items() if k not in ("username", "password")}
+    return data
+
+
+def options_from_dict(data: Dict[str, Any]) -> DownloadOptions:
+    known = {f.name for f in fields(DownloadOptions)}
+    options = DownloadOptions(**{k: v for k, v in data.items() if k in known})
+    if "cookiesfrombrowser" in options.ydl_extra:
+        options.ydl_extra["cookiesfrombrowser"] = tuple(options.ydl_extra["cookiesfrombrowser"])
+    return options
+
+
+class DownloadJob:
+    """
+    A single queued download with the options captured at submit time.
+
+    Long queues hold thousands of these, so a job keeps no info dict: the
+    engine reads the full metadata back from its InfoCache when the job
+    starts, and the fetch step's FormatIndex stands in for it until then.
+    """
+
+    __slots__ = ("id", "key", "url", "options", "domain", "title", "status", "formats", "thumbnail",
+                 "conversion", "cancelled")
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url: str, options: DownloadOptions, key: Optional[str] = None):
+        self.id = next(self._ids)
+        self.key = key or uuid.uuid4().hex
+        self.url = url
+        self.options = options
+        self.domain = domain_of(url)
+        self.title = url
+        self.status = "queued"
+        self.formats: Optional[FormatIndex] = None
+        self.thumbnail: Optional[str] = None
+        # "copy", "remux" or "transcode" once formats are selected (see conversion_plan)
+        self.conversion: Optional[str] = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop the job at its next progress update; DownloadQueue.cancel drops it if still waiting"""
+        self.cancelled = True
+
+    @property
+    def signature(self) -> str:
+        """Identifies jobs that would produce the same file"""
+        o = self.options
+        return json.dumps([
+            normalize_url(self.url), o.format_choice, o.resolution, o.with_audio, o.audio_format,
+            o.container, o.format_spec, os.path.abspath(o.outdir), o.output_template,
+        ])
+
+
+def entry_thumbnail(entry: Dict[str, Any]) -> Optional[str]:
+    """Best thumbnail URL of a full or flat (playlist entry) info dict"""
+    if entry.get("thumbnail"):
+        return entry["thumbnail"]
+    thumbnails = [t for t in entry.get("thumbnails") or [] if t.get("url")]
+    # yt-dlp sorts thumbnails worst to best
+    return thumbnails[-1]["url"] if thumbnails else None
+
+
+def archive_id(entry: Dict[str, Any]) -> Optional[str]:
+    extractor = entry.get("ie_key") or entry.get("extractor_key")
+    if not extractor or not entry.get("id"):
+        return None
+    # Same format as yt_dlp.utils.make_archive_id
+    return f"{extractor.lower()} {entry['id']}"
+
+
+def url_archive_id(url: str) -> Optional[str]:
+    """
+    Archive id of a video URL worked out from the URL alone, the way yt-dlp
+    does before extracting; None when the extractor cannot tell the id
+    without a network round trip
+    """
+    import yt_dlp as ytdlp
+
+    for ie in ytdlp.extractor.gen_extractor_classes():
+        if ie.suitable(url):
+            video_id = ie.get_temp_id(url)
+            return f"{ie.ie_key().lower()} {video_id}" if video_id else None
+    return None
+
+
+def resolve_playlist(ydl: "ytdlp.YoutubeDL", url: str) -> Dict[str, Any]:
+    """
+    Resolve ``url`` only as far as the top-level result, following redirects.
+    Playlist entries are left as the extractor's lazy generator or paged list.
+    """
+    result = ydl.extract_info(url, download=False, process=False)
+    while result.get("_type") in ("url", "url_transparent"):
+        result = ydl.extract_info(result["url"], ie_key=result.get("ie_key"), download=False, process=False)
+    return result
+
+
+def shared_network():
+    """
+    Send the requests of every YoutubeDL, segmented download and thumbnail
+    fetch in the process over netpool's shared connections and DNS cache.
+    Idempotent; YoutubeDLs pick the handler up at their first request.
+    """
+    import netpool
+    import requesthandler  # noqa: F401
+
+    netpool.install()
+
+
+class ResolverPool:
+    """
+    YoutubeDLs for resolving single videos off the job's own worker (see
+    ingest.py and prefetch.py): one per thread and distinct ``ydl_extra``,
+    reused for every URL, so cookies and logins apply as in the job's own
+    extraction and what lands in the cache is what its worker would have
+    resolved
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, options: DownloadOptions) -> "ytdlp.YoutubeDL":
+        ydls = getattr(self._local, "ydls", None)
+        if ydls is None:
+            ydls = self._local.ydls = {}
+        key = tuple(sorted((name, repr(value)) for name, value in options.ydl_extra.items()))
+        ydl = ydls.get(key)
+        if ydl is None:
+            import yt_dlp as ytdlp
+
+            opts = {"quiet": True, "no_warnings": True, "noplaylist": True}
+            opts.update(options.ydl_extra)
+            ydl = ydls[key] = ytdlp.YoutubeDL(opts)
+        return ydl
+
+
+def extract_info(ydl: "ytdlp.YoutubeDL", url: str, cache: Optional[InfoCache] = None) -> Dict[str, Any]:
+    """Resolve ``url`` without downloading, going through the cache when given one"""
+    info = cache.get(url) if cache is not None else None
+    if info is None:
+        shared_network()
+        info = ydl.extract_info(url, download=False)
+        # Playlists keep their entries; only single videos are cached
+        info = ydl.sanitize_info(info, remove_private_keys=info.get("_type", "video") == "video")
+        if cache is not None:
+            cache.put(url, info)
+    return info
+
+
+def warm_up():
+    """Import yt-dlp and the engine's yt-dlp based modules ahead of the first job"""
+    import yt_dlp  # noqa: F401
+    import postprocessors  # noqa: F401
+    import segmented  # noqa: F401
+    shared_network()
+
+
+class Engine:
+    """
+    Services shared by every job a process runs: the metadata cache, the
+    job journal, the download archives, the bandwidth scheduler, the
+    post-processing and sidecar pools, the instruments every job reports
+    its phase timings to, the retry policy and the disk space reservations.
+    The cache and journal are optional so callers can run fully stateless;
+    an unlimited scheduler, a pool sized to the CPU count, metrics without a
+    trace file, the default retry policy and no extra output volumes are
+    used when none are given.
+    """
+
+    def __init__(self, cache: Optional[InfoCache] = None, journal: Optional[JobJournal] = None,
+                 quiet: bool = True, scheduler: Optional[BandwidthScheduler] = None,
+                 postprocess: Optional["PostProcessPool"] = None, instruments: Optional[Instruments] = None,
+                 retry: Optional[RetryPolicy] = None, storage: Optional[OutputManager] = None):
+        self.cache = cache
+        self.journal = journal
+        self.quiet = quiet
+        self.scheduler = scheduler or BandwidthScheduler()
+        self.postprocess = postprocess or PostProcessPool()
+        self.instruments = instruments or Instruments()
+        self.instruments.metrics.add_collector(network_collector)
+        self.retry = retry or RetryPolicy()
+        self.storage = storage or OutputManager()
+        self.sidecars = ThreadPoolExecutor(max_workers=SIDECAR_WORKERS, thread_name_prefix="sidecar")
+        self._archives: Dict[str, DownloadArchive] = {}
+        self._archives_lock = threading.Lock()
+
+    def archive(self, path: str) -> DownloadArchive:
+        """The process-wide index of the archive file at ``path``"""
+        path = os.path.abspath(path)
+        with self._archives_lock:
+            if path not in self._archives:
+                self._archives[path] = DownloadArchive(path)
+            return self._archives[path]
+
+    def archived(self, job: DownloadJob, info: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether the job's video is already in its download archive, without network access"""
+        if not job.options.download_archive or job.options.allow_playlist:
+            return False
+        info = info or (self.cache.get(job.url) if self.cache is not None else None)
+        video_id = archive_id(info) if info else url_archive_id(job.url)
+        return video_id is not None and video_id in self.archive(job.options.download_archive)
+
+    def queued(self, job: DownloadJob):
+        """Record a job before handing it to a DownloadQueue"""
+        if self.journal is not None:
+            self.journal.queued(job.key, job.url, job.signature, options_to_dict(job.options))
+
+    def dropped(self, job: DownloadJob):
+        """Record a queued job that was cancelled before a worker took it"""
+        job.status = "cancelled"
+        if self.journal is not None:
+            self.journal.failed(job.key, "cancelled")
+
+    def resume(self) -> List[DownloadJob]:
+        """
+        Jobs left unfinished by a previous process, pinned to the formats they
+        had resolved so yt-dlp continues the same .part files
+        """
+        if self.journal is None:
+            return []
+        jobs = []
+        for entry in self.journal.pending():
+            options = options_from_dict(entry["options"])
+            if entry.get("format_id"):
+                options.format_spec = entry["format_id"]
+            if entry.get("filename"):
+                # Routed to another output volume: continue its .part files there
+                volume = self.storage.volume_of(entry["filename"])
+                if volume is not None and self.storage.volume_of(options.outdir) != volume:
+                    options.outdir = volume
+            job = DownloadJob(entry["url"], options, key=entry["key"])
+            if entry.get("filename"):
+                job.title = os.path.basename(entry["filename"])
+            jobs.append(job)
+        return jobs
+
+    def expand(self, url: str, options: DownloadOptions) -> Iterator[DownloadJob]:
+        """
+        Stream one job per playlist or channel entry as the extractor pages
+        through the listing, so the first downloads start long before a large
+        channel is fully enumerated. Entries are flat (not resolved) and only
+        the ones selected by ``options.playlist_items`` and missing from
+        ``options.download_archive`` are yielded. A URL that is not a
+        playlist yields a single job, as does a playlist whose extractor
+        returns already-resolved entries without URLs of their own.
+        """
+        import yt_dlp as ytdlp
+
+        entry_options = replace(options, allow_playlist=False)
+        opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "extract_flat": "in_playlist",
+            "lazy_playlist": True,
+            "playlist_items": options.playlist_items,
+        }
+        opts.update(options.ydl_extra)
+        done = self.archive(options.download_archive) if options.download_archive else set()
+
+        with ytdlp.YoutubeDL(opts) as ydl:
+            result = resolve_playlist(ydl, url)
+            if result.get("_type") != "playlist":
+                yield DownloadJob(url, entry_options)
+                return
+            unaddressable = 0
+            for _, entry in ytdlp.utils.PlaylistEntries(ydl, result).get_requested_items():
+                if not entry or archive_id(entry) in done:
+                    continue
+                entry_url = entry.get("url") or entry.get("webpage_url")
+                if not entry_url:
+                    unaddressable += 1
+                    continue
+                job = DownloadJob(entry_url, entry_options)
+                job.title = entry.get("title") or entry_url
+                job.thumbnail = entry_thumbnail(entry)
+                yield job
+            if unaddressable:
+                job = DownloadJob(url, options)
+                job.title = result.get("title") or url
+                yield job
+
+    def run(self, job: DownloadJob,
+            progress_hooks: Iterable[Callable[[Dict[str, Any]], None]] = (),
+            on_downloaded: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """
+        Download one job and return its result record.
+
+        Jobs the journal already saw complete, with the file still on disk,
+        are skipped without touching the network. Metadata cached by an
+        earlier fetch is used instead of resolving the URL again, and the
+        cache is filled after a fresh extraction. ``job.formats``, the format
+        index of the fetch step, decides which formats to download when set.
+
+        Post-processing (merging, audio extraction, fixups) runs on the
+        engine's post-processing pool after every file has been downloaded;
+        ``on_downloaded`` is called just before, when only CPU work is left,
+        so a DownloadQueue can ``detach`` the job and start the next one.
+
+        Connection errors, 403s and throttled downloads are retried after a
+        backoff (see retry.py), keeping the data downloaded so far; progress
+        hooks get a ``{"status": "retrying", "attempt", "retry_in", "reason"}``
+        call before each wait, and the record counts them in ``retries``.
+
+        Never raises for download problems; failures are reported through the
+        record's ``status`` and ``error`` fields. A job ``cancel``led before or
+        during its download ends with status "cancelled".
+        """
+        timer = self.instruments.job(job.key, job.url)
+        record = self._run(job, timer, progress_hooks, on_downloaded)
+        timer.finish(record)
+        return record
+
+    def _run(self, job: DownloadJob, timer: JobTimer, progress_hooks: Iterable[Callable[[Dict[str, Any]], None]],
+             on_downloaded: Optional[Callable[[], None]]) -> Dict[str, Any]:
+        started = time.monotonic()
+        record: Dict[str, Any] = {"url": job.url, "status": "ok"}
+        if job.cancelled:
+            job.status = "cancelled"
+            record.update({"status": "cancelled", "elapsed": 0.0})
+            return record
+
+        done = self.journal.completed_path(job.signature) if self.journal is not None else None
+        if done:
+            job.status = "completed"
+            self.journal.completed(job.key, done)
+            record.update({"status": "skipped", "filepath": done, "elapsed": 0.0})
+            return record
+        if self.archived(job):
+            job.status = "completed"
+            if self.journal is not None:
+                self.journal.completed(job.key, None)
+            record.update({"status": "skipped", "archived": True, "elapsed": 0.0})
+            return record
+
+        job.status = "running"
+        timer.begin("setup")
+        if self.journal is not None:
+            self.journal.running(job.key)
+        throttle = self.scheduler.register(job.key, job.options.priority, job.options.rate_limit)
+        downloaded = []
+
+        def detach():
+            downloaded.append(True)
+            if on_downloaded is not None:
+                on_downloaded()
+
+        try:
+            for attempt in itertools.count(1):
+                # Also waits out a backoff another job's failure started for this domain
+                if not self.retry.wait(job.domain, lambda: job.cancelled):
+                    raise JobCancelled("cancelled")
+                try:
+                    info = self._attempt(job, timer, throttle, progress_hooks, detach, record)
+                    break
+                except Exception as e:
+                    # Nothing is retried once the download is done and only post-processing is left
+                    action = FATAL if job.cancelled or downloaded else classify(e)
+                    if action == FATAL or attempt >= self.retry.attempts:
+                        raise
+                    cause = e.exc_info[1] if getattr(e, "exc_info", None) else e
+                    if action == REFRESH and self.cache is not None:
+                        self.cache.invalidate(job.url)
+                    delay = self.retry.failed(job.domain)
+                    timer.retry()
+                    timer.begin("backoff")
+                    for hook in progress_hooks:
+                        hook({"status": "retrying", "attempt": attempt + 1, "retry_in": delay,
+                              "reason": str(cause).replace("ERROR: ", "")})
+            self.retry.succeeded(job.domain)
+            if info:
+                job.title = info.get("title") or job.title
+                record.update({
+                    "id": info.get("id"),
+                    "extractor": info.get("extractor_key"),
+                    "title": info.get("title"),
+                })
+                if info.get("_type") == "playlist":
+                    record["entries"] = len(info.get("entries") or [])
+                elif not info.get("requested_downloads") and self.archived(job, info):
+                    # Only known to be archived after extraction
+                    record.update({"status": "skipped", "archived": True})
+                else:
+                    downloads = info.get("requested_downloads") or [{}]
+                    record["filepath"] = downloads[0].get("filepath")
+                    record["conversion"] = job.conversion
+            job.status = "completed"
+            if self.journal is not None:
+                self.journal.completed(job.key, record.get("filepath"))
+        except Exception as e:
+            # yt-dlp wraps the actual failure in a DownloadError
+            timer.error = e.exc_info[1] if getattr(e, "exc_info", None) else e
+            if job.cancelled:
+                job.status = "cancelled"
+                record.update({"status": "cancelled"})
+                error = "cancelled"
+            else:
+                job.status = "failed"
+                record.update({"status": "error", "error": str(e)})
+                error = str(e)
+            if self.journal is not None:
+                self.journal.failed(job.key, error)
+        finally:
+            self.scheduler.unregister(throttle)
+        if timer.retries:
+            record["retries"] = timer.retries
+        record["elapsed"] = round(time.monotonic() - started, 3)
+        return record
+
+    def _attempt(self, job: DownloadJob, timer: JobTimer, throttle: JobThrottle,
+                 progress_hooks: Iterable[Callable[[Dict[str, Any]], None]],
+                 on_downloaded: Callable[[], None], record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        One try at downloading and post-processing the job; raises on failure.
+        Sidecar files that could not be written are listed in the record's
+        "sidecar_errors" but do not fail the job. Disk space is reserved for
+        the whole attempt, on whichever of the job's own directory and the
+        configured output volumes has the most room.
+        """
+        timer.begin("setup")
+        estimate = job.formats.estimate_size(job.options) if job.formats is not None else None
+        reservation = self.storage.reserve(job.options.outdir, estimate)
+        if reservation.path != os.path.abspath(job.options.outdir):
+            # Later attempts write to the same volume, so they find the .part files
+            job.options = replace(job.options, outdir=reservation.path)
+        try:
+            return self._attempt_reserved(job, timer, throttle, progress_hooks, on_downloaded, record, reservation)
+        finally:
+            reservation.release()
+
+    def _attempt_reserved(self, job: DownloadJob, timer: JobTimer, throttle: JobThrottle,
+                          progress_hooks: Iterable[Callable[[Dict[str, Any]], None]],
+                          on_downloaded: Callable[[], None], record: Dict[str, Any],
+                          reservation: Reservation) -> Dict[str, Any]:
+
+        def check_cancelled(d):
+            if job.cancelled:
+                raise JobCancelled("cancelled")
+
+        detector = ThrottleDetector(self.retry.throttle_speed, allowed=lambda: throttle.rate)
+        # The throttle hook runs first, on the thread that read the bytes
+        hooks = [check_cancelled, throttle.hook, timer.hook, detector.hook, reservation.hook, *progress_hooks]
+        ydl_opts = build_ydl_opts(job.options, hooks, self.quiet, job.formats)
+        ydl_opts["throttle"] = throttle
+        if job.options.download_archive:
+            # Shared index instead of yt-dlp re-reading the file per job
+            ydl_opts["download_archive"] = self.archive(job.options.download_archive)
+        ydl_opts["defer_post_process"] = True
+        shared_network()
+        from postprocessors import EngineYoutubeDL, FormatsSelected, JournalResolved
+        from sidecars import sidecar_tasks
+
+        sidecars: Dict[str, Future] = {}
+
+        def formats_selected(selected):
+            self._plan(job, timer, selected)
+            size = selected_size(selected, job.conversion)
+            if size is not None:
+                reservation.resize(size)
+            # Started before the media transfer and running alongside it
+            for path, task in sidecar_tasks(ydl, selected, job.options).items():
+                sidecars[path] = self.sidecars.submit(task)
+
+        with EngineYoutubeDL(ydl_opts) as ydl:
+            ydl.add_post_processor(FormatsSelected(formats_selected), when="before_dl")
+            if self.journal is not None:
+                ydl.add_post_processor(JournalResolved(self.journal, job.key), when="before_dl")
+            try:
+                info = self._download(ydl, job, timer)
+                tasks = ydl.deferred_tasks()
+                if tasks:
+                    self.scheduler.unregister(throttle)
+                    on_downloaded()
+                    timer.begin("postprocess")
+                    self.postprocess.run_all(tasks)
+            finally:
+                # Never leave a task using the YoutubeDL after it is closed
+                errors = []
+                for path, future in sidecars.items():
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors.append(f"{os.path.basename(path)}: {e}")
+        if errors:
+            record["sidecar_errors"] = errors
+        else:
+            record.pop("sidecar_errors", None)
+        return info
+
+    @staticmethod
+    def _plan(job: DownloadJob, timer: JobTimer, info: Dict[str, Any]):
+        job.conversion = timer.conversion = conversion_plan(info, job.options)
+        timer.begin("download")
+
+    def _download(self, ydl: "ytdlp.YoutubeDL", job: DownloadJob, timer: JobTimer) -> Dict[str, Any]:
+        import yt_dlp as ytdlp
+
+        if job.options.allow_playlist:
+            # Entries are resolved and downloaded one after the other; their
+            # downloads start the "download" phase
+            timer.begin("extract")
+            return ydl.extract_info(job.url, download=True)
+
+        cache = self.cache
+        # A fresh copy, decoded from disk only now that the job runs; media
+        # URLs about to expire are resolved again rather than failing mid-download
+        info = cache.get(job.url, valid_for=EXPIRY_MARGIN) if cache is not None else None
+        if info is not None:
+            timer.begin("select")
+            try:
+                # Same path as --load-info-json: format selection runs again on
+                # the stored formats, so no extractor round trip is needed
+                return ydl.process_ie_result(info, download=True)
+            except ytdlp.utils.DownloadError:
+                if job.cancelled:
+                    raise
+                # Most likely the signed media URLs expired; resolve again below
+                cache.invalidate(job.url)
+                timer.retry()
+
+        timer.begin("extract")
+        with self.instruments.profile(timer, "extract"):
+            info = extract_info(ydl, job.url, cache)
+        timer.begin("select")
+        return ydl.process_ie_result(info, download=True)
+
+
+class DownloadQueue:
+    """
+    Bounded worker pool for download jobs.
+
+    Jobs wait in per-domain FIFOs and at most ``max_workers`` of them run at
+    once, with no more than ``per_domain`` against the same host. Domains are
+    served round-robin so one large batch cannot starve the others. A worker
+    thread keeps pulling jobs until nothing runnable is left or the pool has
+    been shrunk below its current size, so both limits can be changed while
+    downloads are running.
+
+    ``max_pending`` bounds the backlog: ``submit`` blocks once that many jobs
+    are waiting, which lets a feeder stream an arbitrarily long URL list.
+    A worker can ``detach`` its job once it no longer needs the network
+    (e.g. while ffmpeg post-processes it), freeing the slot for the next job.
+    ``on_change`` is called from whichever thread touched the queue whenever
+    the counts change. ``upcoming`` and ``slot_seconds`` let a Prefetcher
+    resolve the next jobs shortly before a slot frees up.
+    """
+
+    def __init__(self, worker: Callable[[DownloadJob], None], max_workers: int = DEFAULT_WORKERS,
+                 per_domain: Optional[int] = None, max_pending: Optional[int] = None,
+                 on_change: Optional[Callable[[], None]] = None):
+        self._worker = worker
+        self._on_change = on_change
+        self._max_workers = max(1, max_workers)
+        self._per_domain = per_domain
+        self._max_pending = max_pending
+        self._pending: "OrderedDict[str, deque]" = OrderedDict()
+        self._pending_count = 0
+        self._running = 0
+        self._domain_running: Dict[str, int] = {}
+        self._detached: Set[int] = set()
+        self._started: Dict[int, float] = {}
+        self._slot_seconds: Optional[float] = None
+        self._cond = threading.Condition()
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def set_max_workers(self, count: int):
+        with self._cond:
+            self._max_workers = max(1, count)
+        self._spawn()
+
+    def set_per_domain(self, count: Optional[int]):
+        with self._cond:
+            self._per_domain = count
+        self._spawn()
+
+    def submit(self, job: DownloadJob, block: bool = True):
+        """Queue a job; with ``block`` set, wait while the backlog is full"""
+        with self._cond:
+            while block and self._max_pending and self._pending_count >= self._max_pending:
+                self._cond.wait()
+            self._pending.setdefault(job.domain, deque()).append(job)
+            self._pending_count += 1
+        self._spawn()
+
+    def cancel(self, job: DownloadJob) -> bool:
+        """Drop ``job`` if it is still waiting; False once a worker has taken it"""
+        with self._cond:
+            jobs = self._pending.get(job.domain)
+            if not jobs or job not in jobs:
+                return False
+            jobs.remove(job)
+            if not jobs:
+                del self._pending[job.domain]
+            self._pending_count -= 1
+            self._cond.notify_all()
+        self._notify()
+        return True
+
+    def detach(self, job: DownloadJob):
+        """
+        Release ``job``'s slot while its worker keeps running. Only valid from
+        that worker; ``join`` still waits for it to return.
+        """
+        with self._cond:
+            if job.id in self._detached:
+                return
+            self._release(job)
+            self._running -= 1
+            self._detached.add(job.id)
+        self._spawn()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"running": self._running, "pending": self._pending_count, "processing": len(self._detached)}
+
+    def upcoming(self, count: int) -> List[DownloadJob]:
+        """The next ``count`` waiting jobs, in the order workers will take them if no limit gets in the way"""
+        jobs: List[DownloadJob] = []
+        with self._cond:
+            domains = list(self._pending.values())
+            depth = 0
+            while domains and len(jobs) < count:
+                domains = [d for d in domains if len(d) > depth]
+                jobs += [d[depth] for d in domains[:count - len(jobs)]]
+                depth += 1
+        return jobs
+
+    @property
+    def slot_seconds(self) -> Optional[float]:
+        """Moving average of how long a job holds its slot; None until one has let go"""
+        return self._slot_seconds
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted job has finished"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._running and not self._pending_count and not self._detached, timeout
+            )
+
+    def _take(self) -> Optional[DownloadJob]:
+        # Caller holds the lock
+        for domain, jobs in self._pending.items():
+            if self._per_domain and self._domain_running.get(domain, 0) >= self._per_domain:
+                continue
+            job = jobs.popleft()
+            if jobs:
+                self._pending.move_to_end(domain)
+            else:
+                del self._pending[domain]
+            self._pending_count -= 1
+            self._domain_running[domain] = self._domain_running.get(domain, 0) + 1
+            self._started[job.id] = time.monotonic()
+            self._cond.notify_all()
+            return job
+        return None
+
+    def _release(self, job: DownloadJob):
+        # Caller holds the lock
+        held = time.monotonic() - self._started.pop(job.id)
+        previous = self._slot_seconds
+        self._slot_seconds = held if previous is None else previous + SLOT_SMOOTHING * (held - previous)
+        remaining = self._domain_running[job.domain] - 1
+        if remaining:
+            self._domain_running[job.domain] = remaining
+        else:
+            del self._domain_running[job.domain]
+
+    def _spawn(self):
+        with self._cond:
+            jobs = []
+            while self._running < self._max_workers:
+                job = self._take()
+                if job is None:
+                    break
+                jobs.append(job)
+                self._running += 1
+        for job in jobs:
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        self._notify()
+
+    def _notify(self):
+        if self._on_change is not None:
+            self._on_change()
+
+    def _run(self, job: Optional[DownloadJob]):
+        while job is not None:
+            try:
+                self._worker(job)
+            except Exception:
+                pass  # Workers report their own failures
+            with self._cond:
+                if job.id in self._detached:
+                    # The slot was handed on already; this thread retires
+                    self._detached.discard(job.id)
+                    self._cond.notify_all()
+                    job = None
+                else:
+                    self._release(job)
+                    job = self._take() if self._running <= self._max_workers else None
+                    if job is None:
+                        self._running -= 1
+                        self._cond.notify_all()
+            self._notify()
+
+
+class PostProcessPool:
+    """
+    Bounded pool for the CPU-bound stage of downloads.
+
+    Each task drives one ffmpeg child process (merge, audio extraction,
+    remux), so a thread per slot is enough to keep ``workers`` processes
+    busy in parallel; the default is one per CPU core. Download workers
+    hand their finished files over and wait here without holding a network
+    slot.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 2
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="postprocess")
+
+    def run_all(self, tasks: Iterable[Callable[[], None]]):
+        """Run the tasks in parallel and wait for all of them; re-raises the first failure"""
+        futures = [self._executor.submit(task) for task in tasks]
+        for future in futures:
+            future.result()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def iter_urls(sources: Iterable[str], stdin: TextIO = sys.stdin) -> Iterator[str]:
+    """Yield URLs from batch files one line at a time ('-' reads stdin)"""
+    for source in sources:
+        handle = stdin if source == "-" else open(source, "r", encoding="utf-8")
+        try:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith(("#", ";", "]")):
+                    yield line
+        finally:
+            if handle is not stdin:
+                handle.close()
+
+
+class ResultWriter:
+    """Thread-safe JSON-lines sink for per-URL result records"""
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+
+def run_batch(engine: Engine, urls: Iterable[str], options: DownloadOptions,
+              writer: Optional[ResultWriter] = None, workers: int = DEFAULT_WORKERS,
+              per_domain: Optional[int] = DEFAULT_PER_DOMAIN, resume: bool = True) -> Dict[str, int]:
+    """
+    Download every URL through a DownloadQueue and return ok/skipped/error
+    counts. Unfinished jobs from the journal go first when ``resume`` is set.
+    """
+    # Imported here: prefetch builds on this module
+    from prefetch import Prefetcher
+
+    counts = {"ok": 0, "skipped": 0, "error": 0}
+    lock = threading.Lock()
+
+    def worker(job: DownloadJob):
+        prefetcher.claim(job)
+        record = engine.run(job, on_downloaded=lambda: queue.detach(job))
+        with lock:
+            counts[record["status"]] += 1
+        if writer is not None:
+            writer.write(record)
+
+    queue = DownloadQueue(worker, workers, per_domain=per_domain, max_pending=workers * 4)
+    engine.instruments.metrics.add_collector(queue_collector(queue, engine.scheduler))
+    prefetcher = Prefetcher(engine, queue)
+    if resume:
+        for job in engine.resume():
+            queue.submit(job)
+    for url in urls:
+        jobs = engine.expand(url, options) if options.allow_playlist else [DownloadJob(url, options)]
+        try:
+            # Submitting blocks while the backlog is full, which also pauses
+            # playlist enumeration until workers catch up
+            for job in jobs:
+                engine.queued(job)
+                queue.submit(job)
+        except Exception as e:
+            with lock:
+                counts["error"] += 1
+            if writer is not None:
+                writer.write({"url": url, "status": "error", "error": f"Playlist enumeration failed: {e}"})
+    queue.join()
+    prefetcher.close()
+    return counts
+
+
+def list_formats(url: str, options: DownloadOptions, cache: Optional[InfoCache] = None) -> Dict[str, Any]:
+    import yt_dlp as ytdlp
+
+    opts = {"quiet": True, "no_warnings": True, "noplaylist": not options.allow_playlist}
+    opts.update(options.ydl_extra)
+    with ytdlp.YoutubeDL(opts) as ydl:
+        info = extract_info(ydl, url, cache)
+        ydl.list_formats(info)
+    return info
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="simpledownloader",
+        description="Download videos and audio with yt-dlp",
+    )
+    parser.add_argument("urls", nargs="*", metavar="URL", help="URLs to download")
+    parser.add_argument("-a", "--batch-file", action="append", default=[], metavar="FILE",
+                        help="read URLs from FILE, one per line ('-' for stdin); may be repeated")
+    parser.add_argument("--interactive", action="store_true", help="interactive format selection")
+    parser.add_argument("--list", action="store_true", help="list all formats and exit")
+    parser.add_argument("--resolution", type=int, metavar="HEIGHT", help="target resolution (e.g., 1080)")
+    audio = parser.add_mutually_exclusive_group()
+    audio.add_argument("--with-audio", dest="with_audio", action="store_true", default=True,
+                       help="include audio (with --resolution)")
+    audio.add_argument("--video-only", dest="with_audio", action="store_false",
+                       help="video only (with --resolution)")
+    parser.add_argument("--audio-only", action="store_true", help="download audio only")
+    parser.add_argument("--audio-format", choices=AUDIO_FORMATS, default="m4a", metavar="FORMAT",
+                        help="mp3, m4a, opus, flac, aac (default: m4a)")
+    parser.add_argument("--prefer-container", choices=CONTAINERS, metavar="TYPE", help="mp4, mkv, webm")
+    parser.add_argument("--outdir", default=".", metavar="DIR", help="output directory")
+    parser.add_argument("--output", default=DEFAULT_OUTTMPL, metavar="TEMPLATE", help="custom filename template")
+    parser.add_argument("--output-volume", action="append", default=[], metavar="DIR",
+                        help="another directory downloads may go to when it has more free space than --outdir "
+                             "(repeatable)")
+    parser.add_argument("--min-free", type=parse_size, default=MIN_FREE, metavar="SIZE",
+                        help="free space to leave on every output volume (default: 512M)")
+    parser.add_argument("--sub-langs", type=lambda v: [lang.strip() for lang in v.split(",") if lang.strip()],
+                        default=[], metavar="LANGS",
+                        help="write subtitles in these languages next to the media: comma-separated codes "
+                             "or regexes, or 'all' (e.g. en,de,pt.*)")
+    parser.add_argument("--write-auto-subs", action="store_true",
+                        help="with --sub-langs, fall back to automatic captions where no subtitles were uploaded")
+    parser.add_argument("--write-chapters", action="store_true", help="write the chapter list to a .chapters.json file")
+    parser.add_argument("--write-description", action="store_true", help="write the description to a .description file")
+    parser.add_argument("--write-info-json", action="store_true", help="write the video metadata to a .info.json file")
+    parser.add_argument("--allow-playlist", action="store_true",
+                        help="process playlists and channels, one job per entry")
+    parser.add_argument("--playlist-items", metavar="SPEC",
+                        help="playlist entries to download, e.g. 1-25,40 (with --allow-playlist)")
+    parser.add_argument("--download-archive", metavar="FILE",
+                        help="skip videos listed in FILE and record new downloads there "
+                             "(default: the archive shared with the GUI)")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="download videos even if they are in the download archive")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, metavar="N",
+                        help=f"parallel downloads (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--per-domain", type=int, default=DEFAULT_PER_DOMAIN, metavar="N",
+                        help=f"parallel downloads per host, 0 for no limit (default: {DEFAULT_PER_DOMAIN})")
+    parser.add_argument("--connections", type=int, default=1, metavar="N",
+                        help="connections per direct HTTP download, fetched as byte ranges (default: 1)")
+    parser.add_argument("--concurrent-fragments", type=int, metavar="N",
+                        help="DASH/HLS fragments fetched in parallel (default: same as --connections)")
+    parser.add_argument("--limit-rate", type=parse_rate, metavar="RATE",
+                        help="total bandwidth for all downloads, e.g. 5M (default: unlimited)")
+    parser.add_argument("--bandwidth-profile", type=parse_profile, metavar="WINDOWS",
+                        help="time-of-day limits overriding --limit-rate, e.g. 08:00-18:00=2M,18:00-23:00=10M")
+    parser.add_argument("--rate-control", metavar="FILE",
+                        help="re-read the total limit from FILE whenever it changes (e.g. echo 2M > FILE)")
+    parser.add_argument("--job-rate-limit", type=parse_rate, metavar="RATE",
+                        help="cap each download at RATE within the total")
+    parser.add_argument("--priority", choices=sorted(PRIORITIES), default="normal",
+                        help="bandwidth share of these downloads relative to resumed ones (default: normal)")
+    parser.add_argument("--postprocess-workers", type=int, metavar="N",
+                        help="merges/conversions run in parallel, next to the downloads (default: CPU cores)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_ATTEMPTS - 1, metavar="N",
+                        help="retry downloads that failed on network errors, 403s or throttling up to N "
+                             f"times, with backoff (default: {DEFAULT_ATTEMPTS - 1})")
+    parser.add_argument("--throttle-speed", type=parse_rate, default=THROTTLE_SPEED, metavar="RATE",
+                        help="treat downloads that stay below RATE as throttled and restart them with fresh "
+                             "URLs (default: 32K, 0 to disable)")
+    parser.add_argument("--results", metavar="FILE",
+                        help="append a JSON-lines result record per URL to FILE ('-' for stdout)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="append a JSON-lines trace of every job phase (extract, select, download, "
+                             "postprocess) to FILE")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics while running")
+    parser.add_argument("--profile-dir", metavar="DIR",
+                        help="write a cProfile dump of every extraction to DIR")
+    parser.add_argument("-q", "--quiet", action="store_true", help="suppress yt-dlp output")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the metadata cache")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL, metavar="SECONDS",
+                        help=f"reuse cached metadata for this long (default: {DEFAULT_CACHE_TTL})")
+    parser.add_argument("--no-journal", action="store_true",
+                        help="do not record jobs, resume unfinished ones or skip completed ones")
+    parser.add_argument("--cookies-from-browser", metavar="BROWSER", help="load cookies from a browser")
+    parser.add_argument("--username", help="account username")
+    parser.add_argument("--password", help="account password")
+    return parser.parse_args(argv)
+
+
+def options_from_args(args: argparse.Namespace) -> DownloadOptions:
+    if args.audio_only:
+        format_choice = "audio-only"
+    elif args.resolution:
+        format_choice = "resolution"
+    else:
+        format_choice = "best"
+
+    ydl_extra: Dict[str, Any] = {}
+    if args.cookies_from_browser:
+        ydl_extra["cookiesfrombrowser"] = (args.cookies_from_browser,)
+    if args.username:
+        ydl_extra["username"] = args.username
+    if args.password:
+        ydl_extra["password"] = args.password
+
+    return DownloadOptions(
+        format_choice=format_choice,
+        resolution=args.resolution,
+        with_audio=args.with_audio,
+        audio_format=args.audio_format,
+        container=args.prefer_container,
+        outdir=os.path.expanduser(args.outdir),
+        output_template=args.output,
+        allow_playlist=args.allow_playlist,
+        playlist_items=args.playlist_items,
+        download_archive=None if args.no_archive else os.path.expanduser(args.download_archive or default_archive()),
+        connections=max(1, args.connections),
+        concurrent_fragments=max(1, args.concurrent_fragments or args.connections),
+        priority=PRIORITIES[args.priority],
+        rate_limit=args.job_rate_limit,
+        subtitle_langs=args.sub_langs,
+        auto_subtitles=args.write_auto_subs,
+        write_chapters=args.write_chapters,
+        write_description=args.write_description,
+        write_info_json=args.write_info_json,
+        ydl_extra=ydl_extra,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    options = options_from_args(args)
+    cache = None if args.no_cache else InfoCache(ttl=args.cache_ttl)
+    journal = None
+    if not args.no_journal and not args.list:
+        try:
+            journal = JobJournal()
+        except JournalBusy as e:
+            print(f"Warning: {e}; running without the job journal", file=sys.stderr)
+
+    if not args.urls and not args.batch_file:
+        if not sys.stdin.isatty():
+            args.batch_file = ["-"]
+        elif journal is None or not journal.pending():
+            print("Error: no URL given", file=sys.stderr)
+            return 2
+
+    if args.list or args.interactive:
+        if len(args.urls) != 1 or args.batch_file:
+            print("Error: --list and --interactive take exactly one URL", file=sys.stderr)
+            return 2
+        list_formats(args.urls[0], options, cache)
+        if args.list:
+            return 0
+        choice = input("Format code [best]: ").strip()
+        if choice:
+            options.format_spec = choice
+
+    os.makedirs(options.outdir, exist_ok=True)
+
+    batch = bool(args.batch_file) or len(args.urls) > 1
+    quiet = args.quiet or batch
+    scheduler = BandwidthScheduler(args.limit_rate, args.bandwidth_profile, args.rate_control)
+    instruments = Instruments(trace_path=args.trace, profile_dir=args.profile_dir)
+    retry = RetryPolicy(args.retries + 1, throttle_speed=args.throttle_speed)
+    storage = OutputManager(args.output_volume, args.min_free)
+    engine = Engine(cache, journal, quiet, scheduler, PostProcessPool(args.postprocess_workers), instruments, retry,
+                    storage)
+    if args.metrics_port:
+        serve_metrics(instruments.metrics, args.metrics_port)
+    results = args.results or ("-" if batch else None)
+
+    stream: Optional[TextIO] = None
+    if results == "-":
+        stream = sys.stdout
+    elif results:
+        stream = open(results, "a", encoding="utf-8")
+    try:
+        writer = ResultWriter(stream) if stream else None
+        urls = itertools.chain(args.urls, iter_urls(args.batch_file))
+        counts = run_batch(engine, urls, options, writer, args.workers, args.per_domain or None)
+    finally:
+        if stream is not None and stream is not sys.stdout:
+            stream.close()
+        instruments.close()
+        if journal is not None:
+            journal.close()
+
+    if not args.quiet:
+        status = "completed" if not counts["error"] else "finished with errors"
+        print(f"Download {status}: {counts['ok']} ok, {counts['skipped']} already done, "
+              f"{counts['error']} failed", file=sys.stderr)
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,21 +5,30 @@ Beautiful, rounded, bubbly interface with dark mode
 """
 import os
 import sys
+import argparse
 import threading
-import shutil
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Set
 from pathlib import Path
 import customtkinter as ctk
 from tkinter import filedialog
-from PIL import Image
-import io
-import urllib.request
 
-try:
-    import yt_dlp as ytdlp
-except ImportError:
-    print("Error: yt-dlp is not installed. Install with: pip install yt-dlp", file=sys.stderr)
-    sys.exit(1)
+# Exits with an install hint if yt-dlp is missing, without importing it
+from Downloader import (
+    DownloadJob, DownloadOptions, DownloadQueue, Engine, DEFAULT_WORKERS, extract_info, has_ffmpeg,
+    options_from_dict, warm_up
+)
+from infocache import InfoCache, normalize_url
+from journal import JobJournal, JournalBusy
+from progress import FRAME_RATE, ProgressAggregator, ProgressSnapshot
+from archive import default_archive
+from bandwidth import BandwidthScheduler, PRIORITIES, format_rate, parse_rate
+from formats import FormatIndex
+from ingest import Ingestor, extract_urls, url_key
+from jobtable import STATE_FILTERS, JobEntry, JobTable
+from paths import data_dir
+from prefetch import Prefetcher
+from storage import format_bytes
+from thumbnails import ThumbnailCache
 
 
 # Set appearance
@@ -40,9 +49,272 @@ COLORS = {
     "accent_hover": "#e0e0e0",    # Slightly dimmed white
 }
 
+WORKER_CHOICES = ["1", "2", "4", "6", "8"]
+CONNECTION_CHOICES = ["1", "2", "4", "8", "16"]
+SPEED_LIMITS = ["Unlimited", "1 MB/s", "2 MB/s", "5 MB/s", "10 MB/s", "25 MB/s", "50 MB/s"]
+PRIORITY_CHOICES = ["Low", "Normal", "High"]
+INFO_THUMBNAIL_SIZE = (120, 90)
+ROW_THUMBNAIL_SIZE = (64, 36)
+# Rows of the download list are all this tall, gap included, so the list can place them by index
+ROW_HEIGHT = 78
+ROW_GAP = 6
+# Unscaled pixels per mouse wheel step or scrollbar arrow click
+SCROLL_STEP = ROW_HEIGHT // 2
+# Typing pause after which the list filter applies
+FILTER_DELAY_MS = 150
+# Delay before importing yt-dlp in the background, so the window is drawn first
+WARM_UP_DELAY_MS = 200
+# Playlist entries are fed into the queue no faster than this backlog drains
+MAX_PENDING = 50
+# Wait before reconnecting to a daemon whose event stream dropped
+RECONNECT_DELAY_MS = 2000
+# How often "Watch Clipboard" looks for newly copied links
+CLIPBOARD_POLL_MS = 1000
+# Fields of a fetched info dict the window keeps; the rest is dropped with it
+VIDEO_SUMMARY_FIELDS = ("title", "duration", "uploader", "thumbnail")
+
+
+def format_size(nbytes: float) -> str:
+    if nbytes >= 1024 ** 3:
+        return f"{nbytes / 1024 ** 3:.1f} GB"
+    return f"{nbytes / 1024 ** 2:.0f} MB"
+
+
+class JobRow(ctk.CTkFrame):
+    """
+    A row of the download list: thumbnail, title, progress bar and status.
+    JobList moves rows between entries as it scrolls; ``show`` draws one.
+    """
+
+    def __init__(self, master, on_priority: Optional[Callable[[DownloadJob, str], None]] = None,
+                 load_thumbnail: Optional[Callable[["JobRow", JobEntry], None]] = None):
+        super().__init__(master, corner_radius=10, fg_color=COLORS["bg_secondary"], height=ROW_HEIGHT - ROW_GAP)
+        self.entry: Optional[JobEntry] = None
+        self.thumbnail: Optional[str] = None
+        self._load_thumbnail = load_thumbnail
+        # Fixed height, whatever the labels ask for, so JobList can place rows by index
+        self.grid_propagate(False)
+        self.grid_columnconfigure(1, weight=1)
+
+        self.priority_menu = None
+        if on_priority is not None:
+            self.priority_menu = ctk.CTkOptionMenu(
+                self,
+                values=PRIORITY_CHOICES,
+                command=lambda value: on_priority(self.entry.job, value),
+                width=90,
+                height=24,
+                corner_radius=8,
+                font=ctk.CTkFont(size=11),
+                dropdown_font=ctk.CTkFont(size=11),
+                fg_color=COLORS["button_bg"],
+                button_color=COLORS["button_bg"],
+                button_hover_color=COLORS["button_hover"],
+                dropdown_fg_color=COLORS["bg_card"],
+                dropdown_hover_color=COLORS["button_hover"],
+                text_color=COLORS["text_primary"],
+                dropdown_text_color=COLORS["text_primary"]
+            )
+
+        self.thumbnail_label = ctk.CTkLabel(
+            self,
+            text="",
+            width=ROW_THUMBNAIL_SIZE[0],
+            height=ROW_THUMBNAIL_SIZE[1]
+        )
+        self.thumbnail_label.grid(row=0, column=0, rowspan=3, padx=(12, 0), pady=8)
+
+        self.title_label = ctk.CTkLabel(
+            self,
+            text="",
+            height=20,
+            font=ctk.CTkFont(size=12, weight="bold"),
+            anchor="w",
+            text_color=COLORS["text_primary"]
+        )
+        self.title_label.grid(row=0, column=1, sticky="ew", padx=12, pady=(8, 2))
+
+        self.progress_bar = ctk.CTkProgressBar(
+            self,
+            corner_radius=8,
+            height=10,
+            fg_color=COLORS["bg_card"],
+            progress_color=COLORS["border"]
+        )
+        self.progress_bar.grid(row=1, column=1, sticky="ew", padx=12, pady=2)
+        self.progress_bar.set(0)
+
+        self.status_label = ctk.CTkLabel(
+            self,
+            text="",
+            height=20,
+            font=ctk.CTkFont(size=11),
+            anchor="w",
+            text_color=COLORS["text_secondary"]
+        )
+        self.status_label.grid(row=2, column=1, sticky="ew", padx=12, pady=(0, 8))
+
+    def show(self, entry: JobEntry):
+        """Draw ``entry``, which may be the one already shown with new values"""
+        if entry is not self.entry or entry.thumbnail != self.thumbnail:
+            self.thumbnail = entry.thumbnail
+            self.thumbnail_label.configure(image=blank_thumbnail())
+            if entry.thumbnail and self._load_thumbnail is not None:
+                self._load_thumbnail(self, entry)
+        self.entry = entry
+        self.title_label.configure(text=entry.title)
+        self.progress_bar.set(entry.progress)
+        color = ("#ef4444", "#ef4444") if entry.error else COLORS["text_secondary"]
+        self.status_label.configure(text=entry.status, text_color=color)
+        if self.priority_menu is not None:
+            if entry.job is not None and entry.state in ("queued", "running"):
+                names = {weight: name.capitalize() for name, weight in PRIORITIES.items()}
+                self.priority_menu.set(names.get(entry.job.options.priority, "Normal"))
+                self.priority_menu.grid(row=0, column=2, padx=(0, 12), pady=(6, 0))
+            else:
+                self.priority_menu.grid_remove()
+
+    def set_thumbnail(self, entry: JobEntry, image: ctk.CTkImage):
+        # The row may show another entry by the time the image arrives
+        if entry is self.entry and entry.thumbnail == self.thumbnail:
+            self.thumbnail_label.configure(image=image)
+
+
+_blank_thumbnail: Optional[ctk.CTkImage] = None
+
+
+def blank_thumbnail() -> ctk.CTkImage:
+    """Transparent stand-in while a recycled row's thumbnail loads (a label cannot drop its image)"""
+    global _blank_thumbnail
+    if _blank_thumbnail is None:
+        from PIL import Image
+
+        image = Image.new("RGBA", ROW_THUMBNAIL_SIZE, (0, 0, 0, 0))
+        _blank_thumbnail = ctk.CTkImage(light_image=image, dark_image=image, size=ROW_THUMBNAIL_SIZE)
+    return _blank_thumbnail
+
+
+class JobList(ctk.CTkFrame):
+    """
+    Scrolling view of a JobTable that only has widgets for the rows on
+    screen: scrolling moves the same few JobRows to other entries, so the
+    list stays as fast with tens of thousands of entries as with ten.
+    ``on_near_end`` is called whenever the view is within a screen of the
+    last entry, to load more. Call ``refresh`` after changing entries.
+    """
+
+    def __init__(self, master, table: JobTable, on_priority: Optional[Callable[[DownloadJob, str], None]] = None,
+                 load_thumbnail: Optional[Callable[[JobRow, JobEntry], None]] = None,
+                 on_near_end: Optional[Callable[[], None]] = None):
+        super().__init__(master, corner_radius=0, fg_color="transparent")
+        self.table = table
+        self.on_near_end = on_near_end
+        self._on_priority = on_priority
+        self._load_thumbnail = load_thumbnail
+        self._rows: List[JobRow] = []
+        # Scroll position in unscaled pixels, like every size passed to CustomTkinter
+        self._top = 0.0
+        self._redraw_pending = False
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self._body = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
+        self._body.grid(row=0, column=0, sticky="nsew")
+        self._body.bind("<Configure>", lambda event: self.refresh())
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.grid(row=0, column=1, sticky="ns", padx=(4, 0))
+        # CustomTkinter widgets refuse bind_all; the window takes it
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.winfo_toplevel().bind_all(sequence, self._on_wheel, add="+")
+
+    def refresh(self, entry: Optional[JobEntry] = None):
+        """
+        Redraw ``entry`` now if it is on screen; without one, redraw the list
+        on the next idle moment, however many changes come before it
+        """
+        if entry is not None:
+            for row in self._rows:
+                if row.entry is entry:
+                    row.show(entry)
+            return
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._redraw)
+
+    def inserted_at_top(self):
+        """An entry was added above the others: keep showing the same ones unless scrolled to the top"""
+        if self._top > 0:
+            self._top += ROW_HEIGHT
+        self.refresh()
+
+    def scroll_to(self, top: float):
+        self._top = top
+        self.refresh()
+
+    def _height(self) -> float:
+        return self._body.winfo_height() / self._get_widget_scaling()
+
+    def _redraw(self):
+        self._redraw_pending = False
+        height = self._height()
+        count = len(self.table)
+        total = count * ROW_HEIGHT
+        self._top = min(max(0.0, self._top), max(0.0, total - height))
+        first = int(self._top // ROW_HEIGHT)
+        offset = first * ROW_HEIGHT - self._top
+        visible = int(height // ROW_HEIGHT) + 2
+        while len(self._rows) < min(visible, count):
+            self._rows.append(JobRow(self._body, self._on_priority, self._load_thumbnail))
+        for slot, row in enumerate(self._rows):
+            index = first + slot
+            if slot < visible and index < count:
+                entry = self.table[index]
+                if row.entry is not entry:
+                    row.show(entry)
+                row.place(x=0, y=offset + slot * ROW_HEIGHT, relwidth=1)
+            else:
+                row.place_forget()
+                row.entry = None
+        if total > height:
+            self._scrollbar.set(self._top / total, (self._top + height) / total)
+        else:
+            self._scrollbar.set(0.0, 1.0)
+        if self.on_near_end is not None and self._top + 2 * height >= total:
+            self.on_near_end()
+
+    def _on_scrollbar(self, action: str, value, unit: Optional[str] = None):
+        if action == "moveto":
+            self.scroll_to(float(value) * len(self.table) * ROW_HEIGHT)
+        elif unit == "pages":
+            self.scroll_to(self._top + int(value) * self._height())
+        else:
+            self.scroll_to(self._top + int(value) * SCROLL_STEP)
+
+    def _on_wheel(self, event):
+        if not self._contains(event.widget):
+            return
+        if sys.platform.startswith("win"):
+            steps = -event.delta / 40
+        elif sys.platform == "darwin":
+            steps = -event.delta
+        else:
+            steps = -1 if event.num == 4 else 1
+        self.scroll_to(self._top + steps * SCROLL_STEP)
+
+    def _contains(self, widget) -> bool:
+        # Wheel events are bound application-wide; take those over the rows, not over the scrollbar
+        # (which scrolls by itself) or other parts of the window
+        while widget is not None and not isinstance(widget, str):
+            if widget is self._scrollbar:
+                return False
+            if widget is self:
+                return True
+            widget = widget.master
+        return False
+
 
 class DownloaderApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, client=None):
         super().__init__()
         
         # Window setup
@@ -58,10 +330,60 @@ class DownloaderApp(ctk.CTk):
         self.resolution_var = ctk.StringVar(value="1080p")
         self.audio_format_var = ctk.StringVar(value="mp3")
         self.container_var = ctk.StringVar(value="mp4")
+        self.workers_var = ctk.StringVar(value=str(DEFAULT_WORKERS))
+        self.connections_var = ctk.StringVar(value="4")
+        self.speed_limit_var = ctk.StringVar(value="Unlimited")
+        self.playlist_var = ctk.BooleanVar(value=False)
+        self.playlist_items_var = ctk.StringVar()
+        self.use_archive_var = ctk.BooleanVar(value=True)
+        self.sidecars_var = ctk.BooleanVar(value=False)
+        self.watch_clipboard_var = ctk.BooleanVar(value=False)
+        self._clipboard_seen: Optional[str] = None
+        self._watching_clipboard = False
+        # url_key of links being resolved by the ingestor, not yet queued
+        self._resolving: Set[str] = set()
         self.video_info: Optional[Dict[str, Any]] = None
-        self.downloading = False
+        self.video_info_url: Optional[str] = None
+        self.video_formats: Optional[FormatIndex] = None
+        self.info_cache = InfoCache()
+        self.thumbnails = ThumbnailCache(
+            make_image=lambda image: ctk.CTkImage(light_image=image, dark_image=image, size=image.size)
+        )
+        # Attached to a daemon (daemon.DaemonClient): jobs run there, this window only shows them
+        self.client = client
+        self.remote_jobs: Dict[str, DownloadJob] = {}
+        self.remote_stats: Dict[str, Any] = {}
+        try:
+            journal = None if client else JobJournal(data_dir() / "gui-jobs.jsonl")
+        except JournalBusy:
+            journal = None  # Another window owns the journal
+        self.scheduler = BandwidthScheduler()
+        self.engine = Engine(self.info_cache, journal, quiet=False, scheduler=self.scheduler)
+        self.download_queue = DownloadQueue(
+            self._download_thread,
+            DEFAULT_WORKERS,
+            max_pending=MAX_PENDING,
+            on_change=lambda: self.after(0, self._update_queue_status)
+        )
+        # Resolves the next queued jobs just before a slot frees up
+        self.prefetcher = Prefetcher(self.engine, self.download_queue)
+        self.ingestor = Ingestor(self.engine)
+        # Every job of this session by DownloadJob.id, and the history below them
+        self.job_entries: Dict[int, JobEntry] = {}
+        self.jobs = JobTable()
+        self.state_filter_var = ctk.StringVar(value="All")
+        self._filter_after: Optional[str] = None
+        self._history_scheduled = False
+        self.progress = ProgressAggregator()
         
         self.setup_ui()
+        self.after(WARM_UP_DELAY_MS, lambda: threading.Thread(target=warm_up, daemon=True).start())
+        if client is None:
+            self.after(0, self._resume_jobs)
+            self.after(0, self._more_history)
+        else:
+            threading.Thread(target=self._follow_daemon, daemon=True).start()
+        self.after(1000 // FRAME_RATE, self._draw_progress)
         
     def setup_ui(self):
         # Main container with padding
@@ -71,6 +393,7 @@ class DownloaderApp(ctk.CTk):
         main_frame = ctk.CTkFrame(self, fg_color="transparent")
         main_frame.grid(row=0, column=0, sticky="nsew", padx=20, pady=20)
         main_frame.grid_columnconfigure(0, weight=1)
+        main_frame.grid_rowconfigure(5, weight=1)
         
         # Title
         title = ctk.CTkLabel(
@@ -98,7 +421,20 @@ class DownloaderApp(ctk.CTk):
             font=ctk.CTkFont(size=14, weight="bold"),
             text_color=COLORS["text_primary"]
         )
-        url_label.grid(row=0, column=0, columnspan=2, sticky="w", padx=20, pady=(15, 5))
+        url_label.grid(row=0, column=0, sticky="w", padx=20, pady=(15, 5))
+        
+        clipboard_switch = ctk.CTkSwitch(
+            url_frame,
+            text="Watch Clipboard",
+            variable=self.watch_clipboard_var,
+            command=self.on_watch_clipboard_change,
+            onvalue=True,
+            offvalue=False,
+            font=ctk.CTkFont(size=13),
+            text_color=COLORS["text_primary"],
+            progress_color=COLORS["border"]
+        )
+        clipboard_switch.grid(row=0, column=1, sticky="e", padx=(0, 20), pady=(15, 5))
         
         self.url_entry = ctk.CTkEntry(
             url_frame,
@@ -113,6 +449,8 @@ class DownloaderApp(ctk.CTk):
             text_color=COLORS["text_primary"]
         )
         self.url_entry.grid(row=1, column=0, sticky="ew", padx=(20, 10), pady=(0, 15))
+        # A pasted block of links is queued as a whole instead of landing in the entry
+        self.url_entry.bind("<<Paste>>", self._on_paste)
         
         paste_btn = ctk.CTkButton(
             url_frame,
@@ -286,12 +624,13 @@ class DownloaderApp(ctk.CTk):
             font=ctk.CTkFont(size=13),
             text_color=COLORS["text_primary"]
         )
-        container_label.grid(row=4, column=0, sticky="w", padx=(20, 10), pady=(5, 15))
+        container_label.grid(row=4, column=0, sticky="w", padx=(20, 10), pady=5)
         
         container_menu = ctk.CTkOptionMenu(
             options_frame,
             values=["mp4", "mkv", "webm"],
             variable=self.container_var,
+            command=lambda _: self._update_resolution_menu(),
             corner_radius=10,
             font=ctk.CTkFont(size=12),
             dropdown_font=ctk.CTkFont(size=12),
@@ -303,7 +642,137 @@ class DownloaderApp(ctk.CTk):
             text_color=COLORS["text_primary"],
             dropdown_text_color=COLORS["text_primary"]
         )
-        container_menu.grid(row=4, column=1, sticky="ew", padx=(0, 20), pady=(5, 15))
+        container_menu.grid(row=4, column=1, sticky="ew", padx=(0, 20), pady=5)
+        
+        # Parallel downloads
+        workers_label = ctk.CTkLabel(
+            options_frame,
+            text="Parallel Downloads:",
+            font=ctk.CTkFont(size=13),
+            text_color=COLORS["text_primary"]
+        )
+        workers_label.grid(row=5, column=0, sticky="w", padx=(20, 10), pady=5)
+        
+        workers_menu = ctk.CTkOptionMenu(
+            options_frame,
+            values=WORKER_CHOICES,
+            variable=self.workers_var,
+            command=self.on_workers_change,
+            corner_radius=10,
+            font=ctk.CTkFont(size=12),
+            dropdown_font=ctk.CTkFont(size=12),
+            fg_color=COLORS["button_bg"],
+            button_color=COLORS["button_bg"],
+            button_hover_color=COLORS["button_hover"],
+            dropdown_fg_color=COLORS["bg_card"],
+            dropdown_hover_color=COLORS["button_hover"],
+            text_color=COLORS["text_primary"],
+            dropdown_text_color=COLORS["text_primary"]
+        )
+        workers_menu.grid(row=5, column=1, sticky="ew", padx=(0, 20), pady=5)
+        
+        # Connections per download (byte ranges or DASH/HLS fragments)
+        connections_label = ctk.CTkLabel(
+            options_frame,
+            text="Connections per Download:",
+            font=ctk.CTkFont(size=13),
+            text_color=COLORS["text_primary"]
+        )
+        connections_label.grid(row=6, column=0, sticky="w", padx=(20, 10), pady=5)
+        
+        connections_menu = ctk.CTkOptionMenu(
+            options_frame,
+            values=CONNECTION_CHOICES,
+            variable=self.connections_var,
+            corner_radius=10,
+            font=ctk.CTkFont(size=12),
+            dropdown_font=ctk.CTkFont(size=12),
+            fg_color=COLORS["button_bg"],
+            button_color=COLORS["button_bg"],
+            button_hover_color=COLORS["button_hover"],
+            dropdown_fg_color=COLORS["bg_card"],
+            dropdown_hover_color=COLORS["button_hover"],
+            text_color=COLORS["text_primary"],
+            dropdown_text_color=COLORS["text_primary"]
+        )
+        connections_menu.grid(row=6, column=1, sticky="ew", padx=(0, 20), pady=5)
+        
+        # Total bandwidth, shared between running downloads by priority
+        speed_label = ctk.CTkLabel(
+            options_frame,
+            text="Speed Limit (total):",
+            font=ctk.CTkFont(size=13),
+            text_color=COLORS["text_primary"]
+        )
+        speed_label.grid(row=7, column=0, sticky="w", padx=(20, 10), pady=5)
+        
+        speed_menu = ctk.CTkOptionMenu(
+            options_frame,
+            values=SPEED_LIMITS,
+            variable=self.speed_limit_var,
+            command=self.on_speed_limit_change,
+            corner_radius=10,
+            font=ctk.CTkFont(size=12),
+            dropdown_font=ctk.CTkFont(size=12),
+            fg_color=COLORS["button_bg"],
+            button_color=COLORS["button_bg"],
+            button_hover_color=COLORS["button_hover"],
+            dropdown_fg_color=COLORS["bg_card"],
+            dropdown_hover_color=COLORS["button_hover"],
+            text_color=COLORS["text_primary"],
+            dropdown_text_color=COLORS["text_primary"]
+        )
+        speed_menu.grid(row=7, column=1, sticky="ew", padx=(0, 20), pady=5)
+        
+        # Playlist / channel fan-out
+        playlist_switch = ctk.CTkSwitch(
+            options_frame,
+            text="Playlist Mode",
+            variable=self.playlist_var,
+            onvalue=True,
+            offvalue=False,
+            font=ctk.CTkFont(size=13),
+            text_color=COLORS["text_primary"],
+            progress_color=COLORS["border"]
+        )
+        playlist_switch.grid(row=8, column=0, sticky="w", padx=(20, 10), pady=5)
+        
+        items_entry = ctk.CTkEntry(
+            options_frame,
+            textvariable=self.playlist_items_var,
+            placeholder_text="Items, e.g. 1-25,40 (all if empty)",
+            corner_radius=10,
+            font=ctk.CTkFont(size=12),
+            fg_color=COLORS["bg_secondary"],
+            border_width=1,
+            border_color=COLORS["text_secondary"],
+            text_color=COLORS["text_primary"]
+        )
+        items_entry.grid(row=8, column=1, sticky="ew", padx=(0, 20), pady=5)
+        
+        archive_switch = ctk.CTkSwitch(
+            options_frame,
+            text="Skip Already Downloaded",
+            variable=self.use_archive_var,
+            onvalue=True,
+            offvalue=False,
+            font=ctk.CTkFont(size=13),
+            text_color=COLORS["text_primary"],
+            progress_color=COLORS["border"]
+        )
+        archive_switch.grid(row=9, column=0, sticky="w", padx=(20, 10), pady=(5, 15))
+        
+        sidecars_switch = ctk.CTkSwitch(
+            options_frame,
+            text="Subtitles & Metadata",
+            variable=self.sidecars_var,
+            onvalue=True,
+            offvalue=False,
+            font=ctk.CTkFont(size=13),
+            text_color=COLORS["text_primary"],
+            progress_color=COLORS["border"]
+        )
+        sidecars_switch.grid(row=9, column=1, sticky="w", padx=(0, 20), pady=(5, 15))
         
         # Output directory
         output_frame = ctk.CTkFrame(
@@ -353,34 +822,70 @@ class DownloaderApp(ctk.CTk):
         )
         browse_btn.grid(row=1, column=1, padx=(0, 20), pady=(0, 15))
         
-        # Progress section
-        progress_frame = ctk.CTkFrame(
+        # Queue section
+        queue_frame = ctk.CTkFrame(
             main_frame, 
             corner_radius=15,
             fg_color=COLORS["bg_card"],
             border_width=1,
             border_color=COLORS["bg_secondary"]
         )
-        progress_frame.grid(row=5, column=0, sticky="ew", pady=(0, 15))
-        progress_frame.grid_columnconfigure(0, weight=1)
-        
-        self.progress_bar = ctk.CTkProgressBar(
-            progress_frame,
-            corner_radius=10,
-            height=20,
-            fg_color=COLORS["bg_secondary"],
-            progress_color=COLORS["border"]
-        )
-        self.progress_bar.grid(row=0, column=0, sticky="ew", padx=20, pady=(15, 5))
-        self.progress_bar.set(0)
+        queue_frame.grid(row=5, column=0, sticky="nsew", pady=(0, 15))
+        queue_frame.grid_columnconfigure(0, weight=1)
+        queue_frame.grid_rowconfigure(2, weight=1)
         
         self.status_label = ctk.CTkLabel(
-            progress_frame,
+            queue_frame,
             text="Ready to download",
             font=ctk.CTkFont(size=12),
             text_color=COLORS["text_secondary"]
         )
-        self.status_label.grid(row=1, column=0, padx=20, pady=(0, 15))
+        self.status_label.grid(row=0, column=0, padx=20, pady=(15, 5))
+        
+        # Filter over the queue and the download history
+        filter_frame = ctk.CTkFrame(queue_frame, fg_color="transparent")
+        filter_frame.grid(row=1, column=0, sticky="ew", padx=10, pady=(0, 8))
+        filter_frame.grid_columnconfigure(0, weight=1)
+        
+        # No textvariable: CustomTkinter hides the placeholder of entries that have one
+        self.filter_entry = ctk.CTkEntry(
+            filter_frame,
+            placeholder_text="Filter by title or URL",
+            height=30,
+            corner_radius=8,
+            font=ctk.CTkFont(size=12),
+            fg_color=COLORS["bg_secondary"],
+            border_color=COLORS["border"],
+            text_color=COLORS["text_primary"]
+        )
+        self.filter_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.filter_entry.bind("<KeyRelease>", lambda event: self._filter_changed())
+        
+        state_filter = ctk.CTkSegmentedButton(
+            filter_frame,
+            values=list(STATE_FILTERS),
+            variable=self.state_filter_var,
+            command=lambda value: self._apply_filter(),
+            height=30,
+            corner_radius=8,
+            font=ctk.CTkFont(size=12),
+            fg_color=COLORS["bg_secondary"],
+            selected_color=COLORS["button_hover"],
+            selected_hover_color=COLORS["button_hover"],
+            unselected_color=COLORS["bg_secondary"],
+            unselected_hover_color=COLORS["button_hover"],
+            text_color=COLORS["text_primary"]
+        )
+        state_filter.grid(row=0, column=1)
+        
+        self.queue_list = JobList(
+            queue_frame,
+            self.jobs,
+            on_priority=self.on_priority_change,
+            load_thumbnail=self._load_row_thumbnail,
+            on_near_end=self._more_history
+        )
+        self.queue_list.grid(row=2, column=0, sticky="nsew", padx=10, pady=(0, 10))
         
         # Download button
         self.download_btn = ctk.CTkButton(
@@ -418,9 +923,94 @@ class DownloaderApp(ctk.CTk):
     def paste_from_clipboard(self):
         try:
             clipboard = self.clipboard_get()
-            self.url_var.set(clipboard)
         except Exception:
             self.update_status("Failed to paste from clipboard", error=True)
+            return
+        urls = extract_urls(clipboard)
+        if len(urls) > 1:
+            self.ingest_urls(urls)
+        else:
+            self.url_var.set(urls[0] if urls else clipboard)
+    
+    def _on_paste(self, event):
+        try:
+            urls = extract_urls(self.clipboard_get())
+        except Exception:
+            return None
+        if len(urls) > 1:
+            self.ingest_urls(urls)
+            return "break"
+        return None
+    
+    def on_watch_clipboard_change(self):
+        if not self.watch_clipboard_var.get():
+            return
+        # Only links copied from now on; whatever is on the clipboard already was seen
+        self._clipboard_seen = self._read_clipboard()
+        if not self._watching_clipboard:
+            self._watching_clipboard = True
+            self.after(CLIPBOARD_POLL_MS, self._watch_clipboard)
+    
+    def _watch_clipboard(self):
+        if not self.watch_clipboard_var.get():
+            self._watching_clipboard = False
+            return
+        text = self._read_clipboard()
+        if text is not None and text != self._clipboard_seen:
+            self._clipboard_seen = text
+            urls = extract_urls(text)
+            if urls:
+                self.ingest_urls(urls)
+        self.after(CLIPBOARD_POLL_MS, self._watch_clipboard)
+    
+    def _read_clipboard(self) -> Optional[str]:
+        try:
+            return self.clipboard_get()
+        except Exception:
+            return None  # Empty, or holds something other than text
+    
+    def ingest_urls(self, urls: List[str]):
+        """Queue every new link of a pasted or copied block, resolving them in the background first"""
+        options = self._snapshot_options()
+        if options is None:
+            return
+        # Links already waiting, running or being resolved are not added twice
+        known = {url_key(entry.url) for entry in self.job_entries.values()
+                 if entry.state in ("queued", "running")} | self._resolving
+        new = [url for url in urls if url_key(url) not in known]
+        duplicates = len(urls) - len(new)
+        message = f"Adding {len(new)} link{'s' if len(new) != 1 else ''}"
+        if duplicates:
+            message += f" ({duplicates} already queued)"
+        self.update_status(message)
+        if not new:
+            return
+        
+        if self.client is not None:
+            # The daemon resolves and dedupes against its archive itself
+            self._call_daemon(lambda: [self.client.submit(url, options) for url in new])
+            return
+        if options.allow_playlist:
+            threading.Thread(
+                target=lambda: [self._feed_playlist(url, options) for url in new], daemon=True
+            ).start()
+            return
+        for url in new:
+            self._resolving.add(url_key(url))
+            self.ingestor.submit(
+                url, options,
+                ready=lambda job: self.after(0, self._ingested, job),
+                skipped=lambda job: self.after(0, self._ingest_skipped, job),
+            )
+    
+    def _ingested(self, job: DownloadJob):
+        self._resolving.discard(url_key(job.url))
+        self.engine.queued(job)
+        self._enqueue(job)
+    
+    def _ingest_skipped(self, job: DownloadJob):
+        self._resolving.discard(url_key(job.url))
+        self.update_status(f"Already downloaded: {job.title}")
     
     def browse_directory(self):
         directory = filedialog.askdirectory(initialdir=self.output_dir.get())
@@ -441,6 +1031,8 @@ class DownloaderApp(ctk.CTk):
         threading.Thread(target=self._fetch_info_thread, args=(url,), daemon=True).start()
     
     def _fetch_info_thread(self, url: str):
+        import yt_dlp as ytdlp
+        
         try:
             opts = {
                 "quiet": True,
@@ -449,15 +1041,21 @@ class DownloaderApp(ctk.CTk):
                 "skip_download": True,
             }
             with ytdlp.YoutubeDL(opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                self.video_info = info
-                
-                # Update UI in main thread
-                self.after(0, self._update_video_info_ui, info)
+                info = extract_info(ydl, url, self.info_cache)
+            # Indexed here rather than on the Tk thread; the full info dict stays in the cache
+            formats = FormatIndex.from_info(info)
+            summary = {field: info.get(field) for field in VIDEO_SUMMARY_FIELDS}
+            
+            # Update UI in main thread
+            self.after(0, self._update_video_info_ui, summary, formats, url)
         except Exception as e:
             self.after(0, self.update_status, f"Error: {str(e)}", True)
     
-    def _update_video_info_ui(self, info: Dict[str, Any]):
+    def _update_video_info_ui(self, info: Dict[str, Any], formats: FormatIndex, url: str):
+        self.video_info = info
+        self.video_info_url = normalize_url(url)
+        self.video_formats = formats
+        
         # Update title
         title = info.get("title", "Unknown")
         self.title_label.configure(text=title)
@@ -483,161 +1081,361 @@ class DownloaderApp(ctk.CTk):
         # Try to load thumbnail
         thumbnail_url = info.get("thumbnail")
         if thumbnail_url:
-            threading.Thread(target=self._load_thumbnail, args=(thumbnail_url,), daemon=True).start()
+            self.thumbnails.get(
+                thumbnail_url, INFO_THUMBNAIL_SIZE,
+                lambda image: self.after(0, lambda: self.thumbnail_label.configure(image=image))
+            )
         
         # Update available resolutions
-        heights = self._get_available_heights(info)
-        if heights:
-            res_options = [f"{h}p" for h in heights]
-            self.resolution_menu.configure(values=res_options)
-            if res_options:
-                self.resolution_var.set(res_options[0])
+        if formats.heights:
+            self.resolution_var.set(f"{formats.heights[0]}p")
+            self._update_resolution_menu()
         
         self.update_status("Video information loaded successfully")
     
-    def _get_available_heights(self, info: Dict[str, Any]) -> List[int]:
-        heights = set()
-        for f in info.get("formats", []):
-            if (f.get("vcodec") not in (None, "none")) and f.get("height"):
-                heights.add(int(f["height"]))
-        return sorted(heights, reverse=True)
+    def _update_resolution_menu(self):
+        """Resolution choices of the fetched video, with the size each would download"""
+        formats = self.video_formats
+        if formats is None or not formats.heights:
+            return
+        labels = []
+        for height in formats.heights:
+            size = formats.estimate_size(DownloadOptions(
+                format_choice="resolution", resolution=height, container=self.container_var.get()
+            ))
+            labels.append(f"{height}p (~{format_size(size)})" if size else f"{height}p")
+        self.resolution_menu.configure(values=labels)
+        selected = self._selected_height()
+        self.resolution_var.set(next((l for l in labels if l.split("p")[0] == str(selected)), labels[0]))
     
-    def _load_thumbnail(self, url: str):
-        try:
-            with urllib.request.urlopen(url, timeout=5) as response:
-                image_data = response.read()
-            
-            image = Image.open(io.BytesIO(image_data))
-            # Resize to fit
-            image.thumbnail((120, 90), Image.Resampling.LANCZOS)
-            
-            ctk_image = ctk.CTkImage(light_image=image, dark_image=image, size=image.size)
-            self.after(0, self.thumbnail_label.configure, {"image": ctk_image})
-        except Exception:
-            pass  # Silently fail for thumbnails
+    def _selected_height(self) -> int:
+        # Menu entries read "1080p" or "1080p (~250 MB)"
+        return int(self.resolution_var.get().split("p")[0])
     
-    def start_download(self):
-        if self.downloading:
+    def on_workers_change(self, value):
+        if self.client is not None:
+            self._call_daemon(self.client.update_settings, workers=int(value))
             return
-        
-        url = self.url_var.get().strip()
-        if not url:
-            self.update_status("Please enter a URL", error=True)
+        self.download_queue.set_max_workers(int(value))
+    
+    def on_speed_limit_change(self, value):
+        if self.client is not None:
+            self._call_daemon(self.client.update_settings, limit=parse_rate(value))
             return
-        
+        # Applies to running downloads immediately
+        self.scheduler.set_limit(parse_rate(value))
+    
+    def on_priority_change(self, job: DownloadJob, value: str):
+        job.options.priority = PRIORITIES[value.lower()]
+        if self.client is not None:
+            self._call_daemon(self.client.set_priority, job.key, value.lower())
+            return
+        self.scheduler.set_priority(job.key, job.options.priority)
+    
+    def _snapshot_options(self) -> Optional[DownloadOptions]:
+        """The options currently set in the window, or None (reported) if the output directory is unusable"""
         output_dir = self.output_dir.get()
         if not os.path.exists(output_dir):
             try:
                 os.makedirs(output_dir)
             except Exception as e:
                 self.update_status(f"Error creating directory: {e}", error=True)
-                return
+                return None
         
-        self.downloading = True
-        self.download_btn.configure(state="disabled", text="⏳ Downloading...")
-        self.progress_bar.set(0)
+        # Snapshot the options now; Tk variables must not be read from workers
+        sidecars = self.sidecars_var.get()
+        return DownloadOptions(
+            format_choice=self.format_choice.get(),
+            resolution=self._selected_height(),
+            audio_format=self.audio_format_var.get(),
+            container=self.container_var.get(),
+            outdir=output_dir,
+            connections=int(self.connections_var.get()),
+            concurrent_fragments=int(self.connections_var.get()),
+            allow_playlist=self.playlist_var.get(),
+            playlist_items=self.playlist_items_var.get().strip() or None,
+            download_archive=default_archive() if self.use_archive_var.get() else None,
+            # Uploaded subtitles in every language, chapters, description and info JSON
+            subtitle_langs=["all"] if sidecars else [],
+            write_chapters=sidecars,
+            write_description=sidecars,
+            write_info_json=sidecars,
+        )
+    
+    def start_download(self):
+        url = self.url_var.get().strip()
+        if not url:
+            self.update_status("Please enter a URL", error=True)
+            return
+        
+        options = self._snapshot_options()
+        if options is None:
+            return
+        if self.client is not None:
+            # Rows appear when the daemon reports the jobs
+            self._call_daemon(self.client.submit, url, options)
+            return
+        if options.allow_playlist:
+            self.update_status("Listing playlist entries...")
+            threading.Thread(target=self._feed_playlist, args=(url, options), daemon=True).start()
+            return
         
-        threading.Thread(target=self._download_thread, args=(url, output_dir), daemon=True).start()
+        job = DownloadJob(url, options)
+        if self.video_info and normalize_url(url) == self.video_info_url:
+            # The worker takes the fetched info from the cache and the formats from the index
+            job.formats = self.video_formats
+            job.title = self.video_info.get("title") or url
+            job.thumbnail = self.video_info.get("thumbnail")
+            size = job.formats.estimate_size(options) if job.formats is not None else None
+            available = self.engine.storage.available(options.outdir)
+            if size is not None and size > available:
+                self.update_status(f"Not enough disk space: {format_bytes(size)} needed, "
+                                   f"{format_bytes(max(0, available))} free", error=True)
+                return
+        
+        self.engine.queued(job)
+        self._enqueue(job)
     
-    def _download_thread(self, url: str, output_dir: str):
+    def _feed_playlist(self, url: str, options: DownloadOptions):
+        """Stream playlist entries into the queue as they are enumerated"""
+        count = 0
         try:
-            ydl_opts = {
-                "noplaylist": True,
-                "outtmpl": os.path.join(output_dir, "%(title)s [%(id)s].%(ext)s"),
-                "progress_hooks": [self._progress_hook],
-                "quiet": False,
-                "no_warnings": True,
-            }
-            
-            # Configure format based on selection
-            format_choice = self.format_choice.get()
-            
-            if format_choice == "best":
-                ydl_opts["format"] = "bv*+ba/b"
-                ydl_opts["merge_output_format"] = self.container_var.get()
-            elif format_choice == "resolution":
-                resolution = int(self.resolution_var.get().replace("p", ""))
-                ydl_opts["format"] = f"bv*[height={resolution}]+ba/b[height={resolution}]"
-                ydl_opts["merge_output_format"] = self.container_var.get()
-                if not self._has_ffmpeg():
-                    self.after(0, self.update_status, "Warning: ffmpeg not found, merging may fail", True)
-            elif format_choice == "audio-only":
-                if not self._has_ffmpeg():
-                    self.after(0, self.update_status, "Error: ffmpeg required for audio extraction", True)
-                    self.after(0, self._download_complete, False)
-                    return
-                
-                ydl_opts["format"] = "bestaudio/best"
-                ydl_opts["postprocessors"] = [{
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": self.audio_format_var.get(),
-                    "preferredquality": "0",
-                }]
-            
-            with ytdlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
-            
-            self.after(0, self._download_complete, True)
+            for job in self.engine.expand(url, options):
+                self.engine.queued(job)
+                self.after(0, self._add_row, job)
+                # Blocks while MAX_PENDING jobs are waiting, pacing enumeration
+                self.download_queue.submit(job)
+                count += 1
         except Exception as e:
-            self.after(0, self.update_status, f"Download failed: {str(e)}", True)
-            self.after(0, self._download_complete, False)
+            self.after(0, self.update_status, f"Error listing playlist: {e}", True)
+            return
+        if not count:
+            self.after(0, self.update_status, "Nothing new to download in this playlist")
     
-    def _progress_hook(self, d):
-        if d["status"] == "downloading":
-            try:
-                if "total_bytes" in d:
-                    progress = d["downloaded_bytes"] / d["total_bytes"]
-                elif "total_bytes_estimate" in d:
-                    progress = d["downloaded_bytes"] / d["total_bytes_estimate"]
-                else:
-                    progress = 0
-                
-                self.after(0, self.progress_bar.set, progress)
-                
-                # Update status with speed and ETA
-                speed = d.get("speed")
-                eta = d.get("eta")
-                status_parts = []
-                
-                if speed:
-                    speed_mb = speed / 1024 / 1024
-                    status_parts.append(f"{speed_mb:.1f} MB/s")
-                
-                if eta:
-                    minutes, seconds = divmod(int(eta), 60)
-                    if minutes > 0:
-                        status_parts.append(f"ETA: {minutes}m {seconds}s")
-                    else:
-                        status_parts.append(f"ETA: {seconds}s")
-                
-                if status_parts:
-                    self.after(0, self.update_status, " • ".join(status_parts))
-                else:
-                    self.after(0, self.update_status, "Downloading...")
-                    
-            except Exception:
-                pass
-        elif d["status"] == "finished":
-            self.after(0, self.update_status, "Processing...")
-            self.after(0, self.progress_bar.set, 1.0)
-    
-    def _download_complete(self, success: bool):
-        self.downloading = False
-        self.download_btn.configure(state="normal", text="⬇️ Download")
-        
-        if success:
-            self.progress_bar.set(1.0)
-            self.update_status("✅ Download completed successfully!")
+    def _resume_jobs(self):
+        for job in self.engine.resume():
+            self._enqueue(job)
+            self._update_job_row(job, "Resuming interrupted download")
+    
+    def _add_row(self, job: DownloadJob):
+        entry = JobEntry.for_job(job)
+        self.job_entries[job.id] = entry
+        if self.jobs.add(entry):
+            self.queue_list.inserted_at_top()
+    
+    def _load_row_thumbnail(self, row: JobRow, entry: JobEntry):
+        self.thumbnails.get(
+            entry.thumbnail, ROW_THUMBNAIL_SIZE,
+            lambda image: self.after(0, row.set_thumbnail, entry, image)
+        )
+    
+    def _more_history(self):
+        """Load the next page of past downloads soon, unless one is on its way or all are loaded"""
+        if self._history_scheduled or self.jobs.history_done or self.engine.journal is None:
+            return
+        self._history_scheduled = True
+        # Later, not from inside the list's redraw; one page per turn of the main loop
+        self.after(0, self._load_history)
+    
+    def _load_history(self):
+        self._history_scheduled = False
+        if self.jobs.load_history(self.engine.journal):
+            # The redraw asks for the next page while less than a screen is left below
+            self.queue_list.refresh()
         else:
-            self.progress_bar.set(0)
+            # Nothing on this page passed the filter; keep reading
+            self._more_history()
+    
+    def _filter_changed(self):
+        if self._filter_after is not None:
+            self.after_cancel(self._filter_after)
+        self._filter_after = self.after(FILTER_DELAY_MS, self._apply_filter)
+    
+    def _apply_filter(self):
+        self._filter_after = None
+        if self.jobs.set_filter(self.filter_entry.get(), STATE_FILTERS[self.state_filter_var.get()]):
+            self.queue_list.scroll_to(0)
+    
+    def _enqueue(self, job: DownloadJob):
+        self._add_row(job)
+        # Never block the Tk thread on a full backlog
+        self.download_queue.submit(job, block=False)
+    
+    def _update_queue_status(self):
+        if self.client is not None:
+            stats = self.remote_stats
+            limit = stats.get("limit")
+        else:
+            stats = self.download_queue.stats()
+            limit = self.scheduler.limit
+        if stats.get("running") or stats.get("pending") or stats.get("processing"):
+            status = f"{stats['running']} downloading • {stats['pending']} queued"
+            if stats["processing"]:
+                status += f" • {stats['processing']} processing"
+            if limit is not None:
+                status += f" • limit {format_rate(limit)}"
+            self.update_status(status)
+        else:
+            self.update_status("Ready to download")
+    
+    def _download_thread(self, job: DownloadJob):
+        self.after(0, self._update_job_row, job, "Starting...")
+        if job.options.format_choice == "resolution" and not has_ffmpeg():
+            self.after(0, self._update_job_row, job, "Warning: ffmpeg not found, merging may fail", True)
+        
+        self.prefetcher.claim(job)
+        record = self.engine.run(
+            job,
+            [lambda d: self.progress.update(job.id, d)],
+            # Let the next download start while ffmpeg works on this one
+            on_downloaded=lambda: self.download_queue.detach(job),
+        )
+        self.after(0, self._download_complete, job, record)
+    
+    def _call_daemon(self, method: Callable, *args, **kwargs):
+        """Run a DaemonClient call off the Tk thread, reporting failures in the status line"""
+        def call():
+            try:
+                method(*args, **kwargs)
+            except Exception as e:
+                self.after(0, self.update_status, f"Daemon: {e}", True)
+        
+        threading.Thread(target=call, daemon=True).start()
+    
+    def _follow_daemon(self):
+        """Mirror the daemon's jobs into rows; runs on its own thread for as long as the window is open"""
+        try:
+            for event, data in self.client.events():
+                self.after(0, self._on_daemon_event, event, data)
+        except Exception as e:
+            self.after(0, self.update_status, f"Daemon: {e}", True)
+        self.after(RECONNECT_DELAY_MS, lambda: threading.Thread(target=self._follow_daemon, daemon=True).start())
+    
+    def _on_daemon_event(self, event: str, data: Dict[str, Any]):
+        if event == "stats":
+            self.remote_stats = data
+            self._update_queue_status()
+        elif event == "error":
+            self.update_status(data["error"], error=True)
+        elif event == "progress":
+            job = self.remote_jobs.get(data["id"])
+            if job is not None:
+                # Same shape as a yt-dlp progress hook call, so rows draw the same way
+                self.progress.update(job.id, {
+                    "status": data["status"],
+                    "downloaded_bytes": data["downloaded"],
+                    "total_bytes": data["total"],
+                    "speed": data["speed"],
+                    "eta": data["eta"],
+                    "info_dict": {"title": data["title"], "thumbnail": data["thumbnail"]},
+                    "attempt": data.get("attempt"),
+                    "retry_in": data.get("retry_in"),
+                    "reason": data.get("reason"),
+                })
+        elif event == "job":
+            job = self.remote_jobs.get(data["id"])
+            if job is None:
+                job = DownloadJob(data["url"], options_from_dict(data["options"]), key=data["id"])
+                job.title = data["title"] or data["url"]
+                job.thumbnail = data["thumbnail"]
+                self.remote_jobs[job.key] = job
+                self._add_row(job)
+            previous, job.status = job.status, data["status"]
+            job.conversion = data["conversion"]
+            if data["record"] and previous != job.status:
+                self._download_complete(job, data["record"])
+            elif job.status == "running" and previous != "running":
+                self._update_job_row(job, "Starting...")
+    
+    def _draw_progress(self):
+        # Runs on the Tk thread FRAME_RATE times a second, however fast the hooks fire
+        for job_id, snapshot in self.progress.drain().items():
+            entry = self.job_entries.get(job_id)
+            if entry is None:
+                continue
+            job = entry.job
+            if snapshot.title and snapshot.title != job.title:
+                job.title = snapshot.title
+                entry.update(title=snapshot.title)
+            if snapshot.thumbnail and snapshot.thumbnail != job.thumbnail:
+                job.thumbnail = entry.thumbnail = snapshot.thumbnail
+            if snapshot.status != "retrying":
+                # The data downloaded so far is kept; leave the bar where it was
+                entry.progress = snapshot.fraction
+            entry.update(status=self._format_progress(snapshot, job), error=False)
+            self.queue_list.refresh(entry)
+        self.after(1000 // FRAME_RATE, self._draw_progress)
     
     @staticmethod
-    def _has_ffmpeg() -> bool:
-        return shutil.which("ffmpeg") is not None
+    def _format_progress(snapshot: ProgressSnapshot, job: DownloadJob) -> str:
+        if snapshot.status == "retrying":
+            return f"Retrying in {snapshot.retry_in:.0f}s (attempt {snapshot.attempt}) • {snapshot.reason}"
+        if snapshot.status == "finished":
+            if job.conversion == "transcode":
+                return f"Transcoding to {job.options.audio_format}..."
+            if job.conversion == "remux":
+                return "Remuxing..."
+            return "Processing..."
+        
+        # Speed and ETA
+        status_parts = []
+        
+        if snapshot.speed:
+            speed_mb = snapshot.speed / 1024 / 1024
+            status_parts.append(f"{speed_mb:.1f} MB/s")
+        
+        if snapshot.eta:
+            minutes, seconds = divmod(int(snapshot.eta), 60)
+            if minutes > 0:
+                status_parts.append(f"ETA: {minutes}m {seconds}s")
+            else:
+                status_parts.append(f"ETA: {seconds}s")
+        
+        # What happens after the download: a quick stream copy or a full re-encode
+        if job.conversion in ("remux", "transcode"):
+            status_parts.append(f"then {job.conversion}")
+        
+        return " • ".join(status_parts) if status_parts else "Downloading..."
+    
+    def _update_job_row(self, job: DownloadJob, message: str, error: bool = False):
+        entry = self.job_entries.get(job.id)
+        if entry is not None:
+            entry.update(status=message, error=error)
+            self.queue_list.refresh(entry)
+    
+    def _download_complete(self, job: DownloadJob, record: Dict[str, Any]):
+        # Drop any sample still waiting so the next frame can't overwrite the result
+        self.progress.forget(job.id)
+        entry = self.job_entries[job.id]
+        
+        if record["status"] == "skipped":
+            entry.update(progress=1.0, status="Already downloaded", error=False)
+        elif record["status"] == "cancelled":
+            entry.update(progress=0, status="Cancelled", error=False)
+        elif record["status"] == "ok":
+            entry.update(progress=1.0, status="✅ Download completed successfully!", error=False)
+        else:
+            entry.update(progress=0, status=f"Download failed: {record['error']}", error=True)
+        self.queue_list.refresh(entry)
 
 
-def main():
-    app = DownloaderApp()
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="simpledownloader-gui", description="Download videos and audio with yt-dlp")
+    parser.add_argument("--attach", nargs="?", const="", metavar="URL",
+                        help="show and submit jobs to a running simpledownloader-daemon instead of "
+                             "downloading in this window (default: the daemon on this machine)")
+    args = parser.parse_args(argv)
+    
+    client = None
+    if args.attach is not None:
+        from daemon import DaemonClient, DaemonUnavailable
+        try:
+            client = DaemonClient(args.attach or None)
+        except DaemonUnavailable as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    app = DownloaderApp(client)
     app.mainloop()
 
 
@@ -0,0 +1,110 @@
+"""
+In-memory index over a yt-dlp download archive file
+
+The archive file is yt-dlp's own ``--download-archive`` format, one
+``"<extractor> <video id>"`` line per downloaded video, so it can be shared
+with plain yt-dlp runs. yt-dlp reloads the whole file into a set for every
+``YoutubeDL`` instance, which with one instance per job and a large archive
+means re-reading millions of lines per download. ``DownloadArchive`` loads it
+once per process and is handed to yt-dlp as the ``download_archive`` param
+(yt-dlp accepts any set-like object there).
+
+Entries are kept as a set of string hashes rather than the strings
+themselves, roughly halving memory for large archives while keeping lookups
+a single hash probe. Lines appended by other processes are picked up on a
+miss, at most once per ``REFRESH_INTERVAL``, by reading only the new tail of
+the file. Appends are single
+``O_APPEND`` writes under an exclusive ``flock``, the same lock yt-dlp takes,
+so concurrent workers, GUI and CLI never interleave partial lines.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from paths import data_dir
+
+
+def default_archive() -> str:
+    """Archive shared by the GUI and CLI unless told otherwise"""
+    return str(data_dir() / "archive.txt")
+
+
+REFRESH_INTERVAL = 1.0
+
+
+class DownloadArchive:
+    """Set-like view of an archive file; safe to share between threads"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._ids: Set[int] = set()
+        self._offset = 0
+        self._checked = 0.0
+        self._fd: Optional[int] = None
+        with self._lock:
+            self._refresh()
+
+    def __contains__(self, archive_id: str) -> bool:
+        key = hash(archive_id)
+        if key in self._ids:
+            return True
+        if time.monotonic() - self._checked < REFRESH_INTERVAL:
+            return False
+        with self._lock:
+            self._refresh()
+            return key in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, archive_id: str):
+        key = hash(archive_id)
+        line = (archive_id + "\n").encode("utf-8")
+        with self._lock:
+            if key in self._ids:
+                return
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                os.write(self._fd, line)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._ids.add(key)
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _refresh(self):
+        # Caller holds the lock
+        self._checked = time.monotonic()
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            return
+        if size == self._offset:
+            return
+        if size < self._offset:
+            # Rewritten by someone else; start over
+            self._ids.clear()
+            self._offset = 0
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        end = data.rfind(b"\n") + 1  # Leave a half-written last line for later
+        lines = data[:end].decode("utf-8", "replace").splitlines()
+        self._ids.update(hash(line.strip()) for line in lines if line.strip())
+        self._offset += end
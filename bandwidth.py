@@ -0,0 +1,279 @@
+"""
+Global bandwidth scheduler
+
+A ``BandwidthScheduler`` owns the total budget (bytes per second, or None for
+unlimited) and hands every running job a ``JobThrottle``, a token bucket whose
+rate is the job's share of the budget. Shares are weighted by priority and
+filled water-level style: jobs with their own lower cap keep it and the
+surplus goes to the others. Shares are recomputed whenever a job starts,
+finishes, goes idle (extraction, post-processing) or resumes transferring,
+and whenever the limit changes, whether set at runtime, by a time-of-day
+profile or through a control file.
+
+Throttles are fed from two places. yt-dlp's own downloaders call progress
+hooks on the thread that read each block, so ``JobThrottle.hook`` charges
+the bytes and sleeps right there; this covers plain HTTP and every fragment
+thread of DASH/HLS downloads. ``SegmentedFD`` charges its range workers
+directly through ``consume`` and ``claim``s its file so the hook skips it.
+"""
+import os
+import re
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+# Priority weights; a job with weight 4 gets four times the share of weight 1
+PRIORITIES = {"low": 1, "normal": 2, "high": 4}
+DEFAULT_PRIORITY = PRIORITIES["normal"]
+BURST_SECONDS = 0.25
+MIN_BURST = 64 * 1024
+IDLE_AFTER = 2.0
+TICK_INTERVAL = 1.0
+
+Profile = List[Tuple[int, int, Optional[float]]]
+
+
+def parse_rate(text: str) -> Optional[float]:
+    """'2M', '500K', '1.5MiB', '5 MB/s' -> bytes per second; '0', 'none' or '' -> unlimited"""
+    text = text.strip()
+    if text.lower() in ("", "0", "none", "unlimited"):
+        return None
+    # Same syntax as yt-dlp's --limit-rate, without importing yt-dlp
+    match = re.fullmatch(r"(?i)(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?(?:/s)?", text)
+    if not match:
+        raise ValueError(f"invalid rate: {text!r}")
+    number, unit = match.groups()
+    scale = 1024 ** ("kmgt".index(unit.lower()) + 1) if unit else 1
+    return float(number) * scale or None
+
+
+def parse_profile(text: str) -> Profile:
+    """
+    Parse time-of-day limits such as ``08:00-18:00=2M,18:00-23:00=10M``.
+    Windows may wrap past midnight; times outside every window use the
+    scheduler's base limit.
+    """
+    profile = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        match = re.fullmatch(r"(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})=(.+)", part)
+        if not match:
+            raise ValueError(f"invalid profile window: {part!r}")
+        h1, m1, h2, m2, rate = match.groups()
+        profile.append((int(h1) * 60 + int(m1), int(h2) * 60 + int(m2), parse_rate(rate)))
+    return profile
+
+
+def format_rate(rate: Optional[float]) -> str:
+    if rate is None:
+        return "unlimited"
+    return f"{rate / 1024 / 1024:.1f} MB/s"
+
+
+class JobThrottle:
+    """Token bucket for one job; ``consume`` may be called from any thread"""
+
+    def __init__(self, scheduler: "BandwidthScheduler", key: str, priority: float, cap: Optional[float]):
+        self.scheduler = scheduler
+        self.key = key
+        self.priority = priority
+        self.cap = cap
+        self.rate: Optional[float] = cap
+        self.active = True
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self._seen: Dict[str, int] = {}
+        self._claimed = set()
+
+    def set_rate(self, rate: Optional[float]):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def consume(self, nbytes: int):
+        """Charge ``nbytes`` just transferred, sleeping if the job is ahead of its rate"""
+        now = time.monotonic()
+        self.last_used = now
+        if not self.active:
+            self.scheduler._wake(self)
+        self.scheduler._tick(now)
+        with self._lock:
+            if self.rate is None:
+                return
+            self._refill(now)
+            self._tokens -= nbytes
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+    def claim(self, filename: str):
+        """Bytes of ``filename`` are charged through ``consume`` by its downloader"""
+        self._claimed.add(filename)
+
+    def hook(self, d: Dict[str, Any]):
+        """yt-dlp progress hook that charges the bytes read since the last call for the same file"""
+        filename = d.get("filename")
+        if d.get("status") != "downloading" or filename in self._claimed:
+            return
+        downloaded = d.get("downloaded_bytes") or 0
+        with self._lock:
+            previous = self._seen.get(filename)
+            self._seen[filename] = downloaded
+        if previous is not None and downloaded > previous:
+            self.consume(downloaded - previous)
+
+    def _refill(self, now: float):
+        # Caller holds the lock
+        if self.rate is not None:
+            burst = max(MIN_BURST, self.rate * BURST_SECONDS)
+            self._tokens = min(burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+
+class BandwidthScheduler:
+    """Splits a total bandwidth budget between running jobs; safe to share between threads"""
+
+    def __init__(self, limit: Optional[float] = None, profile: Optional[Profile] = None,
+                 control_file: Optional[str] = None):
+        self._lock = threading.RLock()
+        self._base_limit = limit
+        self._profile = profile or []
+        self._control_file = control_file
+        self._control_mtime: Optional[float] = None
+        self._throttles: Dict[str, JobThrottle] = {}
+        self._next_tick = 0.0
+        if control_file:
+            self._read_control_file()
+        self.limit = self._current_limit()
+
+    # Runtime controls
+
+    def set_limit(self, limit: Optional[float]):
+        """Change the base limit (used outside profile windows)"""
+        with self._lock:
+            self._base_limit = limit
+            self._update_limit()
+
+    def set_profile(self, profile: Profile):
+        with self._lock:
+            self._profile = profile
+            self._update_limit()
+
+    def set_priority(self, key: str, priority: float):
+        with self._lock:
+            throttle = self._throttles.get(key)
+            if throttle is not None:
+                throttle.priority = priority
+                self._rebalance()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "jobs": {key: {"priority": t.priority, "rate": t.rate, "active": t.active}
+                         for key, t in self._throttles.items()},
+            }
+
+    # Job lifecycle
+
+    def register(self, key: str, priority: float = DEFAULT_PRIORITY, cap: Optional[float] = None) -> JobThrottle:
+        throttle = JobThrottle(self, key, priority, cap)
+        with self._lock:
+            self._throttles[key] = throttle
+            self._rebalance()
+        return throttle
+
+    def unregister(self, throttle: JobThrottle):
+        with self._lock:
+            if self._throttles.get(throttle.key) is throttle:
+                del self._throttles[throttle.key]
+                self._rebalance()
+
+    # Internals
+
+    def _current_limit(self) -> Optional[float]:
+        # Caller holds the lock (or is __init__)
+        if self._profile:
+            now = time.localtime()
+            minute = now.tm_hour * 60 + now.tm_min
+            for start, end, rate in self._profile:
+                inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+                if inside:
+                    return rate
+        return self._base_limit
+
+    def _update_limit(self):
+        # Caller holds the lock
+        limit = self._current_limit()
+        if limit != self.limit:
+            self.limit = limit
+            self._rebalance()
+
+    def _read_control_file(self):
+        # Caller holds the lock
+        try:
+            mtime = os.stat(self._control_file).st_mtime
+        except OSError:
+            return
+        if mtime == self._control_mtime:
+            return
+        self._control_mtime = mtime
+        try:
+            with open(self._control_file, "r", encoding="utf-8") as f:
+                self._base_limit = parse_rate(f.read())
+        except (OSError, ValueError):
+            pass  # Keep the previous limit until the file is fixed
+
+    def _tick(self, now: float):
+        """Once a second: profile windows, control file and idle detection"""
+        if now < self._next_tick:
+            return
+        with self._lock:
+            if now < self._next_tick:
+                return
+            self._next_tick = now + TICK_INTERVAL
+            if self._control_file:
+                self._read_control_file()
+            idle = [t for t in self._throttles.values() if t.active and now - t.last_used > IDLE_AFTER]
+            for throttle in idle:
+                throttle.active = False
+            limit = self._current_limit()
+            if idle or limit != self.limit:
+                self.limit = limit
+                self._rebalance()
+
+    def _wake(self, throttle: JobThrottle):
+        with self._lock:
+            if not throttle.active:
+                throttle.active = True
+                self._rebalance()
+
+    def _rebalance(self):
+        # Caller holds the lock
+        throttles = list(self._throttles.values())
+        if self.limit is None:
+            for throttle in throttles:
+                throttle.set_rate(throttle.cap)
+            return
+
+        # Idle jobs keep a nominal share so they can ramp up before the next
+        # rebalance; it comes out of the total so the sum stays within the limit
+        remaining = self.limit
+        pending = [t for t in throttles if t.active] or throttles
+        for throttle in throttles:
+            if throttle not in pending:
+                nominal = min(self.limit, throttle.cap or self.limit) / max(1, len(throttles))
+                throttle.set_rate(nominal)
+                remaining -= nominal
+        while pending:
+            share = remaining / sum(t.priority for t in pending)
+            capped = [t for t in pending if t.cap is not None and t.cap <= share * t.priority]
+            if not capped:
+                for throttle in pending:
+                    throttle.set_rate(share * throttle.priority)
+                return
+            for throttle in capped:
+                throttle.set_rate(throttle.cap)
+                remaining -= throttle.cap
+            pending = [t for t in pending if t not in capped]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark download archive lookups
+
+Writes a yt-dlp style archive with --entries lines, then compares loading
+it into a set per job (what yt-dlp does for every YoutubeDL instance) with
+the process-wide DownloadArchive index: load time, lookup latency, append
+latency and memory.
+
+    python3 benchmarks/bench_archive.py --entries 1000000 --jobs 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from archive import DownloadArchive  # noqa: E402
+
+
+def write_archive(path: str, entries: int):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(entries):
+            f.write(f"youtube {i:011d}\n")
+
+
+def load_set(path: str) -> set:
+    # Equivalent of yt-dlp's preload_download_archive
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f}
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, memory
+
+
+def lookups(index, entries: int, count: int = 100000) -> float:
+    probes = [f"youtube {(i * 7919) % (entries * 2):011d}" for i in range(count)]
+    started = time.perf_counter()
+    for probe in probes:
+        _ = probe in index
+    return (time.perf_counter() - started) / count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark download archive lookups")
+    parser.add_argument("--entries", type=int, default=1000000)
+    parser.add_argument("--jobs", type=int, default=20, help="jobs in a batch, each loading the archive")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "archive.txt")
+        write_archive(path, args.entries)
+        print(f"archive: {args.entries} entries, {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+
+        naive, load, memory = measure(lambda: load_set(path))
+        per_lookup = lookups(naive, args.entries)
+        print(f"{'set per job':<14} load {load * 1000:8.0f} ms  x{args.jobs} jobs {load * args.jobs:7.1f} s  "
+              f"memory {memory / 1024 / 1024:6.0f} MiB  lookup {per_lookup * 1e6:.2f} us")
+        del naive
+
+        index, load, memory = measure(lambda: DownloadArchive(path))
+        per_lookup = lookups(index, args.entries)
+        started = time.perf_counter()
+        for i in range(1000):
+            index.add(f"youtube new{i:08d}")
+        per_add = (time.perf_counter() - started) / 1000
+        print(f"{'shared index':<14} load {load * 1000:8.0f} ms  x{args.jobs} jobs {load:7.1f} s  "
+              f"memory {memory / 1024 / 1024:6.0f} MiB  lookup {per_lookup * 1e6:.2f} us  "
+              f"append {per_add * 1e6:.1f} us")
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Check how the bandwidth scheduler splits a total limit between jobs
+
+Starts one download per --priorities entry at the same time against the
+local fake server under a total --limit, and reports each job's average
+transfer rate (from its first downloaded block, so extraction time is left
+out), its initial weighted share and the total achieved rate.
+
+    python3 benchmarks/bench_bandwidth.py --limit 12 --priorities high normal low --connections 1
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fakeserver import FakeServer  # noqa: E402
+from bandwidth import BandwidthScheduler, PRIORITIES  # noqa: E402
+from Downloader import DownloadJob, DownloadOptions, Engine  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=float, default=12, help="total limit in MiB/s (default: 12)")
+    parser.add_argument("--priorities", nargs="+", choices=sorted(PRIORITIES), default=["high", "normal", "low"])
+    parser.add_argument("--size", type=int, default=16, help="file size in MiB per job (default: 16)")
+    parser.add_argument("--connections", type=int, default=1, help="connections per job (default: 1)")
+    args = parser.parse_args()
+
+    limit = args.limit * 1024 * 1024
+    size = args.size * 1024 * 1024
+    engine = Engine(scheduler=BandwidthScheduler(limit))
+    weights = [PRIORITIES[p] for p in args.priorities]
+    results = [None] * len(weights)
+
+    def worker(index, job):
+        first = []
+
+        def hook(d):
+            if not first and d.get("status") == "downloading":
+                first.append(time.monotonic())
+
+        record = engine.run(job, [hook])
+        results[index] = (record, first[0] if first else None, time.monotonic())
+
+    with FakeServer() as server, tempfile.TemporaryDirectory() as outdir:
+        threads = []
+        for index, (name, weight) in enumerate(zip(args.priorities, weights)):
+            options = DownloadOptions(outdir=outdir, connections=args.connections,
+                                      concurrent_fragments=args.connections, priority=weight)
+            job = DownloadJob(server.media_url(f"bw{index}-{name}", size), options)
+            thread = threading.Thread(target=worker, args=(index, job))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+    print(f"{'job':>4} {'priority':>8} {'seconds':>8} {'MiB/s':>7} {'initial share':>14}  status")
+    for index, (name, weight) in enumerate(zip(args.priorities, weights)):
+        record, first, finished = results[index]
+        seconds = finished - first
+        share = args.limit * weight / sum(weights)
+        print(f"{index:>4} {name:>8} {seconds:>8.2f} {args.size / seconds:>7.2f} {share:>14.2f}  {record['status']}")
+    total = args.size * len(weights) / (max(r[2] for r in results) - min(r[1] for r in results))
+    print(f"total {total:.2f} MiB/s against a limit of {args.limit:.2f} MiB/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark the GUI's download list with a long history
+
+Writes a job journal with --jobs finished downloads, then times what the
+Tk thread does while the list is scrolled and filtered: replaying the
+journal, loading each history page, and applying a text and a state
+filter. Every step has to fit in one progress frame (1000 / FRAME_RATE
+ms) for the main loop to stay responsive. Rows are widgets only while on
+screen, so their count does not depend on --jobs and is not measured.
+
+    python3 benchmarks/bench_joblist.py --jobs 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jobtable import HISTORY_PAGE, STATE_FILTERS, JobTable  # noqa: E402
+from journal import JobJournal  # noqa: E402
+from progress import FRAME_RATE  # noqa: E402
+
+
+def write_journal(path: str, jobs: int):
+    # Straight to the file: JobJournal fsyncs every line
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(jobs):
+            f.write(f'{{"op":"queued","key":"k{i}","url":"https://example.com/watch?v={i}",'
+                    f'"signature":"s{i}","options":{{}},"ts":{1.7e9 + i}}}\n')
+            if i % 10:
+                f.write(f'{{"op":"completed","key":"k{i}","filepath":"/videos/Video number {i} [{i}].mp4",'
+                        f'"ts":{1.7e9 + i}}}\n')
+            else:
+                f.write(f'{{"op":"failed","key":"k{i}","error":"HTTP Error 403: Forbidden","ts":{1.7e9 + i}}}\n')
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the download list with a long history")
+    parser.add_argument("--jobs", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.jsonl")
+        write_journal(path, args.jobs)
+        journal, open_ms = timed(JobJournal, path, args.jobs)
+
+        tracemalloc.start()
+        table = JobTable()
+        pages = []
+        while not table.history_done:
+            _, ms = timed(table.load_history, journal)
+            pages.append(ms)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        filters = [("text", "number 1234", None), ("state", "", STATE_FILTERS["Failed"]),
+                   ("text+state", "video", STATE_FILTERS["Completed"]), ("none", "", None)]
+        results = []
+        for name, text, states in filters:
+            _, ms = timed(table.set_filter, text, states)
+            results.append((name, len(table), ms))
+        journal.close()
+
+    budget = 1000 / FRAME_RATE
+    steps = [max(pages)] + [ms for _, _, ms in results]
+    print(f"{args.jobs} jobs, journal replay {open_ms:.0f} ms (once, at startup)")
+    print(f"history: {len(pages)} pages of {HISTORY_PAGE}, {sum(pages) / len(pages):.2f} ms avg, "
+          f"{max(pages):.2f} ms max, {memory / args.jobs:.0f} bytes per entry")
+    for name, count, ms in results:
+        print(f"filter {name:<11} {count:>7} rows  {ms:7.2f} ms")
+    status = "ok" if max(steps) <= budget else "OVER"
+    print(f"slowest step {max(steps):.2f} ms of a {budget:.0f} ms frame  {status}")
+    return 0 if status == "ok" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory held by a long download queue
+
+Builds --jobs queued jobs for videos with YouTube-sized info dicts (dozens
+of formats with signed URLs and fragment lists, subtitles and automatic
+captions in every language, thumbnail lists) and compares keeping each
+job's full info dict in memory with what the GUI now does: a FormatIndex
+on the job and the info dict spilled to the InfoCache, rehydrated when the
+job starts. Reports traced Python memory, the cache's size on disk and the
+time to rehydrate one job.
+
+    python3 benchmarks/bench_memory.py --jobs 1000
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Downloader import DownloadJob, DownloadOptions  # noqa: E402
+from formats import FormatIndex  # noqa: E402
+from infocache import InfoCache, DEFAULT_MAX_BYTES  # noqa: E402
+
+LANGUAGES = [f"l{i:02d}" for i in range(100)]
+HEIGHTS = [144, 240, 360, 480, 720, 1080, 1440, 2160]
+
+
+def make_info(n: int, formats: int) -> dict:
+    """A sanitized info dict shaped like a long YouTube video's"""
+    video_id = f"v{n:010d}"
+    url = f"https://example.com/watch?v={video_id}"
+    signed = "&".join(f"p{i}={'x' * 24}" for i in range(16))
+    entries = []
+    for i in range(formats):
+        audio = i % 4 == 0
+        entries.append({
+            "format_id": str(100 + i),
+            "url": f"https://media.example.com/videoplayback?id={video_id}&itag={100 + i}&{signed}",
+            "ext": "m4a" if audio else ("mp4" if i % 2 else "webm"),
+            "vcodec": "none" if audio else ("avc1.640028" if i % 2 else "vp09.00.40.08"),
+            "acodec": "mp4a.40.2" if audio else "none",
+            "height": None if audio else HEIGHTS[i % len(HEIGHTS)],
+            "fps": None if audio else 30,
+            "tbr": 128.0 if audio else 500.0 * (1 + i % len(HEIGHTS)),
+            "filesize": 10_000_000 + i,
+            "protocol": "https",
+            "http_headers": {"User-Agent": "Mozilla/5.0 " + "x" * 80, "Accept": "*/*",
+                             "Accept-Language": "en-us,en;q=0.5"},
+            "fragments": [{"url": f"range/{j * 1048576}-{(j + 1) * 1048576 - 1}", "duration": 5.0}
+                          for j in range(20)],
+            "downloader_options": {"http_chunk_size": 10485760},
+        })
+    captions = {lang: [{"ext": ext, "url": f"https://example.com/api/timedtext?v={video_id}&lang={lang}&fmt={ext}"
+                                           f"&{signed}", "name": f"Language {lang}"}
+                       for ext in ("json3", "srv1", "srv2", "srv3", "ttml", "vtt")]
+                for lang in LANGUAGES}
+    return {
+        "id": video_id,
+        "title": f"Video {n}",
+        "extractor_key": "Youtube",
+        "webpage_url": url,
+        "duration": 3600,
+        "description": "Lorem ipsum dolor sit amet. " * 100,
+        "tags": [f"tag{i}" for i in range(30)],
+        "thumbnail": f"https://i.example.com/vi/{video_id}/maxresdefault.jpg",
+        "thumbnails": [{"url": f"https://i.example.com/vi/{video_id}/{i}.jpg", "preference": i, "id": str(i)}
+                       for i in range(40)],
+        "formats": entries,
+        "subtitles": {lang: captions[lang] for lang in LANGUAGES[:10]},
+        "automatic_captions": captions,
+    }
+
+
+def traced(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, memory
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the memory held by a long download queue")
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--formats", type=int, default=80, help="formats per video (default: 80)")
+    args = parser.parse_args()
+
+    options = DownloadOptions(format_choice="resolution", resolution=1080)
+    sample = make_info(0, args.formats)
+    print(f"{args.jobs} jobs, info dict {len(json.dumps(sample)) / 1024:.0f} KiB as JSON")
+
+    def full_info():
+        # What the queue held before: every job kept its fetched info dict
+        return [(DownloadJob(info["webpage_url"], options), info)
+                for info in (make_info(n, args.formats) for n in range(args.jobs))]
+
+    queue, elapsed, memory = traced(full_info)
+    print(f"{'full info':<14} build {elapsed:6.1f} s  memory {memory / 1024 / 1024:8.1f} MiB")
+    del queue
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = InfoCache(Path(tmp) / "info.sqlite", max_bytes=max(DEFAULT_MAX_BYTES, args.jobs * 1024 * 1024))
+
+        def slim():
+            jobs = []
+            for n in range(args.jobs):
+                info = make_info(n, args.formats)
+                cache.put(info["webpage_url"], info)
+                job = DownloadJob(info["webpage_url"], options)
+                job.formats = FormatIndex.from_info(info)
+                job.title = info["title"]
+                job.thumbnail = info["thumbnail"]
+                jobs.append(job)
+            return jobs
+
+        jobs, elapsed, memory = traced(slim)
+        disk = sum(p.stat().st_size for p in Path(tmp).iterdir())
+        print(f"{'index + cache':<14} build {elapsed:6.1f} s  memory {memory / 1024 / 1024:8.1f} MiB  "
+              f"on disk {disk / 1024 / 1024:.1f} MiB")
+
+        rehydrate = []
+        for job in jobs[:: max(1, len(jobs) // 50)]:
+            started = time.perf_counter()
+            cache.get(job.url)
+            rehydrate.append(time.perf_counter() - started)
+        print(f"rehydrate one job: median {statistics.median(rehydrate) * 1000:.1f} ms")
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark prefetching of queued jobs against the local fake video site
+
+Runs the same batch twice through a DownloadQueue with more jobs than
+workers, once with a Prefetcher resolving the next jobs while the slots
+download and once with every worker resolving its own URL. --latency is
+the server's delay per request, which is what makes extraction slow; a
+per-connection --stream-rate keeps the downloads from finishing at once.
+Prints wall time, the extractions workers still had to do themselves,
+and how many prefetched resolutions went unused (resolved, but their
+worker started without them).
+
+    python3 benchmarks/bench_prefetch.py --jobs 12 --workers 2 --latency 300
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakeserver import FakeServer, site_url  # noqa: E402
+from Downloader import DownloadJob, DownloadOptions, DownloadQueue, Engine, warm_up  # noqa: E402
+from infocache import InfoCache  # noqa: E402
+from metrics import Instruments  # noqa: E402
+from prefetch import Prefetcher  # noqa: E402
+
+
+def run(base_url: str, name: str, jobs: int, workers: int, size: int, prefetch: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        instruments = Instruments()
+        engine = Engine(InfoCache(Path(tmp) / "info.sqlite"), quiet=True, instruments=instruments)
+        options = DownloadOptions(outdir=tmp)
+        failed = []
+
+        def worker(job):
+            if prefetcher is not None:
+                prefetcher.claim(job)
+            record = engine.run(job, on_downloaded=lambda: queue.detach(job))
+            if record["status"] != "ok":
+                failed.append(record.get("error"))
+
+        queue = DownloadQueue(worker, workers, per_domain=None)
+        prefetcher = Prefetcher(engine, queue) if prefetch else None
+        started = time.perf_counter()
+        for i in range(jobs):
+            queue.submit(DownloadJob(site_url(base_url, "mp4", f"{name}{i}", size), options))
+        queue.join()
+        wall = time.perf_counter() - started
+        if prefetcher is not None:
+            prefetcher.close()
+        engine.cache.close()
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} downloads failed: {failed[0]}")
+    metrics = instruments.metrics
+    resolved = sum(metrics.value("prefetch_total", result=r) for r in ("ahead", "expiring"))
+    used = metrics.value("prefetch_claims_total", result="ready") + metrics.value("prefetch_claims_total",
+                                                                                  result="waited")
+    return {"wall": wall, "worker_extractions": jobs - used, "prefetched": resolved,
+            "unused": max(0, resolved - used)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark prefetching of queued jobs")
+    parser.add_argument("--jobs", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--size", type=int, default=4, help="media size in MiB per job (default: 4)")
+    parser.add_argument("--stream-rate", type=float, default=2.0, help="per-connection cap in MiB/s (default: 2)")
+    parser.add_argument("--latency", type=float, default=300.0, help="server delay per request in ms (default: 300)")
+    args = parser.parse_args()
+
+    warm_up()
+    size = args.size * 1024 * 1024
+    with FakeServer(stream_rate=args.stream_rate * 1024 * 1024, latency=args.latency / 1000) as server:
+        results = {label: run(server.base_url, label, args.jobs, args.workers, size, prefetch)
+                   for label, prefetch in (("off", False), ("on", True))}
+
+    print(f"{args.jobs} jobs on {args.workers} workers, {args.latency:.0f} ms per request")
+    print(f"{'prefetch':<10}{'wall (s)':>10}{'worker extractions':>20}{'prefetched':>12}{'unused':>8}")
+    for label, r in results.items():
+        print(f"{label:<10}{r['wall']:>10.1f}{r['worker_extractions']:>20.0f}{r['prefetched']:>12.0f}"
+              f"{r['unused']:>8.0f}")
+    saved = results["off"]["wall"] - results["on"]["wall"]
+    print(f"prefetching saved {saved:.1f} s ({saved / results['off']['wall']:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark Tk event load from download progress hooks
+
+Simulates --workers downloads each firing yt-dlp style progress hooks at
+--hook-rate per second and compares the number of Tk callbacks scheduled
+by the old per-hook ``after(0, ...)`` forwarding with the coalesced
+ProgressAggregator drained at FRAME_RATE.
+
+    python3 benchmarks/bench_progress.py --workers 8 --hook-rate 300 --seconds 3
+
+Runs on a hidden Tk window when a display is available, otherwise on a
+queue-based stand-in for the Tk event loop (same counts, no widgets).
+"""
+import argparse
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from progress import FRAME_RATE, ProgressAggregator  # noqa: E402
+
+
+class QueueLoop:
+    """Minimal after()/mainloop() stand-in: callbacks run on the calling thread"""
+
+    name = "queue stand-in"
+
+    def __init__(self):
+        self._calls: "queue.Queue" = queue.Queue()
+        self._timers = []
+        self._running = False
+
+    def after(self, ms, func, *args):
+        if ms == 0:
+            self._calls.put((func, args))
+        else:
+            self._timers.append((time.monotonic() + ms / 1000, func, args))
+
+    def mainloop(self):
+        self._running = True
+        while self._running:
+            now = time.monotonic()
+            due = [t for t in self._timers if t[0] <= now]
+            self._timers = [t for t in self._timers if t[0] > now]
+            for _, func, args in due:
+                func(*args)
+            try:
+                func, args = self._calls.get(timeout=0.001)
+            except queue.Empty:
+                continue
+            func(*args)
+
+    def quit(self):
+        self._running = False
+
+    def destroy(self):
+        pass
+
+
+def make_loop():
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        root.withdraw()
+        return root
+    except Exception:
+        return QueueLoop()
+
+
+class Counter:
+    def __init__(self, loop):
+        self.loop = loop
+        self.scheduled = 0
+        self.busy = 0.0
+
+    def after(self, ms, func, *args):
+        self.scheduled += 1
+
+        def timed(*a):
+            started = time.perf_counter()
+            func(*a)
+            self.busy += time.perf_counter() - started
+
+        self.loop.after(ms, timed, *args)
+
+
+def fake_hook_source(hook, job_id, rate, seconds, stop):
+    total = 100 * 1024 * 1024
+    interval = 1.0 / rate
+    info = {"title": f"Video {job_id}", "id": str(job_id)}
+    started = time.monotonic()
+    n = 0
+    while not stop.is_set():
+        elapsed = time.monotonic() - started
+        if elapsed >= seconds:
+            break
+        downloaded = min(total, int(total * elapsed / seconds))
+        hook({
+            "status": "downloading",
+            "downloaded_bytes": downloaded,
+            "total_bytes": total,
+            "speed": 5e6 + (n % 7) * 1e5,
+            "eta": (total - downloaded) / 5e6,
+            "info_dict": info,
+        })
+        n += 1
+        time.sleep(max(0.0, started + n * interval - time.monotonic()))
+    hook({"status": "finished", "downloaded_bytes": total, "total_bytes": total, "info_dict": info})
+
+
+def render(progress, text):
+    # Stand-in for progress_bar.set / status_label.configure
+    return f"{progress:.2f} {text}"
+
+
+def run(mode, workers, rate, seconds):
+    loop = make_loop()
+    tk = Counter(loop)
+    stop = threading.Event()
+    hooks = [0]
+
+    if mode == "per-hook":
+        def make_hook(job_id):
+            def hook(d):
+                hooks[0] += 1
+                if d["status"] == "downloading":
+                    progress = d["downloaded_bytes"] / d["total_bytes"]
+                    tk.after(0, render, progress, "")
+                    tk.after(0, render, progress, f"{d['speed'] / 1024 / 1024:.1f} MB/s")
+                else:
+                    tk.after(0, render, 1.0, "Processing...")
+                    tk.after(0, render, 1.0, "")
+            return hook
+    else:
+        aggregator = ProgressAggregator()
+
+        def make_hook(job_id):
+            def hook(d):
+                hooks[0] += 1
+                aggregator.update(job_id, d)
+            return hook
+
+        def draw():
+            for snapshot in aggregator.drain().values():
+                render(snapshot.fraction, f"{(snapshot.speed or 0) / 1024 / 1024:.1f} MB/s")
+            tk.after(1000 // FRAME_RATE, draw)
+
+        tk.after(1000 // FRAME_RATE, draw)
+
+    threads = [
+        threading.Thread(target=fake_hook_source, args=(make_hook(i), i, rate, seconds, stop), daemon=True)
+        for i in range(workers)
+    ]
+
+    def start():
+        for thread in threads:
+            thread.start()
+
+    loop.after(0, start)
+    loop.after(int(seconds * 1000) + 300, loop.quit)
+    started = time.monotonic()
+    loop.mainloop()
+    elapsed = time.monotonic() - started
+    stop.set()
+    loop.destroy()
+    return getattr(loop, "name", "Tk"), hooks[0], tk.scheduled, tk.scheduled / elapsed, tk.busy * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Tk event load from progress hooks")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--hook-rate", type=float, default=300, help="hook calls per second per worker")
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    print(f"{'mode':<12} {'loop':<15} {'hooks':>8} {'tk events':>10} {'events/s':>9} {'ui ms':>8}")
+    for mode in ("per-hook", "coalesced"):
+        name, hooks, scheduled, per_second, busy = run(mode, args.workers, args.hook_rate, args.seconds)
+        print(f"{mode:<12} {name:<15} {hooks:>8} {scheduled:>10} {per_second:>9.0f} {busy:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark segmented downloads against a throttled local Range server
+
+Each connection to the server is capped at --stream-rate, so throughput
+should grow with --connections until the disk or loopback becomes the limit.
+
+    python3 benchmarks/bench_segmented.py --size 64 --stream-rate 8 --connections 1 2 4 8
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fakeserver import FakeServer, expected_bytes  # noqa: E402
+from Downloader import DownloadJob, DownloadOptions, Engine  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=64, help="file size in MiB (default: 64)")
+    parser.add_argument("--stream-rate", type=float, default=8, help="per-connection cap in MiB/s (default: 8)")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+    digest = hashlib.sha256(expected_bytes(size)).hexdigest()
+    print(f"{'connections':>11} {'seconds':>8} {'MiB/s':>8}  ok")
+    engine = Engine()
+    with FakeServer(stream_rate=args.stream_rate * 1024 * 1024) as server, \
+            tempfile.TemporaryDirectory() as outdir:
+        for connections in args.connections:
+            url = server.media_url(f"bench{connections}", size)
+            options = DownloadOptions(outdir=outdir, connections=connections, concurrent_fragments=connections)
+            started = time.monotonic()
+            record = engine.run(DownloadJob(url, options))
+            elapsed = time.monotonic() - started
+            ok = record["status"] == "ok"
+            if ok:
+                with open(record["filepath"], "rb") as f:
+                    ok = hashlib.sha256(f.read()).hexdigest() == digest
+                os.remove(record["filepath"])
+            print(f"{connections:>11} {elapsed:>8.2f} {args.size / elapsed:>8.1f}  {'yes' if ok else 'NO'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
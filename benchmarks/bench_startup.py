@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Measure cold start against the budget in startup_budget.json
+
+For each module entry, imports the module in fresh interpreters under
+``-X importtime`` and reports the median cumulative import time plus any
+module on its ``forbidden`` list that got imported (yt-dlp must stay off the
+startup path). ``wall_ms`` entries time a whole command instead. Exits
+non-zero when a budget is exceeded, so it can run in CI:
+
+    python3 benchmarks/bench_startup.py --runs 7
+    python3 benchmarks/bench_startup.py --top 15   # also show the slowest imports
+
+With a display available, the time until the GUI window is drawn is
+reported too (not budgeted; it depends on the window system).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "startup_budget.json"
+
+WINDOW_SNIPPET = """
+import time
+started = time.perf_counter()
+import DownloaderGUI
+app = DownloaderGUI.DownloaderApp()
+app.update()
+print((time.perf_counter() - started) * 1000)
+app.destroy()
+"""
+
+
+def import_profile(module: str):
+    """Cumulative import time per module in microseconds, from one fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cumulative.isdigit():
+            times[name] = int(cumulative)
+    return times
+
+
+def wall_time(command: str) -> float:
+    args = command.split()
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure cold start against the startup budget")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="show the N slowest imports of each module")
+    args = parser.parse_args()
+
+    with open(BUDGET_FILE, "r", encoding="utf-8") as f:
+        budget = json.load(f)
+
+    failed = False
+    print(f"{'target':<24} {'median ms':>10} {'budget ms':>10}  result")
+    for target, limits in budget.items():
+        if "wall_ms" in limits:
+            median = statistics.median(wall_time(target) for _ in range(args.runs))
+            over = median > limits["wall_ms"]
+            print(f"{target:<24} {median:>10.1f} {limits['wall_ms']:>10}  {'OVER' if over else 'ok'}")
+            failed |= over
+            continue
+
+        profiles = [import_profile(target) for _ in range(args.runs)]
+        median = statistics.median(p.get(target, 0) for p in profiles) / 1000
+        forbidden = sorted({name for name in limits.get("forbidden", [])
+                            if any(name in p for p in profiles)})
+        over = median > limits["import_ms"]
+        result = "OVER" if over else "ok"
+        if forbidden:
+            result += f", imports {', '.join(forbidden)}"
+        print(f"{target:<24} {median:>10.1f} {limits['import_ms']:>10}  {result}")
+        failed |= over or bool(forbidden)
+        if args.top:
+            slowest = sorted(profiles[-1].items(), key=lambda item: -item[1])[1:args.top + 1]
+            for name, micros in slowest:
+                print(f"    {name:<40} {micros / 1000:>8.1f}")
+
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        try:
+            result = subprocess.run([sys.executable, "-c", WINDOW_SNIPPET], cwd=ROOT,
+                                    capture_output=True, text=True, check=True)
+            print(f"{'window drawn':<24} {float(result.stdout.strip()):>10.1f}")
+        except (subprocess.CalledProcessError, ValueError):
+            print("window drawn: could not start the GUI")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
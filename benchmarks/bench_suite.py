@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Regression benchmark suite against the local fake video site
+
+Runs every scenario (media kind x concurrent jobs) in a fresh interpreter,
+against one FakeServer in this process, so no internet access is needed
+and each scenario's memory high-water mark is its own. Each scenario
+exercises the same code paths as the GUI:
+
+* extraction latency - a fresh YoutubeDL and ``extract_info`` without the
+  cache, as the Fetch button does (median of --runs);
+* time to first byte - from ``Engine.run`` to the first progress hook with
+  data, as a download worker sees it (median over the jobs);
+* throughput - total bytes over wall time for all jobs of the scenario;
+* UI event rate - progress hook calls per second fed to ProgressAggregator,
+  and the row updates per second it hands the Tk thread;
+* peak RSS of the scenario process.
+
+    python3 benchmarks/bench_suite.py --jobs 4 --size 32 --save baseline.json
+    python3 benchmarks/bench_suite.py --jobs 4 --size 32 --compare baseline.json --tolerance 0.25
+
+With --compare, exits non-zero when a metric got worse than the baseline by
+more than the tolerance, so it can run in CI.
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakeserver import FakeServer, site_url  # noqa: E402
+
+KINDS = ["mp4", "dash", "hls"]
+# metric: (unit, True when higher is better, False when lower is, None when informational)
+METRICS = {
+    "extract_ms": ("ms", False),
+    "ttfb_ms": ("ms", False),
+    "throughput": ("MiB/s", True),
+    "hook_rate": ("hooks/s", None),
+    "ui_rate": ("updates/s", None),
+    "peak_rss": ("MiB", False),
+}
+
+
+def run_scenario(base_url: str, kind: str, jobs: int, size: int, runs: int) -> dict:
+    """One scenario, in the current process; called in the child interpreter"""
+    import yt_dlp as ytdlp
+    from Downloader import DownloadJob, DownloadOptions, DownloadQueue, Engine, extract_info, warm_up
+    from progress import FRAME_RATE, ProgressAggregator
+
+    warm_up()
+    urls = [site_url(base_url, kind, f"{kind}{jobs}x{i}", size) for i in range(jobs)]
+
+    # Fetch button (_fetch_info_thread)
+    extract = []
+    opts = {"quiet": True, "no_warnings": True, "noplaylist": True, "skip_download": True}
+    for _ in range(runs):
+        started = time.perf_counter()
+        with ytdlp.YoutubeDL(opts) as ydl:
+            extract_info(ydl, urls[0])
+        extract.append(time.perf_counter() - started)
+
+    # Download workers (_download_thread) feeding the progress mailbox
+    engine = Engine()
+    progress = ProgressAggregator()
+    first_byte = {}
+    records = []
+    updates = [0]
+    done = threading.Event()
+
+    def drain():
+        while not done.wait(1 / FRAME_RATE):
+            updates[0] += len(progress.drain())
+
+    with tempfile.TemporaryDirectory() as outdir:
+        options = DownloadOptions(outdir=outdir, concurrent_fragments=4)
+
+        def worker(job):
+            started = time.perf_counter()
+
+            def hook(d):
+                if job.id not in first_byte and d.get("downloaded_bytes"):
+                    first_byte[job.id] = time.perf_counter() - started
+                progress.update(job.id, d)
+
+            records.append(engine.run(job, [hook], on_downloaded=lambda: queue.detach(job)))
+
+        queue = DownloadQueue(worker, jobs, per_domain=None)
+        drainer = threading.Thread(target=drain, daemon=True)
+        drainer.start()
+        started = time.perf_counter()
+        for url in urls:
+            queue.submit(DownloadJob(url, options))
+        queue.join()
+        wall = time.perf_counter() - started
+        done.set()
+        drainer.join()
+
+    failed = [r for r in records if r["status"] != "ok"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} downloads failed: {failed[0].get('error')}")
+    return {
+        "extract_ms": statistics.median(extract) * 1000,
+        "ttfb_ms": statistics.median(first_byte.values()) * 1000,
+        "throughput": size * jobs / wall / 1024 / 1024,
+        "hook_rate": progress.events / wall,
+        "ui_rate": updates[0] / wall,
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_child(base_url: str, kind: str, jobs: int, size: int, runs: int) -> dict:
+    command = [sys.executable, __file__, "--child", base_url, kind, str(jobs), str(size), str(runs)]
+    result = subprocess.run(command, capture_output=True, text=True, cwd=str(ROOT))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "scenario failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Regression messages for metrics worse than ``baseline`` by more than ``tolerance``"""
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            better = METRICS[metric][1]
+            old = baseline.get(scenario, {}).get(metric)
+            if better is None or not old:
+                continue
+            change = (value - old) / old
+            if (better and change < -tolerance) or (not better and change > tolerance):
+                regressions.append(f"{scenario} {metric}: {old:.1f} -> {value:.1f} ({change:+.0%})")
+    return regressions
+
+
+def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        base_url, kind, jobs, size, runs = sys.argv[2:7]
+        print(json.dumps(run_scenario(base_url, kind, int(jobs), int(size), int(runs))))
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS)
+    parser.add_argument("--jobs", type=int, default=4, help="concurrent jobs in the N-job scenarios (default: 4)")
+    parser.add_argument("--size", type=int, default=32, help="media size in MiB per job (default: 32)")
+    parser.add_argument("--runs", type=int, default=5, help="extractions per scenario (default: 5)")
+    parser.add_argument("--stream-rate", type=float, help="per-connection cap in MiB/s (default: none)")
+    parser.add_argument("--latency", type=float, default=0.0, help="server delay per request in ms (default: 0)")
+    parser.add_argument("--save", metavar="FILE", help="write the results to FILE as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="fail on regressions against the baseline in FILE")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative change before a metric counts as regressed (default: 0.25)")
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+    stream_rate = args.stream_rate * 1024 * 1024 if args.stream_rate else None
+    results = {}
+    columns = "".join(f" {f'{name} ({unit})':>22}" for name, (unit, _) in METRICS.items())
+    print(f"{'scenario':<10}{columns}")
+    with FakeServer(stream_rate=stream_rate, latency=args.latency / 1000) as server:
+        for kind in args.kinds:
+            for jobs in sorted({1, args.jobs}):
+                scenario = f"{kind}x{jobs}"
+                try:
+                    metrics = run_child(server.base_url, kind, jobs, size, args.runs)
+                except RuntimeError as e:
+                    print(f"{scenario:<10} failed: {e}")
+                    return 1
+                results[scenario] = metrics
+                print(f"{scenario:<10}" + "".join(f" {metrics[name]:>22.1f}" for name in METRICS))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
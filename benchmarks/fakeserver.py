@@ -0,0 +1,239 @@
+"""
+Local HTTP server for benchmarks
+
+Serves deterministic synthetic media of any size with Range support and an
+optional per-connection rate cap, which is how CDNs usually throttle a
+single stream. ``/media/<name>-<bytes>.mp4`` returns ``bytes`` bytes.
+
+It doubles as a fake video site that yt-dlp's generic extractor understands,
+so whole jobs (extraction included) can run without internet access:
+
+* ``/watch/<name>-<bytes>`` - an HTML page with a progressive MP4 ``<video>``;
+* ``/dash/<name>-<bytes>.mpd`` - a static DASH manifest of SEGMENT-sized
+  fragments;
+* ``/hls/<name>-<bytes>.m3u8`` - an HLS media playlist of the same fragments.
+
+The media bytes are not decodable video; nothing in the download path
+before ffmpeg looks inside them. ``latency`` delays every response, to
+model time-to-first-byte of a distant server.
+"""
+import math
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+BLOCK = 64 * 1024
+SEGMENT = 1024 * 1024
+SEGMENT_SECONDS = 4
+_PATTERN = bytes(range(256)) * (BLOCK // 256)
+_MEDIA = re.compile(r"^/media/[\w.-]+-(\d+)\.(\w+)$")
+_PAGE = re.compile(r"^/watch/([\w.]+)-(\d+)$")
+_MANIFEST = re.compile(r"^/(?:dash|hls)/([\w.]+)-(\d+)\.(mpd|m3u8)$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>{name}</title>
+<meta property="og:title" content="{name}">
+</head><body><video src="/media/{name}-{size}.mp4" type="video/mp4" controls></video></body></html>
+"""
+
+MPD = """<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" minBufferTime="PT2S"
+     mediaPresentationDuration="PT{duration}S" profiles="urn:mpeg:dash:profile:isoff-main:2011">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" segmentAlignment="true">
+      <Representation id="{name}" bandwidth="{bandwidth}" codecs="avc1.4d401f,mp4a.40.2" width="1280" height="720">
+        <SegmentList timescale="1" duration="{segment_seconds}">
+{segments}
+        </SegmentList>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+
+
+class FakeMediaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stream_rate: Optional[float] = None  # bytes/s per connection
+    ranges = True
+    latency = 0.0  # seconds before every response
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _serve(self, head: bool):
+        if self.latency:
+            time.sleep(self.latency)
+        path = self.path.split("?", 1)[0]
+        page = _PAGE.match(path)
+        if page:
+            name, size = page.group(1), int(page.group(2))
+            self._send_text(PAGE.format(name=name, size=size), "text/html; charset=utf-8", head)
+            return
+        manifest = _MANIFEST.match(path)
+        if manifest:
+            name, size, kind = manifest.group(1), int(manifest.group(2)), manifest.group(3)
+            if kind == "mpd":
+                self._send_text(dash_manifest(name, size), "application/dash+xml", head)
+            else:
+                self._send_text(hls_playlist(name, size), "application/vnd.apple.mpegurl", head)
+            return
+        match = _MEDIA.match(path)
+        if not match:
+            self.send_error(404)
+            return
+        size = int(match.group(1))
+        span = self._range(size)
+        if span is None:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start, end = span
+        partial = (start, end) != (0, size - 1) or "Range" in self.headers
+        self.send_response(206 if partial and self.ranges else 200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(end - start + 1))
+        if self.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+            if partial:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if not head:
+            self._write_body(start, end)
+
+    def _send_text(self, text: str, content_type: str, head: bool):
+        body = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _range(self, size: int) -> Optional[Tuple[int, int]]:
+        header = self.headers.get("Range")
+        if not header or not self.ranges:
+            return 0, size - 1
+        match = _RANGE.match(header.strip())
+        if not match:
+            return 0, size - 1
+        first, last = match.groups()
+        if not first:
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if start > end or start >= size:
+            return None
+        return start, end
+
+    def _write_body(self, start: int, end: int):
+        offset = start
+        began = time.monotonic()
+        sent = 0
+        while offset <= end:
+            length = min(BLOCK - offset % BLOCK, end - offset + 1)
+            block = _PATTERN[offset % BLOCK:offset % BLOCK + length]
+            try:
+                self.wfile.write(block)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            offset += length
+            sent += length
+            if self.stream_rate:
+                ahead = sent / self.stream_rate - (time.monotonic() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+def expected_bytes(size: int) -> bytes:
+    return (_PATTERN * (size // BLOCK + 1))[:size]
+
+
+def site_url(base_url: str, kind: str, name: str, size: int) -> str:
+    """URL of a fake video of ``kind`` "mp4" (watch page), "dash" or "hls" on the server at ``base_url``"""
+    if kind == "mp4":
+        return f"{base_url}/watch/{name}-{size}"
+    if kind == "dash":
+        return f"{base_url}/dash/{name}-{size}.mpd"
+    if kind == "hls":
+        return f"{base_url}/hls/{name}-{size}.m3u8"
+    raise ValueError(f"unknown media kind: {kind}")
+
+
+def segment_urls(name: str, size: int):
+    """Paths of the fragments a DASH or HLS stream of ``size`` bytes is split into"""
+    count = max(1, math.ceil(size / SEGMENT))
+    return [f"/media/{name}-seg{i}-{min(SEGMENT, size - i * SEGMENT)}.m4s" for i in range(count)]
+
+
+def dash_manifest(name: str, size: int) -> str:
+    segments = segment_urls(name, size)
+    duration = len(segments) * SEGMENT_SECONDS
+    return MPD.format(
+        name=name,
+        duration=duration,
+        bandwidth=int(size * 8 / duration),
+        segment_seconds=SEGMENT_SECONDS,
+        segments="\n".join(f'          <SegmentURL media="{url}"/>' for url in segments),
+    )
+
+
+def hls_playlist(name: str, size: int) -> str:
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{SEGMENT_SECONDS}", "#EXT-X-MEDIA-SEQUENCE:0"]
+    for url in segment_urls(name, size):
+        lines += [f"#EXTINF:{SEGMENT_SECONDS}.0,", url]
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+class FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections or aborting a transfer are
+        # routine here; anything else is printed as usual
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeServer:
+    """Runs the fake media server on a background thread"""
+
+    def __init__(self, stream_rate: Optional[float] = None, ranges: bool = True, port: int = 0,
+                 latency: float = 0.0):
+        handler = type("Handler", (FakeMediaHandler,),
+                       {"stream_rate": stream_rate, "ranges": ranges, "latency": latency})
+        self.httpd = FakeHTTPServer(("127.0.0.1", port), handler)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def media_url(self, name: str, size: int, ext: str = "mp4") -> str:
+        return f"{self.base_url}/media/{name}-{size}.{ext}"
+
+    def site_url(self, kind: str, name: str, size: int) -> str:
+        return site_url(self.base_url, kind, name, size)
+
+    def __enter__(self) -> "FakeServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
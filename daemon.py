@@ -0,0 +1,679 @@
+#!/usr/bin/env python3
+"""
+Headless download daemon with a local HTTP/JSON API
+
+One long-lived process runs the same Engine and DownloadQueue as the CLI and
+GUI, so yt-dlp's extractors, the metadata cache, the archive index and the
+bandwidth scheduler stay warm across every job submitted to it. Other
+programs, and the GUI started with ``--attach``, drive it over HTTP:
+
+    POST   /api/jobs        {"url": "...", "options": {...}} -> 202 {"jobs": [...]}
+    GET    /api/jobs        every job the daemon remembers
+    GET    /api/jobs/<id>   one job
+    PATCH  /api/jobs/<id>   {"priority": "high"}
+    DELETE /api/jobs/<id>   cancel a waiting or downloading job
+    GET    /api/stats       queue and bandwidth counters
+    PATCH  /api/settings    {"workers": 8, "limit": "5M"}
+    GET    /api/events      Server-Sent Events: "job", "progress" and "stats"
+    GET    /metrics         Prometheus text format (see metrics.py)
+
+``options`` mirrors the GUI's choices (``format_choice`` best, resolution or
+audio-only, ``resolution``, ``audio_format``, ``container``, ``outdir``,
+``allow_playlist``, ...); anything left out takes the DownloadOptions
+default. Playlists are expanded in the background and their entries show up
+as "job" events.
+
+The daemon listens on localhost only and every request must carry
+``Authorization: Bearer <token>``. The address and token are written to
+``daemon.json`` in the data directory (readable by the user only), which is
+also how clients find a running daemon.
+"""
+import argparse
+import json
+import os
+import queue
+import secrets
+import signal
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+from urllib.parse import urlsplit
+
+from Downloader import (
+    AUDIO_FORMATS, CONTAINERS, DEFAULT_PER_DOMAIN, DEFAULT_WORKERS, FORMAT_CHOICES,
+    DownloadJob, DownloadOptions, DownloadQueue, Engine, PostProcessPool, options_from_dict, options_to_dict, warm_up,
+)
+from archive import default_archive
+from bandwidth import BandwidthScheduler, PRIORITIES, parse_rate
+from infocache import InfoCache
+from journal import JobJournal, JournalBusy
+from metrics import Instruments, queue_collector
+from paths import data_dir
+from prefetch import Prefetcher
+from progress import FRAME_RATE, ProgressAggregator
+from retry import DEFAULT_ATTEMPTS, THROTTLE_SPEED, RetryPolicy
+from storage import MIN_FREE, OutputManager, parse_size
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8731
+# Finished jobs kept for status queries; older ones are forgotten
+MAX_HISTORY = 1000
+# Events buffered per event-stream client before new ones are dropped
+SUBSCRIBER_BACKLOG = 1000
+KEEPALIVE_INTERVAL = 15.0
+FINISHED = ("completed", "failed", "cancelled")
+
+# Option fields a client may set; yt-dlp params (ydl_extra) stay with the daemon
+CLIENT_OPTIONS = (
+    "format_choice", "resolution", "with_audio", "audio_format", "container", "format_spec", "outdir",
+    "output_template", "allow_playlist", "playlist_items", "download_archive", "connections",
+    "concurrent_fragments", "priority", "rate_limit", "subtitle_langs", "auto_subtitles", "write_chapters",
+    "write_description", "write_info_json",
+)
+
+
+def daemon_file():
+    return data_dir() / "daemon.json"
+
+
+class ApiError(Exception):
+    """A request the API rejects; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class DaemonUnavailable(Exception):
+    """No daemon is running, or it cannot be reached"""
+
+
+def options_from_request(data: Dict[str, Any], defaults: DownloadOptions) -> DownloadOptions:
+    """Validate the ``options`` object of a submission against ``defaults``"""
+    if not isinstance(data, dict):
+        raise ApiError(400, "options must be an object")
+    unknown = sorted(set(data) - set(CLIENT_OPTIONS))
+    if unknown:
+        raise ApiError(400, f"unknown options: {', '.join(unknown)}")
+    values = dict(data)
+    if values.get("format_choice", defaults.format_choice) not in FORMAT_CHOICES:
+        raise ApiError(400, f"format_choice must be one of {', '.join(FORMAT_CHOICES)}")
+    if values.get("audio_format", defaults.audio_format) not in AUDIO_FORMATS:
+        raise ApiError(400, f"audio_format must be one of {', '.join(AUDIO_FORMATS)}")
+    if values.get("container") not in (None, *CONTAINERS):
+        raise ApiError(400, f"container must be one of {', '.join(CONTAINERS)}")
+    if isinstance(values.get("priority"), str):
+        if values["priority"] not in PRIORITIES:
+            raise ApiError(400, f"priority must be one of {', '.join(sorted(PRIORITIES))}")
+        values["priority"] = PRIORITIES[values["priority"]]
+    if isinstance(values.get("rate_limit"), str):
+        try:
+            values["rate_limit"] = parse_rate(values["rate_limit"])
+        except ValueError as e:
+            raise ApiError(400, str(e))
+    if isinstance(values.get("subtitle_langs"), str):
+        values["subtitle_langs"] = [lang.strip() for lang in values["subtitle_langs"].split(",") if lang.strip()]
+    if not isinstance(values.get("subtitle_langs", []), list):
+        raise ApiError(400, "subtitle_langs must be a list or a comma-separated string")
+    if values.get("download_archive") is True:
+        values["download_archive"] = default_archive()
+    elif values.get("download_archive") is False:
+        values["download_archive"] = None
+    if "outdir" in values:
+        values["outdir"] = os.path.expanduser(values["outdir"])
+    merged = options_to_dict(defaults)
+    merged.update(values)
+    try:
+        options = options_from_dict(merged)
+        options.resolution = int(options.resolution) if options.resolution else None
+        options.connections = max(1, int(options.connections))
+        options.concurrent_fragments = max(1, int(options.concurrent_fragments))
+    except (TypeError, ValueError) as e:
+        raise ApiError(400, f"invalid options: {e}")
+    options.ydl_extra = dict(defaults.ydl_extra)
+    return options
+
+
+class JobService:
+    """
+    Jobs submitted over the API, run by one Engine and DownloadQueue.
+
+    Every state change is published as an event to all subscribers; progress
+    is coalesced per job and published at the GUI's frame rate, so a slow
+    client costs the downloads nothing. All methods are safe to call from
+    the server's request threads.
+    """
+
+    def __init__(self, engine: Engine, defaults: DownloadOptions, workers: int = DEFAULT_WORKERS,
+                 per_domain: Optional[int] = DEFAULT_PER_DOMAIN, max_history: int = MAX_HISTORY):
+        self.engine = engine
+        self.defaults = defaults
+        self.max_history = max_history
+        self.progress = ProgressAggregator()
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, DownloadJob]" = OrderedDict()
+        self._keys: Dict[int, str] = {}
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: List[queue.Queue] = []
+        self._stopped = threading.Event()
+        self.queue = DownloadQueue(self._run, workers, per_domain=per_domain, on_change=self._queue_changed)
+        engine.instruments.metrics.add_collector(queue_collector(self.queue, engine.scheduler))
+        self.prefetcher = Prefetcher(engine, self.queue)
+        threading.Thread(target=self._publish_progress, name="progress", daemon=True).start()
+
+    # API operations
+
+    def submit(self, url: str, options: DownloadOptions) -> List[Dict[str, Any]]:
+        """Queue ``url``; playlists are expanded in the background and return no jobs yet"""
+        if options.allow_playlist:
+            threading.Thread(target=self._feed_playlist, args=(url, options), daemon=True).start()
+            return []
+        job = DownloadJob(url, options)
+        self._add(job)
+        self.queue.submit(job, block=False)
+        return [self.describe(job)]
+
+    def resume(self) -> int:
+        jobs = self.engine.resume()
+        for job in jobs:
+            self._add(job)
+            self.queue.submit(job, block=False)
+        return len(jobs)
+
+    def job(self, key: str) -> DownloadJob:
+        with self._lock:
+            job = self._jobs.get(key)
+        if job is None:
+            raise ApiError(404, f"no such job: {key}")
+        return job
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [self.describe(job) for job in jobs]
+
+    def cancel(self, key: str) -> Dict[str, Any]:
+        job = self.job(key)
+        if job.status in FINISHED:
+            raise ApiError(409, f"job already {job.status}")
+        job.cancel()
+        if self.queue.cancel(job):
+            # Never reached a worker, so no record will come from the engine
+            self.engine.dropped(job)
+            self._finished(job, {"url": job.url, "status": "cancelled", "elapsed": 0.0})
+        return self.describe(job)
+
+    def set_priority(self, key: str, priority: str) -> Dict[str, Any]:
+        if priority not in PRIORITIES:
+            raise ApiError(400, f"priority must be one of {', '.join(sorted(PRIORITIES))}")
+        job = self.job(key)
+        job.options.priority = PRIORITIES[priority]
+        self.engine.scheduler.set_priority(job.key, job.options.priority)
+        return self.describe(job)
+
+    def update_settings(self, settings: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            if "workers" in settings:
+                self.queue.set_max_workers(int(settings["workers"]))
+            if "per_domain" in settings:
+                self.queue.set_per_domain(int(settings["per_domain"]) or None)
+            if "limit" in settings:
+                limit = settings["limit"]
+                self.engine.scheduler.set_limit(parse_rate(limit) if isinstance(limit, str) else limit)
+        except (TypeError, ValueError) as e:
+            raise ApiError(400, f"invalid settings: {e}")
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self.queue.stats())
+        stats["workers"] = self.queue.max_workers
+        stats["limit"] = self.engine.scheduler.limit
+        with self._lock:
+            stats["jobs"] = len(self._jobs)
+        return stats
+
+    def describe(self, job: DownloadJob) -> Dict[str, Any]:
+        return {
+            "id": job.key,
+            "url": job.url,
+            "title": job.title,
+            "thumbnail": job.thumbnail,
+            "status": job.status,
+            "conversion": job.conversion,
+            "options": options_to_dict(job.options),
+            "record": self._records.get(job.key),
+        }
+
+    # Events
+
+    def subscribe(self) -> queue.Queue:
+        events: queue.Queue = queue.Queue(SUBSCRIBER_BACKLOG)
+        with self._lock:
+            self._subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events: queue.Queue):
+        with self._lock:
+            if events in self._subscribers:
+                self._subscribers.remove(events)
+
+    def close(self):
+        self._stopped.set()
+
+    def _publish(self, event: str, data: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for events in subscribers:
+            try:
+                events.put_nowait((event, data))
+            except queue.Full:
+                pass  # Client is not reading; later events still describe the latest state
+
+    def _publish_progress(self):
+        while not self._stopped.wait(1 / FRAME_RATE):
+            for job_id, snapshot in self.progress.drain().items():
+                key = self._keys.get(job_id)
+                if key is None:
+                    continue
+                self._publish("progress", {
+                    "id": key,
+                    "status": snapshot.status,
+                    "fraction": snapshot.fraction,
+                    "downloaded": snapshot.downloaded,
+                    "total": snapshot.total,
+                    "speed": snapshot.speed,
+                    "eta": snapshot.eta,
+                    "title": snapshot.title,
+                    "thumbnail": snapshot.thumbnail,
+                    "attempt": snapshot.attempt,
+                    "retry_in": snapshot.retry_in,
+                    "reason": snapshot.reason,
+                })
+
+    def _queue_changed(self):
+        self._publish("stats", self.stats())
+
+    # Job lifecycle
+
+    def _add(self, job: DownloadJob):
+        self.engine.queued(job)
+        with self._lock:
+            self._jobs[job.key] = job
+            self._keys[job.id] = job.key
+        self._publish("job", self.describe(job))
+
+    def _feed_playlist(self, url: str, options: DownloadOptions):
+        try:
+            for job in self.engine.expand(url, options):
+                self._add(job)
+                self.queue.submit(job)
+        except Exception as e:
+            self._publish("error", {"url": url, "error": f"Error listing playlist: {e}"})
+
+    def _run(self, job: DownloadJob):
+        if not job.cancelled:
+            job.status = "running"
+            self._publish("job", self.describe(job))
+        self.prefetcher.claim(job)
+        record = self.engine.run(
+            job,
+            [lambda d: self.progress.update(job.id, d)],
+            on_downloaded=lambda: self.queue.detach(job),
+        )
+        self.progress.forget(job.id)
+        self._finished(job, record)
+
+    def _finished(self, job: DownloadJob, record: Dict[str, Any]):
+        with self._lock:
+            self._records[job.key] = record
+            finished = [key for key, j in self._jobs.items() if j.status in FINISHED]
+            for key in finished[:max(0, len(finished) - self.max_history)]:
+                old = self._jobs.pop(key)
+                self._keys.pop(old.id, None)
+                self._records.pop(key, None)
+        self._publish("job", self.describe(job))
+
+
+class ApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: JobService, token: str):
+        super().__init__(address, ApiHandler)
+        self.service = service
+        self.token = token
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server: ApiServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        pass  # Requests are not worth a line each on stderr
+
+    def _dispatch(self, method: str):
+        try:
+            if not secrets.compare_digest(self.headers.get("Authorization", ""), f"Bearer {self.server.token}"):
+                raise ApiError(401, "missing or wrong token")
+            parts = [p for p in urlsplit(self.path).path.split("/") if p]
+            if parts == ["metrics"] and method == "GET":
+                self._send_text(self.server.service.engine.instruments.metrics.render())
+                return
+            if parts[:1] != ["api"]:
+                raise ApiError(404, "not found")
+            parts = parts[1:]
+            if parts == ["events"] and method == "GET":
+                self._stream_events()
+                return
+            status, body = self._route(method, parts)
+        except ApiError as e:
+            status, body = e.status, {"error": str(e)}
+        except Exception as e:
+            status, body = 500, {"error": str(e)}
+        self._send_json(status, body)
+
+    def _route(self, method: str, parts: List[str]) -> Tuple[int, Any]:
+        service = self.server.service
+        if parts == ["jobs"]:
+            if method == "GET":
+                return 200, {"jobs": service.jobs()}
+            if method == "POST":
+                data = self._read_json()
+                urls = data.get("urls") or ([data["url"]] if data.get("url") else [])
+                if not urls or not all(isinstance(url, str) for url in urls):
+                    raise ApiError(400, "url or urls required")
+                options = options_from_request(data.get("options") or {}, service.defaults)
+                jobs = []
+                for url in urls:
+                    jobs.extend(service.submit(url, options))
+                return 202, {"jobs": jobs}
+        elif len(parts) == 2 and parts[0] == "jobs":
+            if method == "GET":
+                return 200, service.describe(service.job(parts[1]))
+            if method == "DELETE":
+                return 200, service.cancel(parts[1])
+            if method == "PATCH":
+                data = self._read_json()
+                if "priority" not in data:
+                    raise ApiError(400, "nothing to change")
+                return 200, service.set_priority(parts[1], data["priority"])
+        elif parts == ["stats"] and method == "GET":
+            return 200, service.stats()
+        elif parts == ["settings"] and method == "PATCH":
+            return 200, service.update_settings(self._read_json())
+        else:
+            raise ApiError(404, "not found")
+        raise ApiError(405, f"{method} not allowed here")
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(400, "body is not valid JSON")
+        if not isinstance(data, dict):
+            raise ApiError(400, "body must be a JSON object")
+        return data
+
+    def _send_json(self, status: int, body: Any):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_text(self, text: str):
+        payload = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream_events(self):
+        service = self.server.service
+        events = service.subscribe()
+        self.close_connection = True
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            # Current state first, so a client attaching late can draw everything
+            for job in service.jobs():
+                self._send_event("job", job)
+            self._send_event("stats", service.stats())
+            while True:
+                try:
+                    event, data = events.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                self._send_event(event, data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            service.unsubscribe(events)
+
+    def _send_event(self, event: str, data: Any):
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        self.wfile.write(f"event: {event}\ndata: {payload}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+class DaemonClient:
+    """
+    Client for a running daemon. Every call opens its own connection, so one
+    client can be shared between threads; ``events`` blocks for as long as
+    the stream stays open.
+    """
+
+    def __init__(self, url: Optional[str] = None, token: Optional[str] = None, timeout: float = 10.0):
+        if url is None or token is None:
+            try:
+                with open(daemon_file(), "r", encoding="utf-8") as f:
+                    info = json.load(f)
+            except (OSError, ValueError):
+                raise DaemonUnavailable("no daemon is running (start one with simpledownloader-daemon)")
+            url, token = url or info["url"], token or info["token"]
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def submit(self, url: str, options: DownloadOptions) -> List[Dict[str, Any]]:
+        data = options_to_dict(options)
+        return self._request("POST", "/api/jobs", {
+            "url": url, "options": {k: v for k, v in data.items() if k in CLIENT_OPTIONS},
+        })["jobs"]
+
+    def job(self, key: str) -> Dict[str, Any]:
+        return self._request("GET", f"/api/jobs/{key}")
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        return self._request("GET", "/api/jobs")["jobs"]
+
+    def cancel(self, key: str) -> Dict[str, Any]:
+        return self._request("DELETE", f"/api/jobs/{key}")
+
+    def set_priority(self, key: str, priority: str) -> Dict[str, Any]:
+        return self._request("PATCH", f"/api/jobs/{key}", {"priority": priority})
+
+    def stats(self) -> Dict[str, Any]:
+        return self._request("GET", "/api/stats")
+
+    def update_settings(self, **settings) -> Dict[str, Any]:
+        return self._request("PATCH", "/api/settings", settings)
+
+    def events(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(event, data)`` pairs from the event stream until it closes"""
+        import urllib.request
+
+        request = urllib.request.Request(self.url + "/api/events", headers=self._headers())
+        try:
+            response = urllib.request.urlopen(request, timeout=KEEPALIVE_INTERVAL * 2)
+        except OSError as e:
+            raise DaemonUnavailable(f"cannot reach the daemon at {self.url}: {e}")
+        with response:
+            event, data = "message", []
+            for raw in response:
+                line = raw.decode("utf-8").rstrip("\r\n")
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    yield event, json.loads("\n".join(data))
+                    event, data = "message", []
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"}
+
+    def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Any:
+        import urllib.error
+        import urllib.request
+
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.url + path, data=payload, method=method, headers=self._headers())
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error") or e.reason
+            except ValueError:
+                message = e.reason
+            raise ApiError(e.code, message)
+        except OSError as e:
+            raise DaemonUnavailable(f"cannot reach the daemon at {self.url}: {e}")
+
+
+def write_daemon_file(url: str, token: str):
+    path = daemon_file()
+    tmp = str(path) + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "token": token, "pid": os.getpid()}, f)
+    os.replace(tmp, path)
+
+
+def remove_daemon_file(token: str):
+    # Only our own; a newer daemon may have replaced it
+    path = daemon_file()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if json.load(f).get("token") == token:
+                os.remove(path)
+    except (OSError, ValueError):
+        pass
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="simpledownloader-daemon",
+        description="Run the download engine headless behind a local HTTP/JSON API",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--token", help="API token (default: a random one, written to the daemon file)")
+    parser.add_argument("--outdir", default=".", metavar="DIR", help="output directory for jobs that name none")
+    parser.add_argument("--output-volume", action="append", default=[], metavar="DIR",
+                        help="another directory downloads may go to when it has more free space than their own "
+                             "(repeatable)")
+    parser.add_argument("--min-free", type=parse_size, default=MIN_FREE, metavar="SIZE",
+                        help="free space to leave on every output volume (default: 512M)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, metavar="N",
+                        help=f"parallel downloads (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--per-domain", type=int, default=DEFAULT_PER_DOMAIN, metavar="N",
+                        help=f"parallel downloads per host, 0 for no limit (default: {DEFAULT_PER_DOMAIN})")
+    parser.add_argument("--limit-rate", type=parse_rate, metavar="RATE",
+                        help="total bandwidth for all downloads, e.g. 5M (default: unlimited)")
+    parser.add_argument("--postprocess-workers", type=int, metavar="N",
+                        help="merges/conversions run in parallel (default: CPU cores)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_ATTEMPTS - 1, metavar="N",
+                        help=f"retry failed downloads up to N times, with backoff (default: {DEFAULT_ATTEMPTS - 1})")
+    parser.add_argument("--throttle-speed", type=parse_rate, default=THROTTLE_SPEED, metavar="RATE",
+                        help="restart downloads that stay below RATE with fresh URLs (default: 32K, 0 to disable)")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="do not skip or record videos in the shared download archive by default")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the metadata cache")
+    parser.add_argument("--no-journal", action="store_true", help="do not record or resume jobs")
+    parser.add_argument("--trace", metavar="FILE", help="append a JSON-lines trace of every job phase to FILE")
+    parser.add_argument("--profile-dir", metavar="DIR", help="write a cProfile dump of every extraction to DIR")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    journal = None
+    if not args.no_journal:
+        try:
+            journal = JobJournal(data_dir() / "daemon-jobs.jsonl")
+        except JournalBusy as e:
+            print(f"Error: {e}; is another daemon running?", file=sys.stderr)
+            return 1
+
+    defaults = DownloadOptions(
+        outdir=os.path.abspath(os.path.expanduser(args.outdir)),
+        download_archive=None if args.no_archive else default_archive(),
+    )
+    instruments = Instruments(trace_path=args.trace, profile_dir=args.profile_dir)
+    engine = Engine(
+        None if args.no_cache else InfoCache(),
+        journal,
+        quiet=True,
+        scheduler=BandwidthScheduler(args.limit_rate),
+        postprocess=PostProcessPool(args.postprocess_workers),
+        instruments=instruments,
+        retry=RetryPolicy(args.retries + 1, throttle_speed=args.throttle_speed),
+        storage=OutputManager(args.output_volume, args.min_free),
+    )
+    service = JobService(engine, defaults, args.workers, args.per_domain or None)
+    token = args.token or secrets.token_urlsafe(32)
+    try:
+        server = ApiServer((args.host, args.port), service, token)
+    except OSError as e:
+        print(f"Error: cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 1
+
+    warm_up()
+    resumed = service.resume()
+    write_daemon_file(server.url, token)
+    # serve_forever returns on SIGTERM too, so the daemon file is cleaned up
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    print(f"Listening on {server.url} ({resumed} jobs resumed)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        remove_daemon_file(token)
+        server.server_close()
+        service.close()
+        instruments.close()
+        if journal is not None:
+            journal.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
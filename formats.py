@@ -0,0 +1,161 @@
+"""
+Compact per-video format index
+
+An extracted info dict carries every format with its URLs, HTTP headers and
+fragment lists, hundreds of KB for a long video. Filling the resolution
+menu, estimating file sizes and choosing what to download only need a few
+numbers per format, so the fetch step boils the info dict down to a
+``FormatIndex`` once, off the Tk thread, and queued jobs keep that instead.
+
+Video formats are sorted best first by height, fps, codec and bitrate, and
+audio-only formats by bitrate. Choices made from the index follow the same
+rules as the format strings ``Downloader.build_format`` gives yt-dlp,
+including the nearest-height fallback: the tallest height not above the
+requested one, else the shortest above it.
+"""
+import re
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple
+
+# Source codecs (prefixes of yt-dlp's acodec field) that audio extraction can
+# copy into each target format; anything else is re-encoded
+AUDIO_CODECS = {
+    "mp3": ("mp3",),
+    "m4a": ("mp4a", "aac"),
+    "aac": ("mp4a", "aac"),
+    "opus": ("opus",),
+    "flac": ("flac",),
+}
+# Merging always copies streams; these (video, audio) extensions make format
+# sorting prefer streams a container holds natively. mkv holds anything.
+CONTAINER_EXTS = {"mp4": ("mp4", "m4a"), "webm": ("webm", "webm")}
+# Video codecs (prefixes of yt-dlp's vcodec field), best first as in yt-dlp's own sorting
+VIDEO_CODECS = (("av01",), ("vp09", "vp9"), ("hvc1", "hev1", "h265", "hevc"), ("avc1", "h264"), ("vp8",))
+
+# Format ids that can be used in a format string as they are
+_PLAIN_ID = re.compile(r"[\w.-]+")
+
+
+def codec_rank(vcodec: str) -> int:
+    """Higher is better; 0 for unknown codecs"""
+    vcodec = vcodec.lower()
+    for rank, prefixes in enumerate(VIDEO_CODECS):
+        if vcodec.startswith(prefixes):
+            return len(VIDEO_CODECS) - rank
+    return 0
+
+
+class FormatEntry(NamedTuple):
+    """The fields of one yt-dlp format the index needs; codecs are "" when unknown, "none" when absent"""
+
+    format_id: str
+    ext: str
+    height: int
+    fps: float
+    vcodec: str
+    acodec: str
+    tbr: float
+    filesize: Optional[int]
+
+    @property
+    def has_video(self) -> bool:
+        return self.vcodec != "none"
+
+    @property
+    def has_audio(self) -> bool:
+        return self.acodec != "none"
+
+
+def _entry(f: Dict[str, Any], duration: Optional[float]) -> Optional[FormatEntry]:
+    vcodec = f.get("vcodec") or ""
+    acodec = f.get("acodec") or ""
+    if f.get("format_id") is None or f.get("has_drm") or (vcodec == "none" and acodec == "none"):
+        return None  # Storyboards, DRM-protected and unusable formats
+    tbr = float(f.get("tbr") or 0)
+    filesize = f.get("filesize") or f.get("filesize_approx")
+    if not filesize and tbr and duration:
+        filesize = tbr * 1000 / 8 * duration
+    return FormatEntry(
+        format_id=str(f["format_id"]),
+        ext=f.get("ext") or "",
+        height=int(f.get("height") or 0),
+        fps=float(f.get("fps") or 0),
+        vcodec=vcodec,
+        acodec=acodec,
+        tbr=tbr,
+        filesize=int(filesize) if filesize else None,
+    )
+
+
+class FormatIndex:
+    """
+    Formats of one video, precomputed for format choices; ``options`` arguments
+    are DownloadOptions (only the format fields are read)
+    """
+
+    __slots__ = ("duration", "video", "audio")
+
+    def __init__(self, video: Tuple[FormatEntry, ...], audio: Tuple[FormatEntry, ...],
+                 duration: Optional[float] = None):
+        self.duration = duration
+        self.video = video
+        self.audio = audio
+
+    @classmethod
+    def from_info(cls, info: Dict[str, Any]) -> "FormatIndex":
+        duration = info.get("duration")
+        # Direct links resolve to a single video with no "formats" list
+        entries = [_entry(f, duration) for f in info.get("formats") or [info]]
+        video = [e for e in entries if e is not None and e.has_video]
+        audio = [e for e in entries if e is not None and not e.has_video]
+        video.sort(key=lambda e: (e.height, e.fps, codec_rank(e.vcodec), e.tbr), reverse=True)
+        audio.sort(key=lambda e: e.tbr, reverse=True)
+        return cls(tuple(video), tuple(audio), duration)
+
+    @property
+    def heights(self) -> List[int]:
+        """Heights with a known video codec, tallest first"""
+        return sorted({e.height for e in self.video if e.height and e.vcodec}, reverse=True)
+
+    def nearest_height(self, height: int) -> Optional[int]:
+        heights = self.heights
+        below = [h for h in heights if h <= height]
+        return max(below) if below else min(heights, default=None)
+
+    def choose(self, options) -> List[FormatEntry]:
+        """
+        The formats to download for ``options``, in format string order; empty
+        when the index cannot tell and yt-dlp's own selection should decide
+        """
+        if options.format_choice == "audio-only":
+            codecs = AUDIO_CODECS.get(options.audio_format, ())
+            # Streams that only need copying out of their container come first
+            best = max(self.audio, key=lambda e: (bool(codecs) and e.acodec.startswith(codecs), e.tbr), default=None)
+            return [best] if best is not None else []
+
+        video_ext, audio_ext = CONTAINER_EXTS.get(options.container, (None, None))
+        videos = self.video
+        if options.format_choice == "resolution" and options.resolution:
+            height = self.nearest_height(int(options.resolution))
+            videos = tuple(e for e in videos if e.height == height)
+        # Ties keep the index order: fps, codec and bitrate
+        video = max(videos, key=lambda e: (e.height, e.ext == video_ext), default=None)
+        if video is None:
+            return []
+        if video.has_audio or (options.format_choice == "resolution" and not options.with_audio):
+            return [video]
+        audio = max(self.audio, key=lambda e: (e.ext == audio_ext, e.tbr), default=None)
+        return [video, audio] if audio is not None else []
+
+    def format_spec(self, options) -> Optional[str]:
+        """``choose`` as a yt-dlp format string such as "137+140", or None"""
+        chosen = self.choose(options)
+        if not chosen or not all(_PLAIN_ID.fullmatch(e.format_id) for e in chosen):
+            return None
+        return "+".join(e.format_id for e in chosen)
+
+    def estimate_size(self, options) -> Optional[int]:
+        """Bytes ``options`` would download, before any conversion; None when unknown"""
+        chosen = self.choose(options)
+        if not chosen or any(e.filesize is None for e in chosen):
+            return None
+        return sum(e.filesize for e in chosen)
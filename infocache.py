@@ -0,0 +1,194 @@
+"""
+Persistent cache of yt-dlp info dicts
+
+Resolving a URL with ``extract_info`` costs seconds of extractor and network
+time. The cache keeps the sanitized info dict in SQLite so a fetch followed by
+a download, or a retry after a restart, only resolves the URL once.
+
+Entries are keyed by ``extractor:id`` with every URL that resolved to them
+stored as an alias. They expire after ``ttl`` seconds (signed media URLs go
+stale) and the least recently used ones are evicted once the stored data
+exceeds ``max_bytes``. Many sites sign their media URLs with an expiry
+time of their own; ``media_expiry`` reads it, and ``get`` can skip
+entries whose URLs would stop working before a download is done with them.
+"""
+import calendar
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit, urlunsplit, parse_qsl
+
+from paths import cache_dir
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Cached media URLs must stay valid at least this long to be downloaded from
+EXPIRY_MARGIN = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS infos (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS infos_accessed ON infos (accessed);
+CREATE TABLE IF NOT EXISTS aliases (
+    url TEXT PRIMARY KEY,
+    key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS aliases_key ON aliases (key);
+"""
+
+# Unix time a signed URL stops working at: YouTube's expire= (also as a
+# /expire/<t>/ path segment in manifest URLs), CloudFront's Expires=, and
+# Akamai tokens (hdnts=st=...~exp=<t>~acl=...)
+_EXPIRES = re.compile(r"[?&/~](?:expire|expires|exp)[=/](\d{10})(?!\d)", re.IGNORECASE)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used for cache lookups"""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    return urlunsplit((parts.scheme.lower() or "https", netloc, parts.path, parts.query, ""))
+
+
+def info_key(info: Dict[str, Any]) -> Optional[str]:
+    extractor = info.get("extractor_key") or info.get("extractor")
+    video_id = info.get("id")
+    if not extractor or not video_id:
+        return None
+    return f"{extractor}:{video_id}"
+
+
+def media_expiry(info: Dict[str, Any]) -> Optional[float]:
+    """
+    When the first of the signed media URLs in ``info`` expires, as a Unix
+    time; None when no URL says
+    """
+    urls = [info.get("url"), info.get("manifest_url")]
+    for f in info.get("formats") or ():
+        urls += [f.get("url"), f.get("manifest_url"), f.get("fragment_base_url")]
+    expiry = None
+    for url in urls:
+        if not url:
+            continue
+        for match in _EXPIRES.finditer(url):
+            expiry = min(expiry or float("inf"), float(match.group(1)))
+        if "X-Amz-Expires=" in url:
+            # S3 presigned URLs: signing time plus a lifetime in seconds
+            query = dict(parse_qsl(urlsplit(url).query))
+            try:
+                signed = calendar.timegm(time.strptime(query["X-Amz-Date"], "%Y%m%dT%H%M%SZ"))
+                expiry = min(expiry or float("inf"), signed + float(query["X-Amz-Expires"]))
+            except (KeyError, ValueError):
+                pass
+    return expiry
+
+
+class InfoCache:
+    """SQLite-backed TTL/LRU cache of sanitized info dicts, safe to share between threads"""
+
+    def __init__(self, path: Optional[Path] = None, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path) if path else cache_dir() / "info.sqlite"
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def get(self, url: str, valid_for: float = 0) -> Optional[Dict[str, Any]]:
+        """
+        The cached info for ``url``; None when there is none, or when its
+        media URLs expire within ``valid_for`` seconds (the entry is dropped)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT infos.key, data, created FROM aliases JOIN infos ON infos.key = aliases.key "
+                "WHERE aliases.url = ?",
+                (normalize_url(url),),
+            ).fetchone()
+            if row is None:
+                return None
+            key, data, created = row
+            if now - created > self.ttl:
+                self._delete(key)
+                return None
+            self._db.execute("UPDATE infos SET accessed = ? WHERE key = ?", (now, key))
+        info = json.loads(zlib.decompress(data))
+        if valid_for:
+            expiry = media_expiry(info)
+            if expiry is not None and expiry < now + valid_for:
+                self.invalidate(url)
+                return None
+        return info
+
+    def put(self, url: str, info: Dict[str, Any]):
+        """Store a sanitized single-video info dict under its id and every URL it answers to"""
+        key = info_key(info)
+        if key is None or info.get("_type", "video") != "video":
+            return
+        data = zlib.compress(json.dumps(info, separators=(",", ":")).encode("utf-8"))
+        urls = {normalize_url(u) for u in (url, info.get("webpage_url"), info.get("original_url")) if u}
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO infos (key, data, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, data, len(data), now, now),
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO aliases (url, key) VALUES (?, ?)",
+                    [(u, key) for u in urls],
+                )
+                self._evict()
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def invalidate(self, url: str):
+        with self._lock:
+            row = self._db.execute("SELECT key FROM aliases WHERE url = ?", (normalize_url(url),)).fetchone()
+            if row is not None:
+                self._delete(row[0])
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM infos")
+            self._db.execute("DELETE FROM aliases")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _delete(self, key: str):
+        # Caller holds the lock
+        self._db.execute("DELETE FROM infos WHERE key = ?", (key,))
+        self._db.execute("DELETE FROM aliases WHERE key = ?", (key,))
+
+    def _evict(self):
+        # Caller holds the lock
+        self._db.execute("DELETE FROM infos WHERE created < ?", (time.time() - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM infos").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in self._db.execute("SELECT key, size FROM infos ORDER BY accessed").fetchall():
+                self._db.execute("DELETE FROM infos WHERE key = ?", (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._db.execute("DELETE FROM aliases WHERE key NOT IN (SELECT key FROM infos)")
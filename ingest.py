@@ -0,0 +1,150 @@
+"""
+Bulk URL ingestion
+
+Links arrive in blocks pasted from chats and spreadsheets, surrounded by
+text, punctuation and tracking parameters. ``extract_urls`` pulls every
+http(s) URL out of such text with one regex pass and rewrites each to its
+canonical form (``canonical_url``), so the same video shared as a youtu.be
+link, a Shorts link and a watch URL with ``?si=`` is recognized as one.
+
+``Ingestor`` resolves new URLs on a small pool ahead of the download queue:
+the info dict goes into the engine's cache and the job gets its format
+index, title and thumbnail, so by the time it is queued its worker starts
+downloading without an extraction. URLs already in the download archive
+are reported instead of queued.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Callable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from Downloader import DownloadJob, DownloadOptions, Engine, ResolverPool, entry_thumbnail, extract_info
+from formats import FormatIndex
+from infocache import normalize_url
+
+RESOLVE_WORKERS = 4
+
+_URL = re.compile(r"https?://[^\s<>\"'`{}|\\^]+", re.IGNORECASE)
+# Punctuation that ends a sentence or markup around a link rather than the link itself
+_TRAILING = ".,;:!?*'\"]>"
+_YOUTUBE_ID = re.compile(r"[\w-]{11}")
+YOUTUBE_HOSTS = {"youtube.com", "www.youtube.com", "m.youtube.com", "youtube-nocookie.com",
+                 "www.youtube-nocookie.com"}
+# Query parameters that only say where a link was shared from
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid", "igsh",
+                   "mc_cid", "mc_eid", "_hsenc", "_hsmi", "mkt_tok", "ref_src"}
+SITE_TRACKING_PARAMS = {
+    "youtube.com": {"si", "feature", "pp", "ab_channel", "t"},
+    "twitter.com": {"s", "t"},
+    "x.com": {"s", "t"},
+}
+
+
+def _site(host: str) -> str:
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+def _youtube_id(host: str, path: str, query: Dict[str, str]) -> Optional[str]:
+    parts = [p for p in path.split("/") if p]
+    if host == "youtu.be":
+        video_id = parts[0] if parts else None
+    elif host in YOUTUBE_HOSTS:
+        if parts[:1] == ["watch"]:
+            video_id = query.get("v")
+        elif len(parts) > 1 and parts[0] in ("shorts", "live", "embed", "v", "e"):
+            video_id = parts[1]
+        else:
+            return None
+    else:
+        return None
+    return video_id if video_id and _YOUTUBE_ID.fullmatch(video_id) else None
+
+
+def canonical_url(url: str) -> str:
+    """
+    ``url`` with the scheme and host lowercased, tracking parameters dropped
+    and YouTube short, Shorts, live and embed links turned into watch URLs
+    (keeping a ``list`` parameter for playlist mode)
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    original = parse_qsl(parts.query, keep_blank_values=True)
+    params = [(k, v) for k, v in original if k not in TRACKING_PARAMS and not k.startswith("utm_")]
+
+    video_id = _youtube_id(host, parts.path, dict(params))
+    if video_id:
+        query = [("v", video_id)] + [(k, v) for k, v in params if k == "list"]
+        return urlunsplit(("https", "www.youtube.com", "/watch", urlencode(query), ""))
+
+    site_params = SITE_TRACKING_PARAMS.get(_site(host))
+    if site_params:
+        params = [(k, v) for k, v in params if k not in site_params]
+    # Re-encoding could change how the site reads the query; only do it when something was dropped
+    query = urlencode(params) if len(params) != len(original) else parts.query
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path, query, parts.fragment))
+
+
+def url_key(url: str) -> str:
+    """Identifies URLs of the same video, for deduplication"""
+    return normalize_url(canonical_url(url))
+
+
+def extract_urls(text: str) -> List[str]:
+    """Every distinct URL in ``text``, canonicalized, in order of first appearance"""
+    urls = []
+    seen = set()
+    for match in _URL.finditer(text):
+        url = match.group().rstrip(_TRAILING)
+        # A closing parenthesis belongs to the URL only if it opened one, as in Wikipedia links
+        while url.endswith(")") and url.count(")") > url.count("("):
+            url = url[:-1].rstrip(_TRAILING)
+        url = canonical_url(url)
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            urls.append(url)
+    return urls
+
+
+class Ingestor:
+    """Resolves URLs into ready-to-run jobs on a bounded pool; safe to share between threads"""
+
+    def __init__(self, engine: Engine, workers: int = RESOLVE_WORKERS):
+        self.engine = engine
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resolve")
+        self._ydls = ResolverPool()
+
+    def submit(self, url: str, options: DownloadOptions, ready: Callable[[DownloadJob], None],
+               skipped: Callable[[DownloadJob], None]):
+        """
+        Resolve ``url`` in the background, then call ``ready(job)``, or
+        ``skipped(job)`` when the video is in the download archive. Both are
+        called on a pool thread. Resolution failures still call ``ready``;
+        the download reports the error.
+        """
+        self._pool.submit(self._resolve, DownloadJob(url, options), ready, skipped)
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+    def _resolve(self, job: DownloadJob, ready: Callable[[DownloadJob], None],
+                 skipped: Callable[[DownloadJob], None]):
+        try:
+            if self.engine.archived(job):
+                skipped(job)
+                return
+            info = extract_info(self._ydls.get(job.options), job.url, self.engine.cache)
+            if info.get("_type", "video") == "video":
+                job.formats = FormatIndex.from_info(info)
+            job.title = info.get("title") or job.url
+            job.thumbnail = entry_thumbnail(info)
+            if self.engine.archived(job, info):
+                skipped(job)
+                return
+        except Exception:
+            pass  # The worker resolves the URL again and reports the failure
+        ready(job)
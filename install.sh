@@ -175,6 +175,22 @@ EOF
     print_success "GUI launcher created: simpledownloader-gui"
 }
 
+# Create daemon launcher script
+create_daemon_launcher() {
+    print_info "Creating daemon launcher..."
+    
+    cat > "$BIN_DIR/simpledownloader-daemon" << 'EOF'
+#!/bin/bash
+# SimpleDownloader Daemon Launcher
+cd /opt/SimpleDownloader
+source .venv/bin/activate
+exec python3 daemon.py "$@"
+EOF
+    
+    chmod +x "$BIN_DIR/simpledownloader-daemon"
+    print_success "Daemon launcher created: simpledownloader-daemon"
+}
+
 # Create desktop entry for app launcher
 create_desktop_entry() {
     print_info "Creating desktop entry..."
@@ -252,6 +268,7 @@ main() {
     setup_venv
     create_cli_launcher
     create_gui_launcher
+    create_daemon_launcher
     create_desktop_entry
     create_icon
     set_permissions
@@ -265,6 +282,7 @@ main() {
     print_info "  1. Find 'SimpleDownloader' in your app launcher"
     print_info "  2. Run 'simpledownloader-gui' from terminal for GUI"
     print_info "  3. Run 'simpledownloader <url>' from terminal for CLI"
+    print_info "  4. Run 'simpledownloader-daemon' to accept jobs over a local HTTP API"
     echo ""
     print_info "To uninstall, run:"
     print_info "  curl -fsSL https://raw.githubusercontent.com/tempox777/SimpleDownloader/main/uninstall.sh | sudo sh"
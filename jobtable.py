@@ -0,0 +1,158 @@
+"""
+Rows of the GUI's download list
+
+The list shows this session's jobs and, below them, the finished jobs of
+earlier sessions read back from the job journal a page at a time, so it
+can grow to tens of thousands of entries. Each is a slotted ``JobEntry``
+holding only what a row draws; ``JobTable`` keeps them newest first along
+with the filtered order the list view scrolls through. The view itself
+keeps widgets for the visible rows only (``JobList`` in DownloaderGUI.py).
+
+This module imports no GUI toolkit.
+"""
+import os
+import time
+from typing import Optional, Dict, Any, List, Iterable
+
+HISTORY_PAGE = 200
+
+# Filter choices and the entry states they show
+STATE_FILTERS = {
+    "All": None,
+    "Active": ("queued", "running"),
+    "Completed": ("completed",),
+    "Failed": ("failed", "cancelled"),
+}
+
+
+class JobEntry:
+    """
+    What one row shows. ``job`` is the live DownloadJob, whose status is the
+    entry's state; None for history. ``status`` is the text under the bar.
+    """
+
+    __slots__ = ("key", "job", "url", "title", "_state", "status", "error", "progress", "thumbnail", "_search")
+
+    def __init__(self, key: str, url: str, title: str, state: str, status: str, job=None,
+                 error: bool = False, progress: float = 0.0, thumbnail: Optional[str] = None):
+        self.key = key
+        self.job = job
+        self.url = url
+        self.title = title
+        self._state = state
+        self.status = status
+        self.error = error
+        self.progress = progress
+        self.thumbnail = thumbnail
+        self._search: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        return self.job.status if self.job is not None else self._state
+
+    @classmethod
+    def for_job(cls, job) -> "JobEntry":
+        return cls(job.key, job.url, job.title, job.status, "Queued", job=job, thumbnail=job.thumbnail)
+
+    @classmethod
+    def from_journal(cls, record: Dict[str, Any]) -> "JobEntry":
+        """An entry for a finished job of JobJournal.finished"""
+        path = record.get("filepath") or record.get("filename")
+        title = os.path.basename(path) if path else record["url"]
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(record["ts"])) if record.get("ts") else ""
+        if record["state"] == "completed":
+            return cls(record["key"], record["url"], title, "completed", f"✅ Downloaded {when}".rstrip(),
+                       progress=1.0)
+        return cls(record["key"], record["url"], title, record["state"],
+                   f"Failed {when}: {record.get('error') or 'unknown error'}", error=True)
+
+    def update(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+        if "title" in fields:
+            self._search = None
+
+    def matches(self, text: str, states: Optional[Iterable[str]]) -> bool:
+        """``text`` must be lowercased already"""
+        if states is not None and self.state not in states:
+            return False
+        if not text:
+            return True
+        if self._search is None:
+            self._search = f"{self.title}\n{self.url}".lower()
+        return text in self._search
+
+
+class JobTable:
+    """
+    Entries newest first: this session's jobs, then the history pages loaded
+    so far. ``len()`` and indexing go through the current filter. Entries
+    whose state changes stay where they are until the filter changes.
+    Only touched from the Tk thread.
+    """
+
+    def __init__(self):
+        self._live: List[JobEntry] = []
+        self._history: List[JobEntry] = []
+        self._keys: Dict[str, JobEntry] = {}
+        self._view: List[JobEntry] = []
+        self._text = ""
+        self._states: Optional[Iterable[str]] = None
+        self._cursor: Optional[int] = None
+        self.history_done = False
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def __getitem__(self, index: int) -> JobEntry:
+        return self._view[index]
+
+    def get(self, key: str) -> Optional[JobEntry]:
+        return self._keys.get(key)
+
+    def add(self, entry: JobEntry) -> bool:
+        """Put a new job at the top; True when the filter shows it"""
+        self._live.append(entry)
+        self._keys[entry.key] = entry
+        if entry.matches(self._text, self._states):
+            self._view.insert(0, entry)
+            return True
+        return False
+
+    def load_history(self, journal, limit: int = HISTORY_PAGE) -> int:
+        """
+        Append the next page of finished jobs from ``journal`` (a JobJournal)
+        below everything loaded so far; returns how many the filter shows.
+        Jobs already in the table, like this session's, are skipped.
+        """
+        if self.history_done:
+            return 0
+        records, self._cursor = journal.finished(self._cursor, limit)
+        if not self._cursor:
+            self.history_done = True
+        shown = 0
+        for record in records:
+            if record["key"] in self._keys:
+                continue
+            entry = JobEntry.from_journal(record)
+            self._history.append(entry)
+            self._keys[entry.key] = entry
+            if entry.matches(self._text, self._states):
+                self._view.append(entry)
+                shown += 1
+        return shown
+
+    def set_filter(self, text: str = "", states: Optional[Iterable[str]] = None) -> bool:
+        """
+        Show only entries whose title or URL contains ``text`` and whose state
+        is in ``states``; False when that is the filter already
+        """
+        text = text.strip().lower()
+        states = tuple(states) if states is not None else None
+        if (text, states) == (self._text, self._states):
+            return False
+        self._text = text
+        self._states = states
+        self._view = [e for e in reversed(self._live) if e.matches(self._text, self._states)]
+        self._view += [e for e in self._history if e.matches(self._text, self._states)]
+        return True
@@ -0,0 +1,208 @@
+"""
+Crash-safe job journal
+
+Every job state change is appended to a JSON-lines write-ahead log and
+fsynced before the work it describes starts, so after a crash the journal
+says exactly which jobs were queued or mid-download, which formats they had
+resolved to, and which already finished:
+
+    {"op": "queued", "key": "...", "url": "...", "options": {...}, "ts": ...}
+    {"op": "running", "key": "...", "ts": ...}
+    {"op": "resolved", "key": "...", "format_id": "137+140", "filename": "...", "ts": ...}
+    {"op": "completed", "key": "...", "filepath": "...", "ts": ...}
+    {"op": "failed", "key": "...", "error": "...", "ts": ...}
+
+Opening the journal replays it, then compacts it to one line per job. A lock
+file keeps two processes from resuming the same jobs.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from paths import data_dir
+
+MAX_HISTORY = 10000
+UNFINISHED = ("queued", "running")
+
+
+class JournalBusy(Exception):
+    """Another process holds the journal"""
+
+
+class JobJournal:
+    """Append-only job log; one instance per process, safe to share between threads"""
+
+    def __init__(self, path: Optional[Path] = None, max_history: int = MAX_HISTORY):
+        self.path = Path(path) if path else data_dir() / "jobs.jsonl"
+        self.max_history = max_history
+        self._lock = threading.Lock()
+        self._lock_file = open(str(self.path) + ".lock", "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._lock_file.close()
+                raise JournalBusy(f"{self.path} is in use by another process")
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._completed: Dict[str, str] = {}
+        # Keys in the order jobs were first queued, for paging through the history
+        self._order: List[str] = []
+        self._replay()
+        self._compact()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    # Replay
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Jobs that were queued or running when the last process stopped"""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values() if job["state"] in UNFINISHED]
+
+    def history(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def finished(self, before: Optional[int] = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Up to ``limit`` completed or failed jobs, most recently queued first,
+        and where the next page starts. ``before`` is where this page starts,
+        as returned for the previous page; the newest job when None.
+        """
+        page = []
+        with self._lock:
+            position = len(self._order) if before is None else before
+            while position > 0 and len(page) < limit:
+                position -= 1
+                job = self._jobs[self._order[position]]
+                if job["state"] not in UNFINISHED:
+                    page.append(dict(job))
+        return page, position
+
+    def completed_path(self, signature: str) -> Optional[str]:
+        """Output of an earlier completed job with the same URL and options, if still on disk"""
+        with self._lock:
+            filepath = self._completed.get(signature)
+        if filepath and os.path.exists(filepath):
+            return filepath
+        return None
+
+    # Transitions
+
+    def queued(self, key: str, url: str, signature: str, options: Dict[str, Any]):
+        self._append({"op": "queued", "key": key, "url": url, "signature": signature, "options": options})
+
+    def running(self, key: str):
+        self._append({"op": "running", "key": key})
+
+    def resolved(self, key: str, format_id: Optional[str], filename: Optional[str]):
+        self._append({"op": "resolved", "key": key, "format_id": format_id, "filename": filename})
+
+    def completed(self, key: str, filepath: Optional[str]):
+        self._append({"op": "completed", "key": key, "filepath": filepath})
+
+    def failed(self, key: str, error: str):
+        self._append({"op": "failed", "key": key, "error": error})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._lock_file.close()
+
+    # Internals
+
+    def _append(self, record: Dict[str, Any]):
+        record["ts"] = time.time()
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._apply(record)
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _apply(self, record: Dict[str, Any]):
+        # Caller holds the lock (or is replaying)
+        op, key = record.get("op"), record.get("key")
+        if op == "queued":
+            if key not in self._jobs:
+                self._order.append(key)
+            self._jobs[key] = {
+                "key": key,
+                "url": record["url"],
+                "signature": record.get("signature"),
+                "options": record.get("options") or {},
+                "state": "queued",
+                "ts": record.get("ts"),
+            }
+            return
+        job = self._jobs.get(key)
+        if job is None:
+            return
+        job["ts"] = record.get("ts")
+        if op == "running":
+            job["state"] = "running"
+        elif op == "resolved":
+            job["format_id"] = record.get("format_id")
+            job["filename"] = record.get("filename")
+        elif op == "completed":
+            job["state"] = "completed"
+            job["filepath"] = record.get("filepath")
+            if job.get("signature") and job["filepath"]:
+                self._completed[job["signature"]] = job["filepath"]
+        elif op == "failed":
+            job["state"] = "failed"
+            job["error"] = record.get("error")
+
+    def _replay(self):
+        try:
+            handle = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn final write from a crash
+                self._apply(record)
+
+    def _compact(self):
+        """Rewrite the log as one 'queued' line plus the latest state per job"""
+        finished = [key for key, job in self._jobs.items() if job["state"] not in UNFINISHED]
+        for key in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[key]
+        self._order = list(self._jobs)
+        # Only what survives compaction, as after a restart
+        self._completed = {job["signature"]: job["filepath"] for job in self._jobs.values()
+                           if job["state"] == "completed" and job.get("signature") and job.get("filepath")}
+
+        tmp = str(self.path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for job in self._jobs.values():
+                for record in _records_for(job):
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+def _records_for(job: Dict[str, Any]) -> List[Dict[str, Any]]:
+    key, ts = job["key"], job.get("ts")
+    records = [{"op": "queued", "key": key, "url": job["url"], "signature": job.get("signature"),
+                "options": job["options"], "ts": ts}]
+    if job.get("format_id") or job.get("filename"):
+        records.append({"op": "resolved", "key": key, "format_id": job.get("format_id"),
+                        "filename": job.get("filename"), "ts": ts})
+    if job["state"] == "completed":
+        records.append({"op": "completed", "key": key, "filepath": job.get("filepath"), "ts": ts})
+    elif job["state"] == "failed":
+        records.append({"op": "failed", "key": key, "error": job.get("error"), "ts": ts})
+    return records
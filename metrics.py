@@ -0,0 +1,337 @@
+"""
+Instrumentation: Prometheus-style metrics, a JSON-lines trace and profiling
+
+The engine splits every job into phases and times each of them:
+
+* ``setup`` - building the job's YoutubeDL instance and its post-processors;
+* ``extract`` - resolving the URL with the site's extractor (skipped on a
+  metadata cache hit);
+* ``select`` - format selection and everything else yt-dlp does before the
+  first byte is requested;
+* ``download`` - network transfer;
+* ``postprocess`` - merging, remuxing or transcoding (the trace records which);
+* ``backoff`` - waiting before another attempt after a retryable failure.
+
+``Metrics`` keeps counters, gauges and phase histograms in memory and
+renders them in the Prometheus text format; queue depth and worker
+utilization are read from whoever owns the queue, and the connection and
+DNS reuse counters from ``netpool``, through ``add_collector`` at scrape
+time. ``Instruments`` bundles the metrics with an optional trace
+file, one JSON line per finished phase and per finished job, and an optional
+directory for cProfile dumps of each job's extraction. (py-spy needs no
+hooks: ``py-spy record --pid <pid>`` attaches to a running process.)
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Callable, Iterable, Iterator, Tuple
+
+BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+PREFIX = "simpledownloader_"
+
+# name: (type, help)
+METRICS = {
+    "jobs_total": ("counter", "Finished jobs by result status"),
+    "job_errors_total": ("counter", "Failed jobs by exception type"),
+    "retries_total": ("counter", "Attempts repeated after an error"),
+    "bytes_downloaded_total": ("counter", "Bytes received by all downloads"),
+    "phase_seconds": ("histogram", "Time spent per job phase"),
+    "queue_jobs": ("gauge", "Jobs in the download queue by state"),
+    "workers": ("gauge", "Maximum parallel downloads"),
+    "worker_utilization": ("gauge", "Fraction of download workers busy"),
+    "bandwidth_limit_bytes": ("gauge", "Total bandwidth limit in bytes per second, 0 when unlimited"),
+    "http_connections_total": ("counter", "HTTP connections opened by the shared pool, by scheme"),
+    "http_requests_total": ("counter", "HTTP requests sent by the shared pool, by new or reused connection"),
+    "tls_handshakes_total": ("counter", "TLS handshakes, by full or resumed session"),
+    "dns_lookups_total": ("counter", "Host name lookups, by DNS cache hit or miss"),
+    "http_idle_connections": ("gauge", "Keep-alive connections waiting in the shared pool"),
+    "prefetch_total": ("counter", "Jobs resolved ahead of their download slot, by reason or failure"),
+    "prefetch_claims_total": ("counter", "Jobs started by a worker, by whether their info was prefetched"),
+    "prefetch_lookahead": ("gauge", "Waiting jobs the prefetcher keeps resolved"),
+    "prefetch_extract_seconds": ("gauge", "Moving average of one prefetch extraction"),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metrics:
+    """In-memory metric registry; safe to share between threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            # Cumulative bucket counts, then +Inf, sum
+            state = self._histograms.setdefault(key, [0.0] * (len(BUCKETS) + 2))
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """
+        Register ``collector() -> [(name, labels, value), ...]``, called at
+        every render for gauges and for counters kept outside this object
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get((name, _labels(labels)), 0)
+
+    def render(self) -> str:
+        """The Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(state) for key, state in self._histograms.items()}
+            collectors = list(self._collectors)
+        collected: Dict[Tuple[str, Labels], float] = {}
+        for collector in collectors:
+            for name, labels, value in collector():
+                collected[(name, _labels(labels))] = value
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            full = PREFIX + name
+            samples = []
+            if kind == "histogram":
+                for (metric, labels), state in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in zip(BUCKETS, state):
+                        bucket = labels + (("le", _format_value(bound)),)
+                        samples.append(f"{full}_bucket{_format_labels(bucket)} {_format_value(count)}")
+                    samples.append(f"{full}_bucket{_format_labels(labels + (('le', '+Inf'),))} "
+                                   f"{_format_value(state[-2])}")
+                    samples.append(f"{full}_count{_format_labels(labels)} {_format_value(state[-2])}")
+                    samples.append(f"{full}_sum{_format_labels(labels)} {_format_value(state[-1])}")
+            else:
+                values = {**counters, **collected} if kind == "counter" else collected
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        samples.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+            if samples:
+                lines.append(f"# HELP {full} {help_text}")
+                lines.append(f"# TYPE {full} {kind}")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def queue_collector(queue, scheduler=None) -> Callable[[], List[Sample]]:
+    """Gauges for a DownloadQueue (and optionally its BandwidthScheduler)"""
+
+    def collect() -> List[Sample]:
+        stats = queue.stats()
+        samples = [("queue_jobs", {"state": state}, count) for state, count in stats.items()]
+        samples.append(("workers", {}, queue.max_workers))
+        samples.append(("worker_utilization", {}, min(1.0, stats["running"] / queue.max_workers)))
+        if scheduler is not None:
+            samples.append(("bandwidth_limit_bytes", {}, scheduler.limit or 0))
+        return samples
+
+    return collect
+
+
+def network_collector() -> List[Sample]:
+    """Counters of the shared connection pool and DNS cache, once something has loaded them"""
+    # Never imported from here: the GUI must not load http.client at startup
+    netpool = sys.modules.get("netpool")
+    return netpool.samples() if netpool is not None else []
+
+
+class JobTimer:
+    """
+    Phase clock for one job. ``begin`` ends the current phase and starts the
+    next, so the phases of a job never overlap; the byte counter is fed by
+    ``hook``, a yt-dlp progress hook.
+    """
+
+    def __init__(self, instruments: "Instruments", key: str, url: str):
+        self.instruments = instruments
+        self.key = key
+        self.url = url
+        self.started = time.time()
+        self.phases: Dict[str, float] = {}
+        self.bytes = 0
+        self.retries = 0
+        self.conversion: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self._phase: Optional[str] = None
+        self._phase_started = 0.0
+        self._lock = threading.Lock()
+        self._seen: Dict[str, int] = {}
+
+    def begin(self, phase: str):
+        with self._lock:
+            if phase == self._phase:
+                return
+            ended = self._end()
+            self._phase, self._phase_started = phase, time.monotonic()
+        if ended:
+            self.instruments.phase_done(self, *ended)
+
+    def retry(self):
+        self.retries += 1
+        self.instruments.metrics.inc("retries_total")
+
+    def hook(self, d: Dict[str, Any]):
+        if d.get("status") not in ("downloading", "finished"):
+            return
+        filename = d.get("filename")
+        downloaded = d.get("downloaded_bytes") or d.get("total_bytes") or 0
+        with self._lock:
+            delta = downloaded - self._seen.get(filename, 0)
+            if delta <= 0:
+                return
+            self._seen[filename] = downloaded
+            self.bytes += delta
+        self.instruments.metrics.inc("bytes_downloaded_total", delta)
+
+    def finish(self, record: Dict[str, Any]):
+        with self._lock:
+            ended = self._end()
+            self._phase = None
+        if ended:
+            self.instruments.phase_done(self, *ended)
+        self.instruments.job_done(self, record)
+
+    def _end(self) -> Optional[Tuple[str, float, float]]:
+        # Caller holds the lock
+        if self._phase is None:
+            return None
+        seconds = time.monotonic() - self._phase_started
+        self.phases[self._phase] = self.phases.get(self._phase, 0.0) + seconds
+        return self._phase, time.time() - seconds, seconds
+
+
+class Instruments:
+    """
+    Metrics plus the optional trace file and profile directory, shared by
+    every job an Engine runs
+    """
+
+    def __init__(self, metrics: Optional[Metrics] = None, trace_path: Optional[str] = None,
+                 profile_dir: Optional[str] = None):
+        self.metrics = metrics or Metrics()
+        self.profile_dir = profile_dir
+        self._trace = open(trace_path, "a", encoding="utf-8") if trace_path else None
+        self._trace_lock = threading.Lock()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def job(self, key: str, url: str) -> JobTimer:
+        return JobTimer(self, key, url)
+
+    @contextmanager
+    def profile(self, timer: JobTimer, phase: str) -> Iterator[None]:
+        """cProfile the block into ``<profile_dir>/<phase>-<job key>.prof`` when profiling is on"""
+        if not self.profile_dir:
+            yield
+            return
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{phase}-{timer.key}.prof"))
+
+    def phase_done(self, timer: JobTimer, phase: str, started: float, seconds: float):
+        self.metrics.observe("phase_seconds", seconds, phase=phase)
+        span = {"type": "span", "ts": round(started, 3), "job": timer.key, "url": timer.url,
+                "phase": phase, "seconds": round(seconds, 4)}
+        if phase == "postprocess" and timer.conversion:
+            span["conversion"] = timer.conversion
+        self._write(span)
+
+    def job_done(self, timer: JobTimer, record: Dict[str, Any]):
+        status = record.get("status", "error")
+        self.metrics.inc("jobs_total", status=status)
+        if status == "error":
+            self.metrics.inc("job_errors_total", type=type(timer.error).__name__ if timer.error else "Exception")
+        self._write({
+            "type": "job",
+            "ts": round(timer.started, 3),
+            "job": timer.key,
+            "url": timer.url,
+            "status": status,
+            "seconds": round(time.time() - timer.started, 4),
+            "phases": {phase: round(seconds, 4) for phase, seconds in timer.phases.items()},
+            "bytes": timer.bytes,
+            "retries": timer.retries,
+            "conversion": timer.conversion,
+            "error": record.get("error"),
+        })
+
+    def close(self):
+        with self._trace_lock:
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+
+    def _write(self, event: Dict[str, Any]):
+        if self._trace is None:
+            return
+        line = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+        with self._trace_lock:
+            if self._trace is not None:
+                self._trace.write(line + "\n")
+                self._trace.flush()
+
+
+def serve_metrics(metrics: Metrics, port: int, host: str = "127.0.0.1"):
+    """Serve ``GET /metrics`` on a background thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            payload = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,294 @@
+"""
+Process-wide HTTP connection pool and DNS cache
+
+Every YoutubeDL instance builds its own opener, the segmented downloader
+opened fresh connections per download, and so did the thumbnail fetcher,
+so each job paid new DNS lookups and TCP and TLS handshakes to the same
+CDN hosts. ``POOL`` keeps idle HTTP/1.1 keep-alive connections per host
+for everyone in the process:
+
+* a connection goes back to the pool when its response body has been read
+  to the end (``PooledResponse``), and is closed instead when the response
+  is abandoned early or the server asked to close it;
+* idle connections older than ``IDLE_TIMEOUT`` or that the server already
+  closed are dropped on the way out, and a request that fails on a reused
+  connection before any response arrived is sent again on a new one;
+* TLS contexts are shared per configuration (``context``) and the last
+  session per host is offered to new connections, so further handshakes
+  with the host are abbreviated resumptions.
+
+``install`` puts ``DNS`` in front of ``socket.getaddrinfo``, which yt-dlp,
+http.client and the pool all resolve through. The stdlib resolver does not
+report record TTLs, so answers are kept for a fixed ``DNS_TTL``; failures
+are never cached.
+
+``samples`` reports the counters for ``metrics.network_collector``. The
+standard library has no HTTP/2 client; connections speak HTTP/1.1.
+
+This module imports http.client and ssl, so the GUI only imports it off
+its startup path.
+"""
+import http.client
+import select
+import socket
+import ssl
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Optional, Dict, Any, List, Tuple
+
+IDLE_TIMEOUT = 30.0
+MAX_IDLE_PER_HOST = 8
+TIMEOUT = 20.0
+DNS_TTL = 60.0
+DNS_MAX_ENTRIES = 1024
+
+Key = Tuple[str, str, Optional[int], int, Optional[Tuple[str, int]]]
+
+
+class DNSCache:
+    """``socket.getaddrinfo`` with answers kept for ``ttl`` seconds; safe to share between threads"""
+
+    def __init__(self, ttl: float = DNS_TTL, max_entries: int = DNS_MAX_ENTRIES, resolve=socket.getaddrinfo):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._resolve = resolve
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Tuple[float, list]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return list(entry[1])
+            self.misses += 1
+        addresses = self._resolve(host, port, family, type, proto, flags)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return list(addresses)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class PooledResponse(http.client.HTTPResponse):
+    """Hands its connection back to the pool once the body is read to the end"""
+
+    _done = None
+
+    def close(self):
+        if self.fp is not None:
+            # Unread body left on the connection, which cannot carry another request
+            self._finish(False)
+        super().close()
+
+    def _close_conn(self):
+        super()._close_conn()
+        self._finish(not self.will_close)
+
+    def _finish(self, reusable: bool):
+        done, self._done = self._done, None
+        if done is not None:
+            done(reusable)
+
+
+class PooledHTTPConnection(http.client.HTTPConnection):
+    response_class = PooledResponse
+    pool: Optional["ConnectionPool"] = None
+    pool_key: Optional[Key] = None
+
+
+class PooledHTTPSConnection(http.client.HTTPSConnection):
+    response_class = PooledResponse
+    pool: Optional["ConnectionPool"] = None
+    pool_key: Optional[Key] = None
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        session = self.pool.session(self.pool_key) if self.pool is not None else None
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname, session=session)
+        if self.pool is not None:
+            self.pool.handshaken(self.sock)
+
+
+def _alive(conn: http.client.HTTPConnection) -> bool:
+    # An idle keep-alive socket turns readable only when the server closed it
+    sock = conn.sock
+    if sock is None:
+        return False
+    try:
+        return not select.select([sock], [], [], 0)[0]
+    except (OSError, ValueError):
+        return False
+
+
+class ConnectionPool:
+    """Idle keep-alive connections per host, shared by every thread of the process"""
+
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST, idle_timeout: float = IDLE_TIMEOUT):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[Key, List[Tuple[http.client.HTTPConnection, float]]] = defaultdict(list)
+        self._sessions: Dict[Key, ssl.SSLSession] = {}
+        self._contexts: Dict[Any, ssl.SSLContext] = {}
+        self.connections: Dict[str, int] = defaultdict(int)
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.handshakes: Dict[str, int] = defaultdict(int)
+
+    def context(self, verify: bool = True) -> ssl.SSLContext:
+        """The shared TLS context for plain certificate checking (or none)"""
+        return self.shared_context(("default", verify), lambda: (
+            ssl.create_default_context() if verify else ssl._create_unverified_context()))
+
+    def shared_context(self, config: Any, create) -> ssl.SSLContext:
+        """One context per hashable ``config``, made by ``create()`` the first time it is asked for"""
+        with self._lock:
+            context = self._contexts.get(config)
+            if context is None:
+                context = self._contexts[config] = create()
+            return context
+
+    def request(self, scheme: str, host: str, port: Optional[int], method: str, path: str, body=None,
+                headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = TIMEOUT,
+                context: Optional[ssl.SSLContext] = None, source_address: Optional[Tuple[str, int]] = None,
+                encode_chunked: bool = False) -> http.client.HTTPResponse:
+        """
+        Send a request over a pooled connection and return the response with
+        its headers read. Its connection returns to the pool when the body has
+        been read to the end; close the response to give up on it early.
+        """
+        if scheme == "https" and context is None:
+            context = self.context()
+        key = (scheme, host.lower(), port, id(context) if scheme == "https" else 0, source_address)
+        resendable = body is None or isinstance(body, (bytes, str))
+        while True:
+            conn, reused = self._acquire(key, timeout, context)
+            try:
+                conn.request(method, path, body, headers or {}, encode_chunked=encode_chunked)
+                response = conn.getresponse()
+            except socket.timeout:
+                conn.close()
+                raise
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                # The server dropped the idle connection; try the next one, or a new one
+                if reused and resendable:
+                    continue
+                raise
+            break
+        with self._lock:
+            self.requests["reused" if reused else "new"] += 1
+        response._done = lambda reusable: self._release(conn, reusable)
+        if response.isclosed():
+            response._finish(not response.will_close)
+        return response
+
+    def session(self, key: Key) -> Optional[ssl.SSLSession]:
+        with self._lock:
+            return self._sessions.get(key)
+
+    def handshaken(self, sock: ssl.SSLSocket):
+        with self._lock:
+            self.handshakes["resumed" if sock.session_reused else "full"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Connections opened by scheme, requests by connection and TLS handshakes by session, so far"""
+        with self._lock:
+            return {
+                "connections": dict(self.connections),
+                "requests": dict(self.requests),
+                "handshakes": dict(self.handshakes),
+                "idle": {"connections": sum(len(conns) for conns in self._idle.values())},
+            }
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            conns = [conn for idle in self._idle.values() for conn, _ in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+    def _acquire(self, key: Key, timeout: Optional[float],
+                 context: Optional[ssl.SSLContext]) -> Tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        stale = []
+        conn = None
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                # Most recently used first: the least likely to have timed out on the server
+                candidate, since = idle.pop()
+                if now - since < self.idle_timeout and _alive(candidate):
+                    conn = candidate
+                    break
+                stale.append(candidate)
+        for candidate in stale:
+            candidate.close()
+        if conn is not None:
+            conn.timeout = timeout
+            conn.sock.settimeout(timeout)
+            return conn, True
+
+        scheme, host, port, _, source_address = key
+        if scheme == "https":
+            conn = PooledHTTPSConnection(host, port, timeout=timeout, source_address=source_address, context=context)
+        else:
+            conn = PooledHTTPConnection(host, port, timeout=timeout, source_address=source_address)
+        conn.pool = self
+        conn.pool_key = key
+        with self._lock:
+            self.connections[scheme] += 1
+        return conn, False
+
+    def _release(self, conn: http.client.HTTPConnection, reusable: bool):
+        sock = conn.sock
+        if not reusable or sock is None:
+            conn.close()
+            return
+        with self._lock:
+            # TLS 1.3 sends session tickets after the handshake, so take the session only now
+            if isinstance(sock, ssl.SSLSocket) and sock.session is not None:
+                self._sessions[conn.pool_key] = sock.session
+            idle = self._idle[conn.pool_key]
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+
+POOL = ConnectionPool()
+DNS = DNSCache()
+_install_lock = threading.Lock()
+_installed = False
+
+
+def install():
+    """Resolve host names through ``DNS`` process-wide; idempotent"""
+    global _installed
+    with _install_lock:
+        if not _installed:
+            socket.getaddrinfo = DNS.getaddrinfo
+            _installed = True
+
+
+def samples() -> List[Tuple[str, Dict[str, str], float]]:
+    """Counters and gauges for metrics.Metrics collectors"""
+    stats = POOL.stats()
+    result = [("http_connections_total", {"scheme": scheme}, count) for scheme, count in stats["connections"].items()]
+    result += [("http_requests_total", {"connection": kind}, count) for kind, count in stats["requests"].items()]
+    result += [("tls_handshakes_total", {"session": kind}, count) for kind, count in stats["handshakes"].items()]
+    result += [("dns_lookups_total", {"result": "hit"}, DNS.hits), ("dns_lookups_total", {"result": "miss"}, DNS.misses)]
+    result.append(("http_idle_connections", {}, stats["idle"]["connections"]))
+    return result
@@ -0,0 +1,25 @@
+"""
+Per-user locations for SimpleDownloader's caches and state files
+
+Follows the XDG base directory spec so installs under /opt stay read-only.
+"""
+import os
+from pathlib import Path
+
+APP_NAME = "simpledownloader"
+
+
+def cache_dir() -> Path:
+    """Directory for data that can be thrown away at any time"""
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    path = Path(base) / APP_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def data_dir() -> Path:
+    """Directory for state that must survive restarts"""
+    base = os.environ.get("XDG_DATA_HOME") or str(Path.home() / ".local" / "share")
+    path = Path(base) / APP_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
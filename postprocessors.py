@@ -0,0 +1,81 @@
+"""
+yt-dlp post-processing used by the download engine
+
+Like ``segmented``, this module imports yt-dlp at the top and is itself only
+imported once a download starts, so the CLI and GUI start without loading
+yt-dlp.
+
+``EngineYoutubeDL`` can defer yt-dlp's whole post-download stage (merging
+separate video and audio, audio extraction, fixups, moving files into place,
+recording the download archive) instead of running it inline, so the engine
+can hand the network slot to the next job and run the stage on its
+post-processing pool.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+from yt_dlp.postprocessor.common import PostProcessor
+
+from journal import JobJournal
+from segmented import SegmentedYoutubeDL
+
+
+class JournalResolved(PostProcessor):
+    """Logs the selected formats and target filename before the download starts"""
+
+    def __init__(self, journal: JobJournal, key: str):
+        super().__init__(None)
+        self._journal = journal
+        self._key = key
+
+    def run(self, info):
+        self._journal.resolved(self._key, info.get("format_id"), info.get("_filename"))
+        return [], info
+
+
+class FormatsSelected(PostProcessor):
+    """Calls ``callback(info)`` once formats are selected, before the download starts"""
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], None]):
+        super().__init__(None)
+        self._callback = callback
+
+    def run(self, info):
+        self._callback(info)
+        return [], info
+
+
+class EngineYoutubeDL(SegmentedYoutubeDL):
+    """
+    YoutubeDL whose post-download stage is collected rather than run when the
+    ``defer_post_process`` param is set; ``deferred_tasks`` then returns one
+    callable per downloaded file that finishes the work yt-dlp skipped.
+    """
+
+    def __init__(self, params: Optional[Dict[str, Any]] = None, auto_init: bool = True):
+        self._deferred: List[Callable[[], None]] = []
+        super().__init__(params, auto_init)
+
+    def post_process(self, filename, info, files_to_move=None):
+        if not self.params.get("defer_post_process"):
+            return super().post_process(filename, info, files_to_move)
+
+        # yt-dlp strips the keys shared with the parent video from ``info``
+        # once this returns, so the stage runs on a full copy
+        snapshot = dict(info)
+
+        def task():
+            new_info = super(EngineYoutubeDL, self).post_process(filename, snapshot, files_to_move)
+            info.update(new_info)
+            super(EngineYoutubeDL, self).record_download_archive(new_info)
+
+        self._deferred.append(task)
+        return info
+
+    def record_download_archive(self, info_dict):
+        # Recorded by the deferred task, only once post-processing succeeded
+        if not self.params.get("defer_post_process"):
+            super().record_download_archive(info_dict)
+
+    def deferred_tasks(self) -> List[Callable[[], None]]:
+        tasks, self._deferred = self._deferred, []
+        return tasks
@@ -0,0 +1,182 @@
+"""
+Resolution of queued jobs shortly before a download slot takes them
+
+A worker that resolves its own URL spends seconds of extractor time with
+its slot idle, and resolving the whole backlog up front is no answer:
+signed media URLs expire (YouTube's after about six hours), so the end of
+a long queue would be resolved twice. ``Prefetcher`` watches a
+DownloadQueue and resolves only the jobs a slot will take soon, into the
+engine's info cache, where their workers find them:
+
+* the lookahead is how many jobs the workers start during one extraction,
+  ``workers * extract time / slot time``, plus one spare, from moving
+  averages of the prefetcher's own extractions and the queue's slot times
+  (``DownloadQueue.slot_seconds``); a slow site or fast downloads look
+  further ahead;
+* a resolved job stays ready while its media URLs (``media_expiry``)
+  outlive its expected start by ``EXPIRY_MARGIN``; otherwise it is
+  resolved again, and sites whose URLs do not even live that long are
+  left to the workers;
+* a worker ``claim``s its job as it starts, waiting for a resolution of it
+  already under way instead of starting a second one.
+
+Playlist jobs are left alone (their entries are resolved as they
+download), and so is everything when the engine has no cache.
+"""
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Optional, Dict, List, Set
+
+from Downloader import DownloadJob, DownloadQueue, Engine, ResolverPool, extract_info
+from infocache import EXPIRY_MARGIN, media_expiry
+from metrics import Sample
+
+PREFETCH_WORKERS = 2
+MAX_LOOKAHEAD = 16
+POLL_SECONDS = 1.0
+# Until something has been measured
+DEFAULT_EXTRACT_SECONDS = 5.0
+DEFAULT_SLOT_SECONDS = 60.0
+# Weight of the latest extraction in Prefetcher.extract_seconds
+EXTRACT_SMOOTHING = 0.2
+# Longest a worker waits for a resolution of its job that is under way
+CLAIM_TIMEOUT = 60.0
+
+
+class Prefetcher:
+    """Resolves the jobs ``queue`` will start next; safe to share between threads"""
+
+    def __init__(self, engine: Engine, queue: DownloadQueue, workers: int = PREFETCH_WORKERS):
+        self.engine = engine
+        self.queue = queue
+        self.extract_seconds = DEFAULT_EXTRACT_SECONDS
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._ydls = ResolverPool()
+        self._lock = threading.Lock()
+        # Job key -> when its cached media URLs expire (inf when they do not
+        # say); None when it cannot be prefetched
+        self._ready: Dict[str, Optional[float]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._claimed: Set[str] = set()
+        self._short_lived: Set[str] = set()
+        self._previous: Set[str] = set()
+        self._stopped = threading.Event()
+        if engine.cache is not None:
+            engine.instruments.metrics.add_collector(self._collect)
+            threading.Thread(target=self._loop, name="prefetch", daemon=True).start()
+
+    def lookahead(self) -> int:
+        """How many of the waiting jobs to keep resolved"""
+        slot = max(1.0, self.queue.slot_seconds or DEFAULT_SLOT_SECONDS)
+        jobs = math.ceil(self.queue.max_workers * self.extract_seconds / slot) + 1
+        return max(1, min(MAX_LOOKAHEAD, jobs))
+
+    def claim(self, job: DownloadJob) -> bool:
+        """
+        Called by a worker as it starts ``job``: waits for a resolution of it
+        that is under way, which finishes sooner than a new one would. True
+        when the job's info was prefetched.
+        """
+        if self.engine.cache is None:
+            return False
+        with self._lock:
+            self._claimed.add(job.key)
+            future = self._inflight.get(job.key)
+        if future is not None:
+            wait([future], CLAIM_TIMEOUT)
+        with self._lock:
+            expiry = self._ready.pop(job.key, None)
+        result = "waited" if future is not None else "ready" if expiry is not None else "missed"
+        self.engine.instruments.metrics.inc("prefetch_claims_total", result=result)
+        return expiry is not None
+
+    def close(self):
+        self._stopped.set()
+        self._pool.shutdown(wait=False)
+
+    # Internals
+
+    def _loop(self):
+        while not self._stopped.wait(POLL_SECONDS):
+            try:
+                self._pass()
+            except Exception:
+                pass  # Workers resolve whatever was missed and report the errors
+
+    def _pass(self):
+        with self._lock:
+            # Workers take jobs before claiming them, so no job still waiting has been claimed
+            self._claimed.clear()
+        jobs = self.queue.upcoming(self.lookahead())
+        keys = {job.key for job in jobs}
+        slot = self.queue.slot_seconds or DEFAULT_SLOT_SECONDS
+        now = time.time()
+        with self._lock:
+            # Jobs a worker took since the last pass are still to claim theirs
+            self._ready = {k: v for k, v in self._ready.items() if k in keys or k in self._previous}
+            self._previous = keys
+        for position, job in enumerate(jobs):
+            if job.cancelled or job.options.allow_playlist or job.domain in self._short_lived:
+                continue
+            # All slots are busy while jobs wait; one frees up every slot / workers seconds
+            needed_until = now + (position + 1) * slot / self.queue.max_workers + EXPIRY_MARGIN
+            with self._lock:
+                if job.key in self._inflight or job.key in self._claimed:
+                    continue
+                known = job.key in self._ready
+                expiry = self._ready.get(job.key)
+            if not known:
+                expiry = self._cached_expiry(job)
+                if expiry is not None:
+                    with self._lock:
+                        self._ready[job.key] = expiry
+            if expiry is not None and expiry >= needed_until:
+                continue
+            if known and expiry is None:
+                continue  # Failed before; its worker will report why
+            with self._lock:
+                if job.key in self._inflight or job.key in self._claimed:
+                    continue
+                self._inflight[job.key] = self._pool.submit(
+                    self._resolve, job, "expiring" if expiry is not None else "ahead")
+
+    def _cached_expiry(self, job: DownloadJob) -> Optional[float]:
+        # Jobs resolved earlier (by an Ingestor, say) are ready as long as their URLs last
+        info = self.engine.cache.get(job.url)
+        if info is None:
+            return None
+        expiry = media_expiry(info)
+        return math.inf if expiry is None else expiry
+
+    def _resolve(self, job: DownloadJob, reason: str):
+        metrics = self.engine.instruments.metrics
+        expiry = None
+        try:
+            started = time.monotonic()
+            # Not through the cache: an entry there is missing or about to expire
+            info = extract_info(self._ydls.get(job.options), job.url)
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.extract_seconds += EXTRACT_SMOOTHING * (elapsed - self.extract_seconds)
+            if info.get("_type", "video") == "video":
+                self.engine.cache.put(job.url, info)
+                expiry = media_expiry(info)
+                if expiry is not None and expiry < time.time() + EXPIRY_MARGIN:
+                    # The engine would resolve these again anyway
+                    self._short_lived.add(job.domain)
+                    expiry = None
+                else:
+                    expiry = math.inf if expiry is None else expiry
+            metrics.inc("prefetch_total", result=reason if expiry is not None else "unusable")
+        except Exception:
+            metrics.inc("prefetch_total", result="failed")
+        finally:
+            with self._lock:
+                self._ready[job.key] = expiry
+                self._inflight.pop(job.key, None)
+
+    def _collect(self) -> List[Sample]:
+        return [("prefetch_lookahead", {}, self.lookahead()),
+                ("prefetch_extract_seconds", {}, self.extract_seconds)]
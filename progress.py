@@ -0,0 +1,119 @@
+"""
+Coalesced progress reporting for the GUI
+
+yt-dlp calls progress hooks for every block it writes, hundreds of times a
+second per download. Forwarding each call to Tk with ``after(0, ...)``
+floods the event queue. Instead, workers only overwrite the latest sample
+for their job here, and the Tk thread drains all of them at a fixed frame
+rate, so the number of UI updates depends on the frame rate and the
+number of visible jobs rather than on download speed.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+FRAME_RATE = 10
+SPEED_SMOOTHING = 0.3
+
+
+@dataclass
+class ProgressSnapshot:
+    """What a job row needs to draw one frame"""
+
+    job_id: int
+    status: str
+    fraction: float
+    downloaded: int
+    total: Optional[int]
+    speed: Optional[float]
+    eta: Optional[float]
+    title: Optional[str] = None
+    thumbnail: Optional[str] = None
+    # Set while the engine waits to retry ("retrying" status)
+    attempt: Optional[int] = None
+    retry_in: Optional[float] = None
+    reason: Optional[str] = None
+
+
+class ProgressAggregator:
+    """
+    Latest-sample-wins mailbox between download workers and one consumer.
+
+    ``update`` may be called from any thread and only does a few dict
+    lookups under a short lock. ``drain`` is called by the consumer and
+    returns one snapshot per job that reported since the previous drain,
+    with the speed smoothed across frames.
+    """
+
+    def __init__(self, smoothing: float = SPEED_SMOOTHING):
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._latest: Dict[int, Dict[str, Any]] = {}
+        self._speed: Dict[int, float] = {}
+        self.events = 0
+
+    def update(self, job_id: int, d: Dict[str, Any]):
+        info = d.get("info_dict") or {}
+        sample = {
+            "status": d.get("status"),
+            "downloaded": d.get("downloaded_bytes") or 0,
+            "total": d.get("total_bytes") or d.get("total_bytes_estimate"),
+            "speed": d.get("speed"),
+            "eta": d.get("eta"),
+            "title": info.get("title"),
+            "thumbnail": info.get("thumbnail"),
+            "attempt": d.get("attempt"),
+            "retry_in": d.get("retry_in"),
+            "reason": d.get("reason"),
+        }
+        with self._lock:
+            self._latest[job_id] = sample
+            self.events += 1
+
+    def forget(self, job_id: int):
+        with self._lock:
+            self._latest.pop(job_id, None)
+            self._speed.pop(job_id, None)
+
+    def drain(self) -> Dict[int, ProgressSnapshot]:
+        with self._lock:
+            latest, self._latest = self._latest, {}
+
+        snapshots = {}
+        for job_id, sample in latest.items():
+            total = sample["total"]
+            downloaded = sample["downloaded"]
+            if sample["status"] == "finished":
+                fraction = 1.0
+            elif total:
+                fraction = min(1.0, downloaded / total)
+            else:
+                fraction = 0.0
+
+            speed = sample["speed"]
+            if speed is not None:
+                previous = self._speed.get(job_id)
+                if previous is not None:
+                    speed = self.smoothing * speed + (1 - self.smoothing) * previous
+                self._speed[job_id] = speed
+
+            eta = sample["eta"]
+            if speed and total and total > downloaded:
+                eta = (total - downloaded) / speed
+
+            snapshots[job_id] = ProgressSnapshot(
+                job_id=job_id,
+                status=sample["status"],
+                fraction=fraction,
+                downloaded=downloaded,
+                total=total,
+                speed=speed,
+                eta=eta,
+                title=sample["title"],
+                thumbnail=sample["thumbnail"],
+                attempt=sample["attempt"],
+                retry_in=sample["retry_in"],
+                reason=sample["reason"],
+            )
+        return snapshots
+
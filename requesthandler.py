@@ -0,0 +1,93 @@
+"""
+yt-dlp request handler over the process-wide connection pool
+
+yt-dlp sends every HTTP request (extractor pages and APIs, manifests,
+fragments, progressive downloads) through the request handlers registered
+when a YoutubeDL makes its first request. Importing this module registers
+``PooledRH`` ahead of yt-dlp's own handlers, so every YoutubeDL in the
+process, whichever thread or job built it, shares ``netpool.POOL``'s
+keep-alive connections and TLS sessions.
+
+``PooledRH`` is yt-dlp's urllib handler with only the connection step
+replaced: cookies, redirects, content decoding and error mapping stay
+yt-dlp's own. Requests it does not cover (proxies, impersonation, other
+URL schemes) fall through to yt-dlp's handlers as before.
+
+Like ``postprocessors``, this module imports yt-dlp and is only imported
+once the engine loads.
+"""
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+
+from yt_dlp.networking._urllib import UrllibRH
+from yt_dlp.networking.common import register_preference, register_rh
+from yt_dlp.networking.exceptions import UnsupportedRequest
+
+import netpool
+
+
+class PooledOpenHandler(urllib.request.BaseHandler):
+    """Opens http(s) requests on pooled connections; yt-dlp's HTTPHandler still prepares and decodes them"""
+
+    # Ahead of yt-dlp's HTTPHandler, whose http_open/https_open then go unused
+    handler_order = urllib.request.BaseHandler.handler_order - 1
+
+    def __init__(self, context=None, source_address=None):
+        self._context = context
+        self._source_address = (source_address, 0) if source_address else None
+
+    def http_open(self, req):
+        return self._open("http", req)
+
+    def https_open(self, req):
+        return self._open("https", req)
+
+    def _open(self, scheme, req):
+        parts = urlsplit(req.full_url)
+        headers = dict(req.unredirected_hdrs)
+        headers.update((k, v) for k, v in req.headers.items() if k not in headers)
+        headers = {name.title(): value for name, value in headers.items()}
+        try:
+            response = netpool.POOL.request(
+                scheme, parts.hostname, parts.port, req.get_method(), req.selector, req.data, headers,
+                timeout=req.timeout, context=self._context if scheme == "https" else None,
+                source_address=self._source_address, encode_chunked=req.has_header("Transfer-encoding"))
+        except OSError as e:
+            raise urllib.error.URLError(e)
+        # What urllib's own do_open sets for the rest of the opener chain
+        response.url = req.get_full_url()
+        response.msg = response.reason
+        return response
+
+
+@register_rh
+class PooledRH(UrllibRH):
+    _SUPPORTED_URL_SCHEMES = ("http", "https")
+    RH_NAME = "pooled"
+
+    def __init__(self, *, enable_file_urls: bool = False, **kwargs):
+        # file:// URLs stay with the urllib handler
+        super().__init__(**kwargs)
+
+    def _check_proxies(self, proxies):
+        # Pooled connections go straight to the host; proxied requests stay with the urllib handler
+        if any(proxies.get(key) for key in ("http", "https", "all")):
+            raise UnsupportedRequest("proxies are not supported")
+
+    def _make_sslcontext(self, legacy_ssl_support=None):
+        # One context per configuration, so connections and TLS sessions carry over between YoutubeDLs
+        legacy = legacy_ssl_support if legacy_ssl_support is not None else self.legacy_ssl_support
+        config = ("yt-dlp", self.verify, bool(legacy), self.prefer_system_certs, tuple(sorted(self._client_cert.items())))
+        return netpool.POOL.shared_context(config, lambda: super(PooledRH, self)._make_sslcontext(legacy_ssl_support))
+
+    def _create_instance(self, proxies, cookiejar, legacy_ssl_support=None):
+        opener = super()._create_instance(proxies, cookiejar, legacy_ssl_support)
+        opener.add_handler(PooledOpenHandler(self._make_sslcontext(legacy_ssl_support), self.source_address))
+        return opener
+
+
+@register_preference(PooledRH)
+def pooled_preference(rh, request):
+    # Above yt-dlp's requests handler (100), whose pool is private to one YoutubeDL
+    return 200
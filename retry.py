@@ -0,0 +1,175 @@
+"""
+Retries with per-domain backoff, and throttling detection
+
+yt-dlp already retries single HTTP requests and fragments a few times, but
+gives up on what it considers final: a 403 from a CDN node, an extractor
+page that timed out, a download crawling along at a few KB/s. The engine
+runs such jobs again instead of failing them:
+
+* ``classify`` sorts an exception into ``FATAL`` (the video is private, the
+  options are wrong, ffmpeg failed), ``RETRY`` (connection problems, 429 and
+  5xx responses: try again with the same media URLs) or ``REFRESH`` (403/410
+  or throttling: the signed URLs expired or the node is bad, so extract
+  fresh ones);
+* ``RetryPolicy`` spaces the attempts with jittered exponential backoff. The
+  failure streak belongs to the domain, not the job, so every job against a
+  struggling site backs off together and a success resets it;
+* ``ThrottleDetector`` is a progress hook that raises ``Throttled`` once a
+  download stays below a minimum speed for a while, unless the bandwidth
+  scheduler itself is holding it that low.
+
+Partial data survives every retry: yt-dlp continues ``.part`` files and
+fragment downloads, and ``SegmentedFD`` its finished ranges.
+"""
+import random
+import re
+import threading
+import time
+from typing import Optional, Dict, Any, Callable
+
+FATAL = "fatal"
+RETRY = "retry"
+REFRESH = "refresh"
+
+DEFAULT_ATTEMPTS = 4
+BASE_DELAY = 2.0
+MAX_DELAY = 60.0
+# A download below THROTTLE_SPEED for THROTTLE_WINDOW seconds counts as throttled
+THROTTLE_SPEED = 32 * 1024
+THROTTLE_WINDOW = 15.0
+# Polling interval while waiting out a backoff, so cancelling stays responsive
+WAIT_STEP = 0.25
+
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504, 509, 520, 521, 522, 523, 524}
+REFRESH_STATUS = {403, 410}
+
+_HTTP_STATUS = re.compile(r"HTTP Error (\d{3})")
+_TRANSIENT = re.compile(
+    r"timed out|connection (?:reset|refused|aborted)|remote end closed|incompleteread|"
+    r"temporary failure in name resolution|network is unreachable|eof occurred",
+    re.IGNORECASE,
+)
+
+
+class Throttled(Exception):
+    """Raised from a progress hook when a download stays too slow; the job re-extracts and continues"""
+
+
+def classify(error: BaseException) -> str:
+    """FATAL, RETRY or REFRESH for an exception raised by a job (yt-dlp wrappers are looked through)"""
+    import socket
+    from http.client import IncompleteRead
+    from yt_dlp.utils import ExtractorError
+    from yt_dlp.networking.exceptions import HTTPError, TransportError
+
+    # DownloadError and ExtractorError keep the exception that caused them
+    seen = set()
+    while id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, Throttled):
+            return REFRESH
+        if isinstance(error, HTTPError):
+            return _classify_status(error.status)
+        if isinstance(error, (TransportError, IncompleteRead, socket.timeout, ConnectionError, TimeoutError)):
+            return RETRY
+        if isinstance(error, ExtractorError) and error.expected and not error.cause:
+            return FATAL
+        cause = getattr(error, "exc_info", None) and error.exc_info[1] or getattr(error, "cause", None)
+        if not isinstance(cause, BaseException):
+            break
+        error = cause
+
+    # Errors yt-dlp only reports as text
+    message = str(error)
+    match = _HTTP_STATUS.search(message)
+    if match:
+        return _classify_status(int(match.group(1)))
+    return RETRY if _TRANSIENT.search(message) else FATAL
+
+
+def _classify_status(status: int) -> str:
+    if status in REFRESH_STATUS:
+        return REFRESH
+    if status in RETRY_STATUS or status >= 500:
+        return RETRY
+    return FATAL
+
+
+class RetryPolicy:
+    """
+    Attempt limit, per-domain jittered exponential backoff and the speed
+    below which a download counts as throttled (None to never treat slow
+    downloads as failed); safe to share between threads
+    """
+
+    def __init__(self, attempts: int = DEFAULT_ATTEMPTS, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY, throttle_speed: Optional[float] = THROTTLE_SPEED):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttle_speed = throttle_speed
+        self._lock = threading.Lock()
+        self._streaks: Dict[str, int] = {}
+        self._not_before: Dict[str, float] = {}
+
+    def failed(self, domain: str) -> float:
+        """Record a failure against ``domain``; returns the delay before its next attempt"""
+        with self._lock:
+            streak = self._streaks.get(domain, 0) + 1
+            self._streaks[domain] = streak
+            ceiling = min(self.max_delay, self.base_delay * 2 ** (streak - 1))
+            # Half fixed, half random, so retries of simultaneous failures spread out
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+            self._not_before[domain] = max(self._not_before.get(domain, 0.0), time.monotonic() + delay)
+        return delay
+
+    def succeeded(self, domain: str):
+        with self._lock:
+            self._streaks.pop(domain, None)
+            self._not_before.pop(domain, None)
+
+    def delay(self, domain: str) -> float:
+        """Seconds until ``domain`` may be tried again"""
+        with self._lock:
+            return max(0.0, self._not_before.get(domain, 0.0) - time.monotonic())
+
+    def wait(self, domain: str, cancelled: Callable[[], bool] = lambda: False) -> bool:
+        """Sleep out the domain's backoff; False when ``cancelled()`` turned true meanwhile"""
+        while True:
+            if cancelled():
+                return False
+            remaining = self.delay(domain)
+            if remaining <= 0:
+                return True
+            time.sleep(min(WAIT_STEP, remaining))
+
+
+class ThrottleDetector:
+    """
+    Progress hook for one download attempt. ``allowed()`` returns the rate
+    the bandwidth scheduler currently gives the job (None when unlimited);
+    a job held near or below the threshold by its own limit is never
+    reported.
+    """
+
+    def __init__(self, min_speed: Optional[float] = THROTTLE_SPEED, window: float = THROTTLE_WINDOW,
+                 allowed: Callable[[], Optional[float]] = lambda: None):
+        self.min_speed = min_speed
+        self.window = window
+        self.allowed = allowed
+        self._slow_since: Optional[float] = None
+
+    def hook(self, d: Dict[str, Any]):
+        if not self.min_speed or d.get("status") != "downloading":
+            return
+        speed = d.get("speed")
+        allowed = self.allowed()
+        if speed is None or speed >= self.min_speed or (allowed is not None and allowed < 2 * self.min_speed):
+            self._slow_since = None
+            return
+        now = time.monotonic()
+        if self._slow_since is None:
+            self._slow_since = now
+        elif now - self._slow_since >= self.window:
+            self._slow_since = None
+            raise Throttled(f"throttled to {speed / 1024:.0f} KiB/s")
@@ -0,0 +1,355 @@
+"""
+Multi-connection segmented downloads for direct HTTP formats
+
+A single TCP stream is often throttled far below line rate. For plain
+http/https formats ``SegmentedFD`` splits the file into byte ranges and
+fetches them over several keep-alive connections at once, taken from and
+returned to ``netpool.POOL`` so the next download from the same host skips
+the handshakes, writing each block straight to its offset in a preallocated ``.part`` file with
+``os.pwrite``. Completed ranges are recorded next to the ``.part`` file so an
+interrupted download resumes where it left off.
+
+Servers without Range support, proxied downloads and small files fall back
+to yt-dlp's regular ``HttpFD``.
+
+When the ``throttle`` param holds a ``bandwidth.JobThrottle``, every range
+worker charges the blocks it reads to it.
+"""
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+from typing import Optional, Dict, Set, Tuple
+from urllib.parse import urlsplit, urljoin, SplitResult
+
+import yt_dlp as ytdlp
+from yt_dlp.downloader.common import FileDownloader
+from yt_dlp.downloader.http import HttpFD
+
+import netpool
+
+MIN_SEGMENTED_SIZE = 2 * 1024 * 1024
+MIN_CHUNK = 1024 * 1024
+MAX_CHUNK = 16 * 1024 * 1024
+BLOCK_SIZE = 64 * 1024
+PROGRESS_INTERVAL = 0.1
+MAX_REDIRECTS = 5
+
+
+class SegmentError(Exception):
+    """A byte range could not be fetched"""
+
+
+def _request(parts: SplitResult, headers: Dict[str, str], timeout: float, verify: bool) -> http.client.HTTPResponse:
+    path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+    return netpool.POOL.request(parts.scheme, parts.hostname, parts.port, "GET", path, headers=headers,
+                                timeout=timeout, context=netpool.POOL.context(verify))
+
+
+def probe(url: str, headers: Dict[str, str], timeout: float = 20.0, verify: bool = True) -> Tuple[Optional[int], str]:
+    """
+    Ask for the first byte of ``url``, following redirects.
+
+    Returns ``(total_size, final_url)``; total_size is None unless the server
+    answered with a usable Content-Range.
+    """
+    for _ in range(MAX_REDIRECTS):
+        response = _request(urlsplit(url), {**headers, "Range": "bytes=0-0"}, timeout, verify)
+        try:
+            location = response.getheader("Location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                response.read()
+                url = urljoin(url, location)
+                continue
+            content_range = response.getheader("Content-Range", "")
+            if response.status != 206 or "/" not in content_range:
+                return None, url
+            response.read()
+            total = content_range.rsplit("/", 1)[1].strip()
+            return (int(total) if total.isdigit() else None), url
+        finally:
+            # Without Range support the whole file would follow; drop the connection instead
+            response.close()
+    return None, url
+
+
+def plan_chunks(total: int, connections: int) -> int:
+    """Chunk size giving each connection a few ranges to balance slow ones"""
+    return min(MAX_CHUNK, max(MIN_CHUNK, total // (connections * 4)))
+
+
+def preallocate(fd: int, size: int):
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass  # e.g. not supported by the filesystem
+    os.ftruncate(fd, size)
+
+
+class SegmentState:
+    """Set of finished chunk indexes, persisted atomically next to the .part file"""
+
+    def __init__(self, path: str, total: int, chunk_size: int):
+        self.path = path
+        self.total = total
+        self.chunk_size = chunk_size
+        self.done: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("total") != self.total or state.get("chunk_size") != self.chunk_size:
+            return False
+        self.done = set(state.get("done", []))
+        return True
+
+    def mark(self, index: int):
+        with self._lock:
+            self.done.add(index)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"total": self.total, "chunk_size": self.chunk_size, "done": sorted(self.done)}, f)
+            os.replace(tmp, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class SegmentFetcher:
+    """
+    Fetches the missing chunks of one file over a pool of connections.
+
+    Worker threads pull chunk indexes from a shared queue, so fast
+    connections naturally take more of the file than slow ones. Each chunk
+    is one request on a pooled keep-alive connection, normally the one the
+    worker's previous chunk just returned.
+    """
+
+    def __init__(self, url: str, headers: Dict[str, str], fd: int, state: SegmentState,
+                 connections: int, retries: int = 10, verify: bool = True, timeout: float = 20.0,
+                 throttle=None):
+        self.url = url
+        self.headers = {k: v for k, v in headers.items() if k.lower() != "range"}
+        self.headers["Accept-Encoding"] = "identity"
+        self.fd = fd
+        self.state = state
+        self.connections = connections
+        self.retries = retries
+        self.timeout = timeout
+        self.throttle = throttle
+        self.downloaded = 0
+        self.error: Optional[BaseException] = None
+        self.verify = verify
+        self._lock = threading.Lock()
+        self._chunks: "queue.Queue[int]" = queue.Queue()
+        self._threads = []
+        self._stop = threading.Event()
+
+    def start(self):
+        count = -(-self.state.total // self.state.chunk_size)
+        for index in range(count):
+            if index in self.state.done:
+                start, end = self._chunk_range(index)
+                self.downloaded += end - start + 1
+            else:
+                self._chunks.put(index)
+        for _ in range(min(self.connections, self._chunks.qsize())):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def alive(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def wait(self, timeout: float):
+        for thread in self._threads:
+            thread.join(timeout)
+            if thread.is_alive():
+                return
+
+    def cancel(self):
+        self._stop.set()
+
+    def _chunk_range(self, index: int) -> Tuple[int, int]:
+        start = index * self.state.chunk_size
+        return start, min(start + self.state.chunk_size, self.state.total) - 1
+
+    def _worker(self):
+        parts = urlsplit(self.url)
+        try:
+            while not self._stop.is_set():
+                try:
+                    index = self._chunks.get_nowait()
+                except queue.Empty:
+                    return
+                attempt = 0
+                while True:
+                    try:
+                        self._fetch(parts, index)
+                        break
+                    except (OSError, http.client.HTTPException, SegmentError) as e:
+                        attempt += 1
+                        if attempt > self.retries or self._stop.is_set():
+                            raise SegmentError(f"range {index} failed: {e}") from e
+                        time.sleep(min(2 ** attempt * 0.25, 10))
+                self.state.mark(index)
+        except BaseException as e:
+            with self._lock:
+                if self.error is None:
+                    self.error = e
+            self._stop.set()
+
+    def _fetch(self, parts: SplitResult, index: int):
+        start, end = self._chunk_range(index)
+        response = _request(parts, {**self.headers, "Range": f"bytes={start}-{end}"}, self.timeout, self.verify)
+        offset = start
+        fetched = 0
+        try:
+            if response.status != 206:
+                raise SegmentError(f"HTTP {response.status} for range {start}-{end}")
+            while offset <= end:
+                if self._stop.is_set():
+                    raise SegmentError("cancelled")
+                block = response.read(min(BLOCK_SIZE, end - offset + 1))
+                if not block:
+                    raise SegmentError(f"connection closed at {offset} of range {start}-{end}")
+                os.pwrite(self.fd, block, offset)
+                offset += len(block)
+                fetched += len(block)
+                with self._lock:
+                    self.downloaded += len(block)
+                if self.throttle is not None:
+                    self.throttle.consume(len(block))
+        except BaseException:
+            # The whole range is fetched again on retry
+            with self._lock:
+                self.downloaded -= fetched
+            raise
+        finally:
+            # Only a range read to the end leaves its connection to the pool
+            response.close()
+
+
+class SegmentedFD(FileDownloader):
+    """yt-dlp downloader that fetches one http(s) format over several connections"""
+
+    FD_NAME = "segmented"
+
+    def real_download(self, filename, info_dict):
+        connections = self.params.get("segment_connections") or 1
+        url = info_dict["url"]
+        headers = dict(info_dict.get("http_headers") or {})
+        cookie = self.ydl.cookiejar.get_cookie_header(url)
+        if cookie:
+            headers["Cookie"] = cookie
+
+        total = None
+        if connections > 1 and hasattr(os, "pwrite") and not self.params.get("proxy"):
+            try:
+                total, url = probe(url, headers, self.params.get("socket_timeout") or 20.0,
+                                   not self.params.get("nocheckcertificate"))
+            except Exception:
+                total = None
+        if not total or total < MIN_SEGMENTED_SIZE:
+            return self._fallback(filename, info_dict)
+
+        tmpfilename = self.temp_name(filename)
+        self.report_destination(filename)
+        chunk_size = plan_chunks(total, connections)
+        state = SegmentState(tmpfilename + ".segments", total, chunk_size)
+        resuming = os.path.isfile(tmpfilename) and state.load()
+
+        fd = os.open(tmpfilename, os.O_RDWR | os.O_CREAT | (0 if resuming else os.O_TRUNC), 0o644)
+        try:
+            if not resuming:
+                preallocate(fd, total)
+            throttle = self.params.get("throttle")
+            if throttle is not None:
+                throttle.claim(filename)
+            fetcher = SegmentFetcher(
+                url, headers, fd, state, connections,
+                retries=self.params.get("retries", 10),
+                verify=not self.params.get("nocheckcertificate"),
+                timeout=self.params.get("socket_timeout") or 20.0,
+                throttle=throttle,
+            )
+            start = time.time()
+            fetcher.start()
+            resumed_bytes = fetcher.downloaded
+            try:
+                while fetcher.alive():
+                    fetcher.wait(PROGRESS_INTERVAL)
+                    self._report(filename, tmpfilename, info_dict, fetcher.downloaded, resumed_bytes, total, start)
+            except BaseException:
+                fetcher.cancel()
+                raise
+            if fetcher.error is not None:
+                self.report_error(str(fetcher.error))
+                return False
+        finally:
+            os.close(fd)
+
+        state.remove()
+        self.try_rename(tmpfilename, filename)
+        self._hook_progress({
+            "downloaded_bytes": total,
+            "total_bytes": total,
+            "filename": filename,
+            "status": "finished",
+            "elapsed": time.time() - start,
+        }, info_dict)
+        return True
+
+    def _report(self, filename, tmpfilename, info_dict, downloaded, resumed, total, start):
+        now = time.time()
+        speed = self.calc_speed(start, now, downloaded - resumed)
+        self._hook_progress({
+            "status": "downloading",
+            "downloaded_bytes": downloaded,
+            "total_bytes": total,
+            "filename": filename,
+            "tmpfilename": tmpfilename,
+            "eta": self.calc_eta(speed, total - downloaded),
+            "speed": speed,
+            "elapsed": now - start,
+        }, info_dict)
+
+    def _fallback(self, filename, info_dict):
+        fd = HttpFD(self.ydl, self.params)
+        for hook in self._progress_hooks:
+            if hook != self.report_progress:
+                fd.add_progress_hook(hook)
+        return fd.real_download(filename, info_dict)
+
+
+class SegmentedYoutubeDL(ytdlp.YoutubeDL):
+    """
+    YoutubeDL that routes direct http(s) formats through SegmentedFD when the
+    ``segment_connections`` param is above one
+    """
+
+    def dl(self, name, info, subtitle=False, test=False):
+        if (not subtitle and not test and name != "-"
+                and (self.params.get("segment_connections") or 1) > 1
+                and not self.params.get("external_downloader")
+                and info.get("url")
+                and ytdlp.utils.determine_protocol(info) in ("http", "https")):
+            fd = SegmentedFD(self, self.params)
+            for hook in self._progress_hooks:
+                fd.add_progress_hook(hook)
+            new_info = self._copy_infodict(info)
+            if new_info.get("http_headers") is None:
+                new_info["http_headers"] = self._calc_headers(new_info)
+            return fd.download(name, new_info, subtitle)
+        return super().dl(name, info, subtitle, test)
@@ -0,0 +1,133 @@
+"""
+Sidecar files written next to the media while it downloads
+
+Subtitles, chapters, the description and the info JSON are all known once
+formats are selected, from the same info dict the download uses (the
+cached one when there is one). yt-dlp would write them one after the
+other before the media transfer starts; ``sidecar_tasks`` instead turns
+each into a task that the engine starts at format selection on its
+sidecar pool, so they are fetched alongside the media and add nothing to
+a job's wall-clock time.
+
+Files are named after the media file (``Title [id].en.vtt``,
+``Title [id].info.json``), written under a temporary name and renamed into
+place as each one finishes. Files that already exist, as after a retried
+or resumed job, are left alone.
+
+Like ``postprocessors``, this module imports yt-dlp and is only imported
+once a download starts.
+"""
+import json
+import os
+import re
+from functools import partial
+from typing import Optional, Dict, Any, List, Callable
+
+from yt_dlp.networking import Request
+
+# Subtitle formats in order of preference; otherwise the site's best (last listed)
+SUBTITLE_FORMATS = ("vtt", "srt", "ttml")
+
+
+def _wanted(lang: str, languages: List[str]) -> bool:
+    for pattern in languages:
+        if pattern == "all":
+            return True
+        try:
+            if re.fullmatch(pattern, lang):
+                return True
+        except re.error:
+            if pattern == lang:
+                return True
+    return False
+
+
+def _best_track(tracks: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # Live chat replays and other non-HTTP tracks need a downloader of their own
+    usable = [t for t in tracks if t.get("ext") and (t.get("data") is not None or (
+        t.get("url") and t.get("protocol") in (None, "http", "https")))]
+    for ext in SUBTITLE_FORMATS:
+        for track in usable:
+            if track["ext"] == ext:
+                return track
+    return usable[-1] if usable else None
+
+
+def select_subtitles(info: Dict[str, Any], languages: List[str], automatic: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    The subtitle track to write per language code. ``languages`` holds codes
+    or regular expressions ("en", "de", "pt.*") or "all"; uploaded subtitles
+    win over automatic captions of the same language.
+    """
+    if not languages:
+        return {}
+    sources = [info.get("subtitles") or {}]
+    if automatic:
+        sources.append(info.get("automatic_captions") or {})
+    chosen: Dict[str, Dict[str, Any]] = {}
+    for source in sources:
+        for lang, tracks in source.items():
+            if lang in chosen or lang == "live_chat" or not _wanted(lang, languages):
+                continue
+            track = _best_track(tracks or [])
+            if track is not None:
+                chosen[lang] = track
+    return chosen
+
+
+def write_atomic(path: str, data: bytes) -> Optional[str]:
+    """Write ``data`` to ``path`` through a temporary file; None when ``path`` already exists"""
+    if os.path.exists(path):
+        return None
+    tmp = f"{path}.part"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return path
+
+
+def _json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _write_subtitle(ydl, track: Dict[str, Any], headers: Dict[str, str], path: str) -> Optional[str]:
+    if os.path.exists(path):
+        return None
+    data = track.get("data")
+    if data is None:
+        with ydl.urlopen(Request(track["url"], headers=track.get("http_headers") or headers)) as response:
+            data = response.read()
+    elif isinstance(data, str):
+        data = data.encode("utf-8")
+    return write_atomic(path, data)
+
+
+def sidecar_tasks(ydl, info: Dict[str, Any], options) -> Dict[str, Callable[[], Optional[str]]]:
+    """
+    A callable per sidecar file ``options`` (DownloadOptions) asks for, by
+    path, given the info dict of a video whose formats are selected. Each
+    returns the path it wrote, or None when the file was already there.
+    Everything the tasks need is copied out of ``info`` here, since yt-dlp
+    keeps updating it while they run.
+    """
+    filename = info.get("_filename")
+    if not filename:
+        return {}
+    base = os.path.splitext(filename)[0]
+    tasks: Dict[str, Callable[[], Optional[str]]] = {}
+
+    headers = dict(info.get("http_headers") or {})
+    for lang, track in select_subtitles(info, options.subtitle_langs, options.auto_subtitles).items():
+        path = f"{base}.{lang}.{track['ext']}"
+        tasks[path] = partial(_write_subtitle, ydl, dict(track), headers, path)
+    if options.write_chapters and info.get("chapters"):
+        path = f"{base}.chapters.json"
+        tasks[path] = partial(write_atomic, path, _json(info["chapters"]))
+    if options.write_description and info.get("description") is not None:
+        path = f"{base}.description"
+        tasks[path] = partial(write_atomic, path, info["description"].encode("utf-8"))
+    if options.write_info_json:
+        # The same cleanup yt-dlp applies to its own .info.json
+        path = f"{base}.info.json"
+        tasks[path] = partial(write_atomic, path, _json(ydl.sanitize_info(info, True)))
+    return tasks
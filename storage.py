@@ -0,0 +1,197 @@
+"""
+Disk space for downloads
+
+Without a check, a full disk shows up as a failed write hours into a batch,
+after gigabytes of a download were fetched for nothing. ``OutputManager``
+books space for every running job before its first byte instead:
+
+* when a job starts, it reserves the size its format index estimates on
+  whichever of its output directory and the configured volumes has the
+  most space left once other jobs' reservations are taken into account;
+* once yt-dlp has selected the formats, the reservation is resized to
+  their reported sizes (``filesize`` or ``filesize_approx``), doubled
+  when a merge or conversion will keep the streams and the output side by
+  side for a while;
+* progress hooks count what the job has written, so a reservation only
+  holds back the part of the file that is still to come.
+
+A job that does not fit fails with ``InsufficientSpace`` before anything
+is downloaded, and every volume keeps ``min_free`` bytes of headroom.
+
+yt-dlp writes ``.part`` files, fragments and merge output next to the
+final file, so finishing a download is a rename on the same filesystem,
+never a copy; segmented downloads preallocate their ``.part`` file.
+"""
+import os
+import re
+import shutil
+import threading
+from typing import Optional, Dict, Any, Iterable, List
+
+MIN_FREE = 512 * 1024 * 1024
+# A merge or conversion keeps the downloaded streams until its output is complete
+CONVERSION_FACTOR = 2
+
+
+class InsufficientSpace(Exception):
+    """No output volume has room for a job"""
+
+
+def parse_size(text: str) -> int:
+    """'512M', '2G', '1.5GiB' -> bytes"""
+    match = re.fullmatch(r"(?i)\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*", text)
+    if not match:
+        raise ValueError(f"invalid size: {text!r}")
+    number, unit = match.groups()
+    return int(float(number) * (1024 ** ("kmgt".index(unit.lower()) + 1) if unit else 1))
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def selected_size(info: Dict[str, Any], conversion: Optional[str] = None) -> Optional[int]:
+    """
+    Peak bytes on disk for the formats yt-dlp selected; None when a format
+    reports no size
+    """
+    total = 0
+    for f in info.get("requested_formats") or [info]:
+        size = f.get("filesize") or f.get("filesize_approx")
+        if not size:
+            return None
+        total += int(size)
+    return total * (CONVERSION_FACTOR if conversion in ("remux", "transcode") else 1)
+
+
+def _existing(path: str) -> str:
+    # Directories are created on demand; measure the filesystem they will be on
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+class Reservation:
+    """Space held on one volume for one job; ``hook`` is a progress hook counting what was written"""
+
+    def __init__(self, manager: "OutputManager", path: str, device: int, size: int):
+        self.manager = manager
+        self.path = path
+        self.device = device
+        self.size = size
+        # Hooks run on download and fragment threads while other jobs read ``remaining``
+        self._lock = threading.Lock()
+        self._written: Dict[str, int] = {}
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            return max(0, self.size - sum(self._written.values()))
+
+    def hook(self, d: Dict[str, Any]):
+        if d.get("status") in ("downloading", "finished") and d.get("filename") and d.get("downloaded_bytes"):
+            with self._lock:
+                self._written[d["filename"]] = d["downloaded_bytes"]
+
+    def resize(self, size: int):
+        """
+        Hold ``size`` bytes for the files about to be downloaded (the next
+        playlist entry's, say) instead; raises InsufficientSpace when the
+        volume has no room
+        """
+        self.manager._resize(self, size)
+
+    def release(self):
+        self.manager._release(self)
+
+
+class OutputManager:
+    """
+    Space reservations of all running jobs, per filesystem, and the choice
+    of output volume; safe to share between threads. ``volumes`` are
+    directories jobs may be routed to in addition to their own output
+    directory.
+    """
+
+    def __init__(self, volumes: Iterable[str] = (), min_free: int = MIN_FREE):
+        self.volumes = [os.path.abspath(os.path.expanduser(v)) for v in volumes]
+        self.min_free = min_free
+        self._lock = threading.Lock()
+        self._reservations: List[Reservation] = []
+
+    def available(self, path: str) -> int:
+        """Bytes a new reservation on ``path``'s filesystem could take"""
+        existing = _existing(path)
+        with self._lock:
+            return self._available(existing, os.stat(existing).st_dev)
+
+    def reserve(self, outdir: str, size: Optional[int] = None) -> Reservation:
+        """
+        Hold ``size`` bytes (just the headroom when unknown) on ``outdir`` or,
+        with volumes configured, on whichever candidate has the most room.
+        The reservation's ``path`` is the directory to write to, created if
+        needed. Raises InsufficientSpace when no candidate has room.
+        """
+        candidates = [os.path.abspath(outdir)] + [v for v in self.volumes if v != os.path.abspath(outdir)]
+        size = size or 0
+        with self._lock:
+            best = None
+            for path in candidates:
+                existing = _existing(path)
+                try:
+                    device = os.stat(existing).st_dev
+                    available = self._available(existing, device)
+                except OSError:
+                    continue
+                if best is None or available > best[0]:
+                    best = (available, path, device)
+            if best is None or best[0] < size:
+                available = format_bytes(max(0, best[0])) if best else "nothing"
+                needed = f"{format_bytes(size)} needed" if size else f"{format_bytes(self.min_free)} must stay free"
+                raise InsufficientSpace(f"not enough disk space in {outdir}: {needed}, {available} available")
+            reservation = Reservation(self, best[1], best[2], size)
+            self._reservations.append(reservation)
+        os.makedirs(reservation.path, exist_ok=True)
+        return reservation
+
+    def volume_of(self, path: str) -> Optional[str]:
+        """The configured volume ``path`` is in, if any"""
+        path = os.path.abspath(path)
+        for volume in self.volumes:
+            if os.path.commonpath([volume, path]) == volume:
+                return volume
+        return None
+
+    def reserved(self) -> int:
+        """Bytes held back for running jobs, on all volumes"""
+        with self._lock:
+            return sum(r.remaining for r in self._reservations)
+
+    def _available(self, existing: str, device: int) -> int:
+        held = sum(r.remaining for r in self._reservations if r.device == device)
+        return shutil.disk_usage(existing).free - held - self.min_free
+
+    def _resize(self, reservation: Reservation, size: int):
+        with self._lock:
+            held = sum(r.remaining for r in self._reservations
+                       if r is not reservation and r.device == reservation.device)
+            available = shutil.disk_usage(_existing(reservation.path)).free - held - self.min_free
+            if size > available:
+                raise InsufficientSpace(f"not enough disk space in {reservation.path}: {format_bytes(size)} needed, "
+                                        f"{format_bytes(max(0, available))} available")
+            with reservation._lock:
+                reservation.size = size
+                reservation._written.clear()
+
+    def _release(self, reservation: Reservation):
+        with self._lock:
+            if reservation in self._reservations:
+                self._reservations.remove(reservation)
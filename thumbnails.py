@@ -0,0 +1,165 @@
+"""
+Two-level thumbnail cache with a bounded fetch pool
+
+Thumbnails are shown in the info panel and on every queue row, often for the
+same video several times. Each one is fetched once, resized once and kept:
+
+* in memory, as the display object built by ``make_image`` (a CTkImage in the
+  GUI), in an LRU of ``memory_items`` entries;
+* on disk, pre-resized, under ``cache_dir()/thumbnails`` keyed by a hash of the
+  URL and size, trimmed to ``max_disk_bytes`` by modification time.
+
+Misses are fetched by a fixed pool of ``workers`` threads over the
+process-wide keep-alive connections of ``netpool``, and concurrent requests
+for the same thumbnail share a single fetch.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from urllib.parse import urlsplit, urljoin
+
+from PIL import Image, features
+
+from paths import cache_dir
+
+DEFAULT_WORKERS = 4
+DEFAULT_MEMORY_ITEMS = 256
+DEFAULT_MAX_DISK_BYTES = 32 * 1024 * 1024
+MAX_REDIRECTS = 5
+TIMEOUT = 10.0
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) SimpleDownloader"
+
+Size = Tuple[int, int]
+
+
+class ThumbnailCache:
+    """Memory LRU over a disk store over a pooled fetcher; safe to share between threads"""
+
+    def __init__(self, make_image: Callable[[Image.Image], Any] = lambda image: image,
+                 path: Optional[Path] = None, workers: int = DEFAULT_WORKERS,
+                 memory_items: int = DEFAULT_MEMORY_ITEMS, max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        self.make_image = make_image
+        self.path = Path(path) if path else cache_dir() / "thumbnails"
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.format, self.suffix = ("WEBP", ".webp") if features.check("webp") else ("JPEG", ".jpg")
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._waiting: Dict[str, List[Callable[[Any], None]]] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._pool.submit(self._trim_disk)
+
+    def get(self, url: str, size: Size, callback: Callable[[Any], None]):
+        """
+        Call ``callback(image)`` with the thumbnail of ``url`` fitted into
+        ``size``. Memory hits call back immediately on the calling thread;
+        everything else calls back on a pool thread, and never for failures.
+        """
+        key = self._key(url, size)
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+            elif key in self._waiting:
+                self._waiting[key].append(callback)
+                return
+            else:
+                self._waiting[key] = [callback]
+        if image is not None:
+            callback(image)
+            return
+        self._pool.submit(self._load, key, url, size)
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+    # Internals
+
+    def _key(self, url: str, size: Size) -> str:
+        return hashlib.sha1(f"{url}|{size[0]}x{size[1]}".encode("utf-8")).hexdigest()
+
+    def _load(self, key: str, url: str, size: Size):
+        image = None
+        try:
+            image = self._from_disk(key)
+            if image is None:
+                image = self._fetch(url, size)
+                self._to_disk(key, image)
+            image = self.make_image(image)
+        except Exception:
+            pass  # Thumbnails are decoration; callers keep their placeholder
+        with self._lock:
+            callbacks = self._waiting.pop(key, [])
+            if image is not None:
+                self._memory[key] = image
+                while len(self._memory) > self.memory_items:
+                    self._memory.popitem(last=False)
+        if image is not None:
+            for callback in callbacks:
+                callback(image)
+
+    def _from_disk(self, key: str) -> Optional[Image.Image]:
+        path = self.path / (key + self.suffix)
+        try:
+            with Image.open(path) as image:
+                image.load()
+            os.utime(path)  # Recently used files survive trimming
+            return image
+        except (OSError, ValueError):
+            return None
+
+    def _to_disk(self, key: str, image: Image.Image):
+        path = self.path / (key + self.suffix)
+        tmp = str(path) + ".tmp"
+        try:
+            image.save(tmp, self.format, quality=85)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _trim_disk(self):
+        try:
+            files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                     for entry in os.scandir(self.path) if entry.is_file()]
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def _fetch(self, url: str, size: Size) -> Image.Image:
+        for _ in range(MAX_REDIRECTS):
+            status, headers, body = self._request(url)
+            if status in (301, 302, 303, 307, 308) and headers.get("location"):
+                url = urljoin(url, headers["location"])
+                continue
+            if status != 200:
+                raise OSError(f"HTTP {status}")
+            image = Image.open(io.BytesIO(body))
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+            return image.convert("RGB")
+        raise OSError("too many redirects")
+
+    def _request(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        import netpool  # Imported by the pool, off the GUI's startup path
+
+        parts = urlsplit(url)
+        path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        response = netpool.POOL.request(parts.scheme, parts.hostname, parts.port, "GET", path,
+                                        headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT)
+        with response:
+            # Read to the end, the connection goes back to the pool
+            body = response.read()
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, body
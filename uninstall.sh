@@ -64,6 +64,13 @@ if [ -f "$BIN_DIR/simpledownloader-gui" ]; then
     print_success "GUI launcher removed"
 fi
 
+# Remove daemon launcher
+if [ -f "$BIN_DIR/simpledownloader-daemon" ]; then
+    print_info "Removing daemon launcher..."
+    rm -f "$BIN_DIR/simpledownloader-daemon"
+    print_success "Daemon launcher removed"
+fi
+
 # Remove desktop entry
 if [ -f "$DESKTOP_DIR/simpledownloader.desktop" ]; then
     print_info "Removing desktop entry..."